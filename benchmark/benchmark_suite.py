@@ -0,0 +1,230 @@
+"""
+Benchmark suite for the game theory kernels.
+
+Run with
+
+    python3 -m benchmark.benchmark_suite --output bench.json
+    python3 -m benchmark.benchmark_suite --quick --baseline bench.json
+
+Every kernel is run over a sweep of input sizes on seeded random inputs. For every size the
+best wall time over `--repeats` runs and the peak traced memory of one extra run are
+reported, together with the scaling exponents (slope of log time / log memory over log size).
+With `--baseline` the results are compared against a previous JSON report.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, NamedTuple
+
+import numpy as np
+
+from benchmark.generators import random_bid_distribution, random_coalition_values, random_strategic_form_game
+from lib.auction import vickery_auction_expected_utilities
+from lib.cooperative_game import banzhaf_indexes, shapley_values
+
+# Runs faster than this are too noisy to fit exponents or flag regressions on
+MIN_MEASURABLE_SECONDS = 1e-3
+
+
+class Kernel(NamedTuple):
+    """
+    A benchmarked function: `setup(size, seed)` returns the argument-free call to time.
+    Scaling exponents are fitted over `scale(size)`, e.g. the 2^players coalitions of a
+    cooperative game, described by `scale_label`.
+    """
+    name: str
+    size_label: str
+    sizes: List[int]
+    quick_sizes: List[int]
+    setup: Callable[[int, int], Callable[[], object]]
+    checksum: Callable[[object], float]
+    scale: Callable[[int], float] = float
+    scale_label: str = None
+
+
+def _pure_nash_equilibria(size, seed):
+    game = random_strategic_form_game(size, seed, payoff_range=10)
+    return game.pure_nash_equilibria
+
+
+def _eliminate_dominated_strategies(size, seed):
+    game = random_strategic_form_game(size, seed, payoff_range=100, row_spread=200)
+    return game.eliminate_dominated_strategies
+
+
+def _shapley_values(size, seed):
+    values = random_coalition_values(size, seed)
+    return lambda: shapley_values(values)
+
+
+def _banzhaf_indexes(size, seed):
+    values = random_coalition_values(size, seed)
+    return lambda: banzhaf_indexes(values)
+
+
+def _vickery_auction_expected_utilities(size, seed):
+    evaluation, bids, probabilities = random_bid_distribution(size, seed)
+    return lambda: vickery_auction_expected_utilities(evaluation, bids, probabilities)
+
+
+def _dict_checksum(result: dict) -> float:
+    return round(float(sum(result.values())), 6)
+
+
+def _coalition_count(player_count: int) -> float:
+    return float(2 ** player_count)
+
+
+KERNELS = [
+    Kernel("pure_nash_equilibria", "strategies", [10, 50, 100, 500, 1000, 2000, 5000], [100, 200, 500, 1000],
+           _pure_nash_equilibria, len),
+    Kernel("eliminate_dominated_strategies", "strategies", [10, 50, 100, 500, 1000, 2000, 5000], [20, 50, 100, 200],
+           _eliminate_dominated_strategies, lambda game: sum(len(strategies) for strategies in game._strategies)),
+    Kernel("shapley_values", "players", [5, 10, 15, 20, 25], [10, 13, 16, 19], _shapley_values, _dict_checksum,
+           _coalition_count, "2^players"),
+    Kernel("banzhaf_indexes", "players", [5, 10, 15, 20, 25], [10, 13, 16, 19], _banzhaf_indexes, _dict_checksum,
+           _coalition_count, "2^players"),
+    Kernel("vickery_auction_expected_utilities", "bid_levels", [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6],
+           [10 ** 3, 10 ** 4, 10 ** 5], _vickery_auction_expected_utilities, _dict_checksum),
+]
+
+
+def measure(call: Callable[[], object], repeats: int) -> dict:
+    """Best wall time over `repeats` runs and the peak memory traced during one more run."""
+    seconds = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = call()
+        seconds.append(time.perf_counter() - start)
+        # a single run of a slow size is precise enough
+        if seconds[-1] > 1.0:
+            break
+
+    tracemalloc.start()
+    try:
+        call()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": min(seconds), "peak_bytes": peak_bytes, "result": result}
+
+
+def scaling_exponent(sizes: List[int], measurements: List[float], minimum: float = 0.0):
+    """Least-squares slope of log(measurement) over log(size), None with fewer than two usable points."""
+    points = [(size, value) for size, value in zip(sizes, measurements) if value > minimum and size > 0]
+    if len(points) < 2:
+        return None
+    log_sizes, log_values = np.log(np.array(points, dtype=float)).T
+    return round(float(np.polyfit(log_sizes, log_values, 1)[0]), 3)
+
+
+def run_kernel(kernel: Kernel, sizes: List[int], seed: int, repeats: int, time_budget: float, log=print) -> dict:
+    """Run the size sweep of one kernel, stopping after the first size slower than `time_budget` seconds."""
+    results = []
+    for size in sizes:
+        call = kernel.setup(size, seed)
+        measurement = measure(call, repeats)
+        results.append({"size": size,
+                        "seconds": measurement["seconds"],
+                        "peak_bytes": measurement["peak_bytes"],
+                        "checksum": kernel.checksum(measurement["result"])})
+        log(f"{kernel.name:<36} {kernel.size_label}={size:<8} {measurement['seconds']:10.4f}s "
+            f"{measurement['peak_bytes'] / 2 ** 20:10.2f}MiB")
+        if measurement["seconds"] > time_budget:
+            log(f"{kernel.name:<36} stopping the sweep, {size} exceeded the {time_budget}s budget")
+            break
+
+    measured_sizes = [kernel.scale(result["size"]) for result in results]
+    return {"size_label": kernel.size_label,
+            "exponent_scale": kernel.scale_label or kernel.size_label,
+            "results": results,
+            "time_exponent": scaling_exponent(measured_sizes, [result["seconds"] for result in results],
+                                              MIN_MEASURABLE_SECONDS),
+            "memory_exponent": scaling_exponent(measured_sizes, [result["peak_bytes"] for result in results])}
+
+
+def run_benchmarks(kernel_names: List[str] = None, quick: bool = False, seed: int = 0, repeats: int = 3,
+                   time_budget: float = 30.0, log=print) -> dict:
+    """Run the selected kernels (all by default) and return the JSON report."""
+    kernels = [kernel for kernel in KERNELS if kernel_names is None or kernel.name in kernel_names]
+    report = {"meta": {"python": platform.python_version(),
+                       "numpy": np.__version__,
+                       "platform": platform.platform(),
+                       "seed": seed,
+                       "repeats": repeats,
+                       "quick": quick,
+                       "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "kernels": {}}
+    for kernel in kernels:
+        sizes = kernel.quick_sizes if quick else kernel.sizes
+        report["kernels"][kernel.name] = run_kernel(kernel, sizes, seed, repeats, time_budget, log)
+    return report
+
+
+def compare_with_baseline(report: dict, baseline: dict, threshold: float = 1.5) -> List[dict]:
+    """
+    Compare every (kernel, size) measured in both reports.
+
+    :param threshold: A size is a regression when it is this many times slower than the baseline.
+    :return: One entry per compared size with the time and memory ratios, whether it regressed
+    and whether the result checksum changed (None when the reports used different seeds).
+    """
+    same_inputs = baseline.get("meta", {}).get("seed") == report["meta"]["seed"]
+    comparisons = []
+    for name, kernel_report in report["kernels"].items():
+        baseline_results = {result["size"]: result for result in baseline.get("kernels", {}).get(name, {}).get("results", [])}
+        for result in kernel_report["results"]:
+            reference = baseline_results.get(result["size"])
+            if reference is None:
+                continue
+            time_ratio = result["seconds"] / max(reference["seconds"], MIN_MEASURABLE_SECONDS)
+            comparisons.append({"kernel": name,
+                                "size": result["size"],
+                                "time_ratio": round(time_ratio, 3),
+                                "memory_ratio": round(result["peak_bytes"] / max(reference["peak_bytes"], 1), 3),
+                                "regressed": time_ratio > threshold and result["seconds"] > MIN_MEASURABLE_SECONDS,
+                                "checksum_changed": result["checksum"] != reference["checksum"] if same_inputs else None})
+    return comparisons
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the game theory kernels.")
+    parser.add_argument("--kernels", nargs="+", choices=[kernel.name for kernel in KERNELS],
+                        help="Kernels to run, all by default.")
+    parser.add_argument("--quick", action="store_true", help="Use the small size sweeps.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random inputs.")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per size, the best one is reported.")
+    parser.add_argument("--time-budget", type=float, default=30.0,
+                        help="Stop a kernel's sweep after the first size slower than this many seconds.")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+    parser.add_argument("--baseline", help="JSON report to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Slowdown ratio reported as a regression.")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.kernels, args.quick, args.seed, args.repeats, args.time_budget,
+                            log=lambda line: print(line, file=sys.stderr))
+
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            report["comparison"] = compare_with_baseline(report, json.load(file), args.threshold)
+        regressions = [entry for entry in report["comparison"] if entry["regressed"] or entry["checksum_changed"]]
+        for entry in regressions:
+            print(f"Regression in {entry['kernel']} at size {entry['size']}: {entry}", file=sys.stderr)
+
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
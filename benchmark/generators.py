@@ -0,0 +1,55 @@
+import numpy as np
+
+from lib.coalition_values import CoalitionValues
+from lib.strategic_form_game import TwoPlayerStrategicFormGame
+
+
+def random_strategic_form_game(strategy_count: int, seed: int, payoff_range: int = 100,
+                               row_spread: int = 0) -> TwoPlayerStrategicFormGame:
+    """
+    Random square two-player game with integer payoffs in [0, payoff_range).
+
+    :param strategy_count: Strategies of every player.
+    :param seed: Seed of the generator, equal seeds give equal games.
+    :param payoff_range: Exclusive upper bound of the random payoffs.
+    :param row_spread: Adds a random offset in [0, row_spread) to every strategy of a player,
+    larger spreads make more strategies dominated.
+    """
+    rng = np.random.default_rng(seed)
+    shape = (strategy_count, strategy_count)
+    first_player_payoffs = rng.integers(0, payoff_range, shape, dtype=np.int32)
+    second_player_payoffs = rng.integers(0, payoff_range, shape, dtype=np.int32)
+    if row_spread > 0:
+        first_player_payoffs += rng.integers(0, row_spread, (strategy_count, 1), dtype=np.int32)
+        second_player_payoffs += rng.integers(0, row_spread, (1, strategy_count), dtype=np.int32)
+
+    strategies = [[f"r{i}" for i in range(strategy_count)], [f"c{j}" for j in range(strategy_count)]]
+    return TwoPlayerStrategicFormGame.from_payoff_arrays(strategies, first_player_payoffs, second_player_payoffs)
+
+
+def random_coalition_values(player_count: int, seed: int) -> CoalitionValues:
+    """Worth of every coalition: the sum of random member weights plus a little noise."""
+    rng = np.random.default_rng(seed)
+    players = [f"P{i}" for i in range(player_count)]
+    weights = rng.random(player_count)
+    # worth[mask] = sum of the weights of the members, built one player bit at a time
+    worth = np.zeros(1)
+    for weight in weights:
+        worth = np.concatenate([worth, worth + weight])
+    worth += rng.random(len(worth)) * 0.1
+    worth[0] = 0.0
+    return CoalitionValues.from_array(players, worth)
+
+
+def random_bid_distribution(bid_levels: int, seed: int):
+    """
+    Bid levels 0..bid_levels-1 and the CDF of the highest other bid over them.
+
+    :return: (evaluation, bids, probabilities) for the expected utility functions.
+    """
+    rng = np.random.default_rng(seed)
+    bids = np.arange(bid_levels)
+    probabilities = np.cumsum(rng.random(bid_levels))
+    probabilities /= probabilities[-1]
+    evaluation = int(rng.integers(0, bid_levels))
+    return evaluation, bids, probabilities
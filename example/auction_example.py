@@ -1,4 +1,6 @@
 from lib.auction import VickeryAuction, vickery_auction_expected_utilities, first_price_sealed_bid_auction_expected_utilities
+from lib.sealed_bid_auction import SealedBidAuction
+from lib.bayesian_auction import solve_bid_function
 from typing import List, Tuple
 
 # Define auction
@@ -83,4 +85,27 @@ print(f"First-price sealed-bid auction expected utilities: {expected_utilities}"
 
 # Vickery auction expected utilities
 expected_utilities = vickery_auction_expected_utilities(agent_evaluation, bids, probabilities)
-print(f"Vickery auction expected utilities: {expected_utilities}")
\ No newline at end of file
+print(f"Vickery auction expected utilities: {expected_utilities}")
+
+
+# N-bidder sealed-bid auctions evaluated on a batch of bid profiles
+bid_profiles = [
+    [3, 5, 5, 1],
+    [2, 2, 2, 2],
+    [7, 1, 4, 6],
+]
+for pricing in ["first", "second"]:
+    n_bidder_auction = SealedBidAuction([4, 6, 5, 7], pricing=pricing, tie_breaking="lowest_index")
+    outcomes = n_bidder_auction.evaluate(bid_profiles)
+    print(f"{pricing.capitalize()}-price winners: {outcomes.winners.tolist()}, payments: {outcomes.payments.tolist()}")
+
+
+# Equilibrium bid functions for values uniformly distributed on 0..100, searched from truthful
+# bidding in the first-price auction and from everybody bidding 0 in the second-price one
+type_grid = list(range(101))
+for auction_format, initial_bids, tolerance in [("first", "truthful", None), ("second", [0] * len(type_grid), 0.0)]:
+    bid_function = solve_bid_function(type_grid, [1] * len(type_grid), auction=auction_format, bidder_count=2,
+                                      initial_bids=initial_bids, tolerance=tolerance)
+    print(f"{auction_format.capitalize()}-price equilibrium bids for values 25, 50, 100: "
+          f"{[bid_function.bid(value) for value in [25, 50, 100]]} (converged: {bid_function.converged} "
+          f"after {bid_function.iterations} iterations, regret {bid_function.max_regret:.2f})")
@@ -1,4 +1,8 @@
-from lib.cooperative_game import shapley_values, banzhaf_indexes
+from fractions import Fraction
+
+from lib.cooperative_game import shapley_values, banzhaf_indexes, weighted_voting_shapley_values, weighted_voting_banzhaf_indexes
+from lib.cooperative_sampling import approximate_shapley_values
+from lib.core_solutions import least_core, nucleolus, is_in_core
 
 coalitions =         [(), ('O'), ('R'), ('W'), ('O','R'), ('O','W'), ('R','W'), ('O','R','W')]
 worth_of_coalition = [ 0,   170,   150,   180,       350,       380,       360,           560]
@@ -14,4 +18,53 @@ for player, value in shapley_vals.items():
 banzhaf_indexes = banzhaf_indexes(players, coalitions, worth_of_coalition)
 print("\nBanzhaf Indexes:")
 for player, index in banzhaf_indexes.items():
-    print(f"{player}: {index}")
\ No newline at end of file
+    print(f"{player}: {index}")
+
+
+# Core, least core and nucleolus
+least_core_result = least_core(players, coalitions, worth_of_coalition)
+print(f"\nLeast core epsilon: {least_core_result.epsilon:.2f} (the core is {'non-empty' if least_core_result.epsilon <= 0 else 'empty'})")
+
+nucleolus_allocation = nucleolus(players, coalitions, worth_of_coalition)
+print("Nucleolus:")
+for player, value in nucleolus_allocation.items():
+    print(f"{player}: {value:.2f}")
+print(f"Shapley values in the core: {is_in_core(shapley_vals, players, coalitions, worth_of_coalition)}")
+
+
+# Exact Shapley values keep integer worths above 2^53 and fractional worths without rounding
+exact_coalitions = [(), ('a',), ('b',), ('a', 'b')]
+large_worths = [0, 10**17 + 1, 10**17, 2 * 10**17 + 3]
+exact_large = shapley_values(['a', 'b'], exact_coalitions, large_worths, backend="exact")
+assert exact_large == {'a': 10**17 + 2, 'b': 10**17 + 1}
+print(f"\nExact Shapley values of worths above 2^53: {exact_large}")
+fraction_worths = [0, Fraction(1, 3), Fraction(1, 7), 1]
+exact_fractions = shapley_values(['a', 'b'], exact_coalitions, fraction_worths, backend="exact")
+assert exact_fractions == {'a': Fraction(25, 42), 'b': Fraction(17, 42)}
+print(f"Exact Shapley values of fractional worths: {exact_fractions}")
+# Weighted voting game: a coalition wins when its weights reach the quota
+voters = ['A', 'B', 'C', 'D']
+weights = [4, 3, 2, 1]
+quota = 6
+
+print("\nWeighted Voting Shapley-Shubik Indexes:")
+for player, value in weighted_voting_shapley_values(voters, weights, quota).items():
+    print(f"{player}: {value}")
+
+print("\nExact Weighted Voting Shapley-Shubik Indexes:")
+for player, value in weighted_voting_shapley_values(voters, weights, quota, backend="exact").items():
+    print(f"{player}: {value}")
+
+print("\nWeighted Voting Banzhaf Indexes:")
+for player, index in weighted_voting_banzhaf_indexes(voters, weights, quota).items():
+    print(f"{player}: {index}")
+
+
+# Monte Carlo Shapley values from a characteristic function
+def worth_of(coalition):
+    return worth_of_coalition[[tuple(sorted(c)) for c in coalitions].index(tuple(sorted(coalition)))]
+
+approximation = approximate_shapley_values(players, worth_of, method="antithetic", target_error=1.0, seed=0)
+print("\nApproximate Shapley Values (95% confidence):")
+for player, (low, high) in approximation.confidence_intervals().items():
+    print(f"{player}: {approximation.values[player]:.2f} in [{low:.2f}, {high:.2f}]")
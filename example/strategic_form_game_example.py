@@ -1,4 +1,11 @@
+import os
+import tempfile
+from fractions import Fraction
+
 from lib.printable_strategic_form_game import TwoPlayerStrategicFormGame, PrintableTwoPlayerStrategicFormGame
+from lib.n_player_strategic_form_game import NPlayerStrategicFormGame
+from lib.game_io import save_game, load_game
+from lib.instrumentation import instrument
 
 # Pure strategy Game
 strategies = [
@@ -21,6 +28,11 @@ game.print()
 dominant_game = game.eliminate_dominated_strategies(strictly_only=False, print_process=True)
 dominant_game.print()
 
+# Operation counters and phase timings of the elimination
+with instrument() as report:
+    game.eliminate_dominated_strategies(strictly_only=False)
+print(f"Instrumentation: {report.as_dict()}")
+
 # Pure Nash Equilibria
 equilibria = dominant_game.pure_nash_equilibria()
 print(f"Pure Nash equilibria for subgame {equilibria}")
@@ -55,6 +67,52 @@ print(game2.expected_utility(mixed_strategies))
 is_mixed_nash_equilibrium = game2.is_mixed_nash_equilibrium(mixed_strategies)
 print(f"Is mixed strategy {mixed_strategies} a mixed Nash equilibrium: {'Yes' if is_mixed_nash_equilibrium else 'No'}")
 
+# Exact check with rational probabilities, the float check tolerates tiny deviations
+exact_equilibrium = [[Fraction(2, 5), Fraction(3, 5)], [Fraction(1, 2), Fraction(1, 2)]]
+perturbed_equilibrium = [[0.4, 0.6], [0.5, 0.5000001]]
+print(f"Exact equilibrium check of {exact_equilibrium}: {game2.is_mixed_nash_equilibrium(exact_equilibrium, backend='exact')}")
+print(f"Float / exact check of {perturbed_equilibrium}: {game2.is_mixed_nash_equilibrium(perturbed_equilibrium)}"
+      f" / {game2.is_mixed_nash_equilibrium(perturbed_equilibrium, backend='exact')}")
+
+# Find Mixed Nash Equilibria
+mixed_equilibria = game2.mixed_nash_equilibria(method="support_enumeration")
+print(f"Mixed Nash equilibria (support enumeration): {mixed_equilibria}")
+
+mixed_equilibria = game2.mixed_nash_equilibria(method="lemke_howson")
+print(f"Mixed Nash equilibria (Lemke-Howson): {mixed_equilibria}")
+
+# Maximin strategies and correlated equilibria (linear programming)
+maximin = game2.maximin_strategy(game2.first_player)
+print(f"Player 1 maximin strategy {maximin.strategy} guarantees {maximin.value}")
+
+correlated = game2.correlated_equilibrium()
+print(f"Welfare maximizing correlated equilibrium {correlated.distribution.round(3).tolist()}, utilities {correlated.expected_utility}")
+
+# Zero-sum game: matching pennies, re-solved from the previous basis after a payoff edit
+strategies = [
+    ["Heads", "Tails"],
+    ["Heads", "Tails"]
+]
+
+payoffs = [
+    [(1,-1),(-1,1)],
+    [(-1,1),(1,-1)]
+]
+
+pennies = TwoPlayerStrategicFormGame(strategies, payoffs)
+solution = pennies.zero_sum_solution()
+print(f"Matching pennies value {solution.value}, strategies {solution.strategies}")
+
+payoffs[0][0] = (2,-2)
+pennies = TwoPlayerStrategicFormGame(strategies, payoffs)
+solution = pennies.zero_sum_solution(warm_start=solution)
+print(f"Edited matching pennies value {solution.value}, strategies {solution.strategies}")
+
+# Learning dynamics: regret matching+ over 4 seeds, stopped once exploitability is below 1e-3
+learning = pennies.learning_dynamics("regret_matching_plus", iterations=10000, tolerance=1e-3, seeds=4)
+print(f"Regret matching+ after {learning.iteration} iterations: {[round(p, 3) for p in learning.average_strategies()[0]]}, "
+      f"exploitability {learning.exploitability.max():.5f}")
+
 
 # Game 3
 strategies = [
@@ -95,5 +153,45 @@ payoffs = [
 
 game4 = TwoPlayerStrategicFormGame(strategies, payoffs)
 game4.print()
+
+# Print only a window of the payoff table
+game4.print(rows=(0, 3), columns=(0, 2))
+
 subgame = game4.eliminate_dominated_strategies(strictly_only=True, print_process=True)
-subgame.print()
\ No newline at end of file
+subgame.print()
+
+# Save and load game4 in the binary format, the loaded payoffs are memory-mapped
+with tempfile.TemporaryDirectory() as directory:
+    path = os.path.join(directory, "game4.game")
+    save_game(game4, path, metadata={"source": "strategic_form_game_example"})
+    loaded_game4 = load_game(path)
+    print(f"Loaded game4 has the same payoffs: {loaded_game4._payoffs == game4._payoffs}")
+    del loaded_game4
+
+    # every player keeps its own payoff dtype: integer payoffs for player 1, halves for player 2
+    mixed_game = TwoPlayerStrategicFormGame.from_payoff_arrays([["A", "B"], ["C", "D"]], [[1, 2], [3, 4]], [[1.5, 2.5], [3.5, 4.5]])
+    mixed_path = os.path.join(directory, "mixed.game")
+    save_game(mixed_game.subgame_by_indexes([[1, 0], [0]]), mixed_path)
+    loaded_mixed_game = load_game(mixed_path)
+    assert loaded_mixed_game.get_output("A", "C") == (1, 1.5) and type(loaded_mixed_game.get_output("A", "C")[0]) is int
+    print(f"Loaded mixed dtype subgame payoffs: {loaded_mixed_game.get_output('A', 'C')}, {loaded_mixed_game.get_output('B', 'C')}")
+    del loaded_mixed_game
+
+# Three player game: a volunteer's dilemma, someone has to volunteer (cost 1) or all get 0
+strategies = [
+    ["Volunteer", "Ignore"],
+    ["Volunteer", "Ignore"],
+    ["Volunteer", "Ignore"]
+]
+
+payoffs = [
+    [[(1,1,1),(1,1,2)],[(1,2,1),(1,2,2)]],
+    [[(2,1,1),(2,1,2)],[(2,2,1),(0,0,0)]],
+]
+
+game5 = NPlayerStrategicFormGame(strategies, payoffs)
+print(f"Pure Nash equilibria for game5 {game5.pure_nash_equilibria()}")
+print(f"Best responses of player 3 when nobody volunteers {game5.best_responses(2, ['Ignore', 'Ignore'])}")
+# volunteering is as good as ignoring when nobody else volunteers with probability 1/2
+mixed_strategy = [[1 - 0.5 ** 0.5, 0.5 ** 0.5]] * 3
+print(f"Expected utility {game5.expected_utility(mixed_strategy)}, equilibrium {game5.is_mixed_nash_equilibrium(mixed_strategy)}")
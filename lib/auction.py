@@ -1,4 +1,7 @@
 from typing import List
+
+import numpy as np
+
 from lib.strategic_form_game import TwoPlayerStrategicFormGame
 
 class VickeryAuction():
@@ -19,59 +22,97 @@ class VickeryAuction():
         self.bids = bids
         self.tie_breacker = tie_breacker
 
-        self._strategic_form_game = VickeryAuction._build_strategic_form_game(bids, tie_breacker, theta_values)
+        self._lazy_game = LazyVickeryAuctionGame(theta_values, bids, tie_breacker)
+        self._strategic_form_game = None
 
     def _build_strategic_form_game(bids, tie_breacker, theta_values) -> TwoPlayerStrategicFormGame:
-        player1_strategies = list([str(bid) for bid in bids])
-        player2_strategies = list(player1_strategies)
-        strategies = [player1_strategies, player2_strategies]
-
-        payoffs = []
-        for first_player_bid_index in range(len(bids)):
-            first_player_bid = bids[first_player_bid_index]
-            if len(payoffs) <= first_player_bid_index:
-                payoffs.append([])
-
-            for second_player_bid_index in range(len(bids)):
-                second_player_bid = bids[second_player_bid_index]
-
-                if first_player_bid > second_player_bid:
-                    # first player utility: evaluation - pay
-                    utility = theta_values[0] - second_player_bid
-                    payoffs[first_player_bid_index].append((utility, 0))
-
-                
-                elif first_player_bid < second_player_bid:
-                    # second player utility: evaluation - pay
-                    utility = theta_values[1] - first_player_bid
-                    payoffs[first_player_bid_index].append((0, utility))
-
-                else: # tie
-                    utility = theta_values[tie_breacker] - first_player_bid
-                    payoff = [0, 0]
-                    payoff[tie_breacker] = utility
-                    payoffs[first_player_bid_index].append(tuple(payoff))
-
-        return TwoPlayerStrategicFormGame(strategies, payoffs)
+        return LazyVickeryAuctionGame(theta_values, bids, tie_breacker).to_strategic_form_game()
 
     def game(self):
+        if self._strategic_form_game is None:
+            self._strategic_form_game = self._lazy_game.to_strategic_form_game()
         return self._strategic_form_game
+
+    def lazy_game(self) -> 'LazyVickeryAuctionGame':
+        return self._lazy_game
     
     def print(self):
         self.game().print()
 
     def outcome(self, bids: List[int]):
-        bids_as_strategies = [str(bid) for bid in bids]
-        return self.game().get_output(bids_as_strategies[0], bids_as_strategies[1])
+        return self._lazy_game.outcome(bids)
     
     def is_envy_free(self, bids: List[int]):
-        reverse_bids = list(bids)
-        reverse_bids.reverse()
+        return self._lazy_game.is_envy_free(bids)
+
+
+class LazyVickeryAuctionGame():
+    """
+    Two agent Vickery auction whose payoffs are computed on demand from the bid indexes
+    instead of being stored as a len(bids) x len(bids) payoff matrix.
+    """
+    def __init__(self, theta_values: List[int], bids: List[int], tie_breacker: int):
+        """
+        :param theta_values: List of agent evaluations for the auctioned item
+        :param bids: List of available bids
+        :param tie_breacker: Index of the agent who wins in case of a tie
+        0 for first agent, 1 for second agent
+        """
+        if tie_breacker not in (0, 1):
+            raise ValueError(f"Tie breacker must be 0 or 1, got {tie_breacker}.")
+
+        self.theta_values = theta_values
+        self.bids = np.asarray(bids)
+        self.tie_breacker = tie_breacker
+        # bids are looked up by their strategy name, so 3 and "3" are the same bid
+        self._bid_indexes = {}
+        for index, bid in enumerate(self.bids.tolist()):
+            self._bid_indexes.setdefault(str(bid), index)
 
+    def bid_index(self, bid) -> int:
+        if str(bid) not in self._bid_indexes:
+            raise ValueError(f"Bid {bid} is not one of the available bids.")
+        return self._bid_indexes[str(bid)]
+
+    def payoff_arrays(self, first_agent_bid_indexes=slice(None), second_agent_bid_indexes=slice(None)):
+        """
+        Payoff arrays of both agents for a block of bid indexes (rows: first agent, cols: second agent).
+        """
+        first_agent_bids = np.atleast_1d(self.bids[first_agent_bid_indexes])[:, None]
+        second_agent_bids = np.atleast_1d(self.bids[second_agent_bid_indexes])[None, :]
+
+        first_agent_wins = first_agent_bids > second_agent_bids
+        second_agent_wins = first_agent_bids < second_agent_bids
+        if self.tie_breacker == 0:
+            first_agent_wins = first_agent_wins | (first_agent_bids == second_agent_bids)
+        else:
+            second_agent_wins = second_agent_wins | (first_agent_bids == second_agent_bids)
+
+        # the winner pays the other agent's bid, equal to its own on a tie
+        zero = np.zeros((), dtype=np.result_type(self.bids, np.asarray(self.theta_values)))
+        first_agent_payoffs = np.where(first_agent_wins, self.theta_values[0] - second_agent_bids, zero)
+        second_agent_payoffs = np.where(second_agent_wins, self.theta_values[1] - first_agent_bids, zero)
+        return first_agent_payoffs, second_agent_payoffs
+
+    def payoff(self, first_agent_bid, second_agent_bid) -> tuple:
+        first_agent_bid_index = self.bid_index(first_agent_bid)
+        second_agent_bid_index = self.bid_index(second_agent_bid)
+        first_agent_payoffs, second_agent_payoffs = self.payoff_arrays([first_agent_bid_index], [second_agent_bid_index])
+        return (first_agent_payoffs[0, 0].item(), second_agent_payoffs[0, 0].item())
+
+    def outcome(self, bids: List[int]) -> tuple:
+        return self.payoff(bids[0], bids[1])
+
+    def is_envy_free(self, bids: List[int]) -> bool:
         outcome_before = self.outcome(bids)
-        outcome_after = self.outcome(reverse_bids)
+        outcome_after = self.outcome([bids[1], bids[0]])
 
         return outcome_after[0] <= outcome_before[0] and outcome_after[1] <= outcome_before[1]
+
+    def to_strategic_form_game(self) -> TwoPlayerStrategicFormGame:
+        strategies = [[str(bid) for bid in self.bids.tolist()] for _ in range(2)]
+        return TwoPlayerStrategicFormGame.from_payoff_arrays(strategies, *self.payoff_arrays())
+
     
 def first_price_sealed_bid_auction_expected_utilities(evaluation: int, bids: List[int], probabilities: List[float]) -> dict[int, float]:
     """
@@ -80,12 +121,8 @@ def first_price_sealed_bid_auction_expected_utilities(evaluation: int, bids: Lis
     :param probabilities: A list of probabilities corresponding to different bid levels.
     :return: The expected value of the auction for the agent.
     """
-
-    expected_utilities = {}
-    for i in range(len(bids)):
-        bid, probability = bids[i], probabilities[i]
-        expected_utilities[bid] = (evaluation - bid) * probability
-    return expected_utilities
+    expected_utilities = first_price_sealed_bid_auction_expected_utility_matrix([evaluation], bids, probabilities)
+    return dict(zip(np.asarray(bids).tolist(), expected_utilities[0].tolist()))
 
 def vickery_auction_expected_utilities(evaluation: int, bids: List[int], probabilities: List[float]) -> dict[int, float]:
     """
@@ -94,17 +131,41 @@ def vickery_auction_expected_utilities(evaluation: int, bids: List[int], probabi
     :param probabilities: A list of probabilities corresponding to different bid levels.
     :return: The expected value of the auction for the agent.
     """
-    expected_utilities = {}
-    for i in range(len(bids)):
-        bid, probability = bids[i], probabilities[i]
-        getting = evaluation * probability
-        paying = 0.0
-
-        for j in range(i):
-            pay_bid, pay_probability, next_pay_bid_probability = bids[j], probabilities[j], probabilities[j+1]
-            diff_probability = next_pay_bid_probability - pay_probability
-            paying += pay_bid * diff_probability
-
-        expected_utilities[bid] = getting - paying
-       
-    return expected_utilities
+    expected_utilities = vickery_auction_expected_utility_matrix([evaluation], bids, probabilities)
+    return dict(zip(np.asarray(bids).tolist(), expected_utilities[0].tolist()))
+
+def first_price_sealed_bid_auction_expected_utility_matrix(evaluations, bids, probabilities) -> np.ndarray:
+    """
+    Expected utilities of a first-price sealed-bid auction for many evaluations at once.
+    :param evaluations: K agent evaluations.
+    :param bids: N bid levels.
+    :param probabilities: Winning probability of every bid level, N values shared by all
+    evaluations or a K x N array.
+    :return: K x N array, entry (k, i) is the expected utility of evaluation k bidding bids[i].
+    """
+    evaluations, bids, probabilities = _as_auction_arrays(evaluations, bids, probabilities)
+    return (evaluations[:, None] - bids[None, :]) * probabilities
+
+def vickery_auction_expected_utility_matrix(evaluations, bids, probabilities) -> np.ndarray:
+    """
+    Expected utilities of a second-price sealed-bid auction for many evaluations at once, in O(K x N).
+    :param evaluations: K agent evaluations.
+    :param bids: N bid levels.
+    :param probabilities: Winning probability of every bid level (a CDF of the highest other bid),
+    N values shared by all evaluations or a K x N array.
+    :return: K x N array, entry (k, i) is the expected utility of evaluation k bidding bids[i].
+    """
+    evaluations, bids, probabilities = _as_auction_arrays(evaluations, bids, probabilities)
+
+    # paying[i] = sum over j < i of bids[j] * (p[j + 1] - p[j]), as a running prefix sum
+    paying = np.zeros(np.broadcast_shapes(probabilities.shape, (1, len(bids))))
+    paying[:, 1:] = np.cumsum(bids[:-1] * np.diff(probabilities, axis=1), axis=1)
+    return evaluations[:, None] * probabilities - paying
+
+def _as_auction_arrays(evaluations, bids, probabilities):
+    evaluations = np.atleast_1d(np.asarray(evaluations, dtype=float))
+    bids = np.asarray(bids, dtype=float)
+    probabilities = np.atleast_2d(np.asarray(probabilities, dtype=float))
+    if probabilities.shape[1] != len(bids) or probabilities.shape[0] not in (1, len(evaluations)):
+        raise ValueError(f"Expected {len(bids)} probabilities per evaluation, got shape {probabilities.shape}.")
+    return evaluations, bids, probabilities
@@ -0,0 +1,323 @@
+"""
+Analyze many independent games in a process pool and stream the results as JSON Lines.
+
+    python3 -m lib.batch_analysis games.jsonl --output results.jsonl --processes 8 --timeout 60
+
+Every input line is a game {"id": ..., "strategies": ..., "payoffs": ...} written like the
+literals of `example/strategic_form_game_example.py`, or {"id": ..., "path": ...} pointing to
+a file saved with `lib.game_io.save_game`. An optional "mixed_strategies" list holds mixed
+profiles to check with `is_mixed_nash_equilibrium`. Running again with the same output file
+resumes after the last game written.
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from lib.game_io import load_game
+from lib.n_player_strategic_form_game import NPlayerStrategicFormGame
+from lib.strategic_form_game import TwoPlayerStrategicFormGame
+
+# Payoff arrays are placed at multiples of this many bytes in the shared memory block of a chunk
+SHARED_ALIGNMENT = 64
+
+
+class BatchItem(NamedTuple):
+    """One game of a batch: an in-memory game or the path of a saved game, plus mixed profiles to check."""
+    game_id: Any
+    game: Any
+    mixed_strategies: List[List[List[float]]] = []
+
+
+class _SharedGame(NamedTuple):
+    # a dense game whose payoff arrays live in the shared memory block of its chunk
+    kind: str
+    strategies: list
+    arrays: List[tuple]
+
+
+class _GameTimeout(Exception):
+    pass
+
+
+def analyze_game(game, mixed_strategies: List[List[List[float]]] = (), strictly_only: bool = False) -> dict:
+    """
+    Eliminate dominated strategies, find the pure Nash equilibria and check the given mixed profiles.
+
+    :param game: A `TwoPlayerStrategicFormGame` or `NPlayerStrategicFormGame`.
+    :param mixed_strategies: Mixed profiles (one probability list per player) to check.
+    :param strictly_only: Only eliminate strictly dominated strategies.
+    :return: JSON serializable result.
+    """
+    subgame, trace = game.eliminate_dominated_strategies_with_trace(strictly_only)
+    return {"surviving_strategies": [list(strategies) for strategies in subgame._strategies],
+            "eliminated": len(trace),
+            "pure_nash_equilibria": [list(profile) for profile in game.pure_nash_equilibria()],
+            "mixed_nash_equilibria": [bool(game.is_mixed_nash_equilibrium(mixed_strategy))
+                                      for mixed_strategy in mixed_strategies]}
+
+
+def iter_batch_analysis(items: Iterable, processes: int = None, chunk_size: int = 64, timeout: float = None,
+                        strictly_only: bool = False) -> Iterator[dict]:
+    """
+    Analyze every game with `analyze_game`, yielding one result per game in input order.
+
+    Games are sent to the workers `chunk_size` at a time with at most two chunks per worker
+    in flight. The payoff arrays of a chunk are copied once into a shared memory block and
+    the workers build their games on top of it; saved games are memory-mapped by the workers.
+
+    :param items: `BatchItem`s or (game_id, game[, mixed_strategies]) tuples, where game is a
+        game object or the path of a saved game.
+    :param processes: Worker processes, all cores by default, 1 runs in this process.
+    :param chunk_size: Games per task.
+    :param timeout: Seconds per game, a slower game yields {"id": ..., "error": "timeout"}.
+        Timeouts use SIGALRM and are ignored where it is unavailable; they interrupt Python
+        code, so a single long numpy call finishes first.
+    :param strictly_only: Only eliminate strictly dominated strategies.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    chunks = _chunks((BatchItem(*item) for item in items), chunk_size)
+
+    if processes <= 1:
+        for chunk in chunks:
+            yield from _analyze_chunk(chunk, None, timeout, strictly_only)
+        return
+
+    with ProcessPoolExecutor(processes) as executor:
+        pending = deque()
+
+        def submit_next():
+            chunk = next(chunks, None)
+            if chunk is not None:
+                shared_chunk, memory = _share_chunk(chunk)
+                future = executor.submit(_analyze_chunk, shared_chunk, None if memory is None else memory.name,
+                                         timeout, strictly_only)
+                pending.append((future, memory))
+
+        for _ in range(2 * processes):
+            submit_next()
+        try:
+            while pending:
+                future, memory = pending.popleft()
+                try:
+                    results = future.result()
+                finally:
+                    _release(memory)
+                submit_next()
+                yield from results
+        finally:
+            for future, memory in pending:
+                future.cancel()
+                _release(memory)
+
+
+def run_batch_analysis(items: Iterable, output_path: str, resume: bool = True, **kwargs) -> int:
+    """
+    Append the results of `iter_batch_analysis` to the JSON Lines file `output_path`.
+
+    With `resume`, games whose id is already in the file are skipped and a line cut off by a
+    crash is dropped first. Returns the number of results written.
+    """
+    done = _completed_ids(output_path) if resume else set()
+    if not resume and os.path.exists(output_path):
+        os.remove(output_path)
+
+    remaining = (item for item in items if _id_key(BatchItem(*item).game_id) not in done)
+    written = 0
+    with open(output_path, "a") as output:
+        for result in iter_batch_analysis(remaining, **kwargs):
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            written += 1
+    return written
+
+
+def _chunks(items: Iterator[BatchItem], chunk_size: int) -> Iterator[List[BatchItem]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _shared_arrays(game) -> Optional[tuple]:
+    if isinstance(game, TwoPlayerStrategicFormGame):
+        return "two_player", game._payoff_matrices
+    if isinstance(game, NPlayerStrategicFormGame) and not game.is_sparse:
+        return "n_player", game._payoff_tensors
+    return None
+
+
+def _share_chunk(chunk: List[BatchItem]):
+    """Copy the dense payoff arrays of a chunk into one shared memory block."""
+    layouts, size = [], 0
+    for item in chunk:
+        shared = _shared_arrays(item.game) if not isinstance(item.game, str) else None
+        if shared is None or any(np.asarray(array).dtype.hasobject for array in shared[1]):
+            layouts.append(None)
+            continue
+        arrays = []
+        for array in shared[1]:
+            size = -(-size // SHARED_ALIGNMENT) * SHARED_ALIGNMENT
+            arrays.append((size, np.asarray(array)))
+            size += arrays[-1][1].nbytes
+        layouts.append((shared[0], arrays))
+
+    if size == 0:
+        return chunk, None
+
+    memory = shared_memory.SharedMemory(create=True, size=size)
+    shared_chunk = []
+    for item, layout in zip(chunk, layouts):
+        if layout is None:
+            shared_chunk.append(item)
+            continue
+        kind, arrays = layout
+        descriptors = []
+        for offset, array in arrays:
+            np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf, offset=offset)[...] = array
+            descriptors.append((offset, array.dtype.str, array.shape))
+        shared_chunk.append(item._replace(game=_SharedGame(kind, item.game._strategies, descriptors)))
+    return shared_chunk, memory
+
+
+def _release(memory: Optional[shared_memory.SharedMemory]):
+    if memory is not None:
+        memory.close()
+        memory.unlink()
+
+
+def _analyze_chunk(chunk: List[BatchItem], memory_name: Optional[str], timeout: Optional[float],
+                   strictly_only: bool) -> List[dict]:
+    memory = None if memory_name is None else shared_memory.SharedMemory(name=memory_name)
+    try:
+        return [_analyze_item(item, memory, timeout, strictly_only) for item in chunk]
+    finally:
+        if memory is not None:
+            memory.close()
+
+
+def _analyze_item(item: BatchItem, memory, timeout: Optional[float], strictly_only: bool) -> dict:
+    started = time.perf_counter()
+    result = {"id": item.game_id}
+    try:
+        with _time_limit(timeout):
+            game = _materialize_game(item.game, memory)
+            result.update(analyze_game(game, item.mixed_strategies, strictly_only))
+            # drop the game before the shared memory block is closed
+            del game
+    except _GameTimeout:
+        result["error"] = "timeout"
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    result["seconds"] = round(time.perf_counter() - started, 6)
+    return result
+
+
+def _materialize_game(game, memory):
+    if isinstance(game, str):
+        return load_game(game)
+    if not isinstance(game, _SharedGame):
+        return game
+
+    arrays = [np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf, offset=offset)
+              for offset, dtype, shape in game.arrays]
+    if game.kind == "two_player":
+        return TwoPlayerStrategicFormGame.from_payoff_arrays(game.strategies, *arrays)
+    return NPlayerStrategicFormGame.from_payoff_tensors(game.strategies, arrays)
+
+
+class _time_limit:
+    """Raise _GameTimeout in the block after `seconds`, a no-op without SIGALRM or off the main thread."""
+
+    def __init__(self, seconds: Optional[float]):
+        self.enabled = (seconds is not None and hasattr(signal, "SIGALRM")
+                        and threading.current_thread() is threading.main_thread())
+        self.seconds = seconds
+
+    def __enter__(self):
+        if self.enabled:
+            self.previous_handler = signal.signal(signal.SIGALRM, self._expire)
+            signal.setitimer(signal.ITIMER_REAL, self.seconds)
+
+    def __exit__(self, *exc_info):
+        if self.enabled:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self.previous_handler)
+
+    @staticmethod
+    def _expire(signum, frame):
+        raise _GameTimeout()
+
+
+def _id_key(game_id) -> str:
+    # ids are compared by their JSON text, so a tuple id matches the list it is read back as
+    return json.dumps(game_id, sort_keys=True)
+
+
+def _completed_ids(output_path: str) -> set:
+    if not os.path.exists(output_path):
+        return set()
+
+    done = set()
+    with open(output_path, "rb+") as output:
+        content = output.read()
+        complete = content.rfind(b"\n") + 1
+        if complete < len(content):
+            # the last line was cut off while being written
+            output.truncate(complete)
+        for line in content[:complete].splitlines():
+            if line.strip():
+                done.add(_id_key(json.loads(line)["id"]))
+    return done
+
+
+def _read_items(path: str) -> Iterator[BatchItem]:
+    with open(path) as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            game_id = record.get("id", line_number)
+            if "path" in record:
+                game = record["path"]
+            elif len(record["strategies"]) == 2:
+                game = TwoPlayerStrategicFormGame(record["strategies"], record["payoffs"])
+            else:
+                game = NPlayerStrategicFormGame(record["strategies"], record["payoffs"])
+            yield BatchItem(game_id, game, record.get("mixed_strategies", []))
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze many games in parallel.")
+    parser.add_argument("input", help="JSON Lines file with one game (or saved game path) per line.")
+    parser.add_argument("--output", required=True, help="JSON Lines file the results are appended to.")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes, all cores by default.")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Games per task.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds per game.")
+    parser.add_argument("--strictly-only", action="store_true", help="Only eliminate strictly dominated strategies.")
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output instead of resuming.")
+    args = parser.parse_args(argv)
+
+    written = run_batch_analysis(_read_items(args.input), args.output, resume=not args.no_resume,
+                                 processes=args.processes, chunk_size=args.chunk_size, timeout=args.timeout,
+                                 strictly_only=args.strictly_only)
+    print(f"Analyzed {written} games into {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+from typing import List, NamedTuple
+
+import numpy as np
+
+from lib.auction import first_price_sealed_bid_auction_expected_utility_matrix, vickery_auction_expected_utility_matrix
+
+AUCTION_FORMATS = ("first", "second")
+INITIAL_BID_FUNCTIONS = ("truthful", "continuous")
+
+# Only types that gain at least this share of the largest gain move in an iteration
+MOVING_GAIN_SHARE = 0.5
+
+# Samples (values without probabilities) with more distinct values are binned into this many
+# equally wide bins, every bin becoming one type at the mean of its samples
+SAMPLE_BIN_COUNT = 256
+
+
+class BidFunction(NamedTuple):
+    """Symmetric bid function over a type grid with convergence diagnostics."""
+    values: np.ndarray
+    value_probabilities: np.ndarray
+    bids: np.ndarray
+    win_probabilities: np.ndarray
+    expected_utilities: np.ndarray
+    iterations: int
+    converged: bool
+    max_regret: float
+    regrets: List[float]
+
+    def bid(self, value: float) -> float:
+        """Equilibrium bid of the closest type on the grid."""
+        return float(self.bids[np.abs(self.values - value).argmin()])
+
+
+def solve_bid_function(values, probabilities=None, auction: str = "first", bidder_count: int = 2,
+                       bid_grid=None, initial_bids="truthful", step_fraction: float = 0.1,
+                       max_iterations: int = 5000, patience: int = 300, tolerance: float = None) -> BidFunction:
+    """
+    Compute a symmetric Bayesian equilibrium bid function of a sealed-bid auction whose bidders
+    draw their values independently from the same distribution.
+
+    The search starts from `initial_bids`, truthful bidding unless given. Every iteration
+    computes the types x bids expected utility matrix with
+    `first_price_sealed_bid_auction_expected_utility_matrix` /
+    `vickery_auction_expected_utility_matrix` against the bid distribution induced by the
+    current bid function, and moves the types gaining at least MOVING_GAIN_SHARE of the largest
+    gain a fraction `step_fraction` (at least one grid step) towards their best responses. The
+    bid function with the lowest regret seen is returned.
+
+    On a discrete bid grid ties keep the regret from reaching zero, it levels off around a
+    fraction of a grid step, so `tolerance` defaults to half a grid step and `patience` stops the
+    search once the regret no longer drops.
+
+    :param values: Type grid of a discrete distribution, or samples when `probabilities` is None
+        (binned into SAMPLE_BIN_COUNT types when there are more distinct samples).
+    :param probabilities: Probability of every value in `values`.
+    :param auction: "first" or "second" price.
+    :param bidder_count: Number of bidders, ties are broken uniformly at random.
+    :param bid_grid: Available bids, defaults to the type grid.
+    :param initial_bids: One bid per type, "truthful", or "continuous" for the symmetric
+        equilibrium of continuous type distributions (truthful bidding in second-price auctions,
+        E[highest other value | it is below v] in first-price ones). Rounded to the bid grid.
+    :param step_fraction: Damping of the best-response step.
+    :param max_iterations: Upper bound on best-response iterations.
+    :param patience: Stop after this many iterations without a lower regret.
+    :param tolerance: Converged once no type gains more than `tolerance` by deviating, in the
+        units of values and bids. Defaults to half the largest bid grid spacing.
+    """
+    if auction not in AUCTION_FORMATS:
+        raise ValueError(f"Unknown auction format {auction}, expected one of {AUCTION_FORMATS}.")
+    if bidder_count < 2:
+        raise ValueError("At least two bidders are needed.")
+
+    values, value_probabilities = _type_distribution(values, probabilities)
+    bid_grid = values if bid_grid is None else np.unique(np.asarray(bid_grid, dtype=float))
+    expected_utility_matrix = (first_price_sealed_bid_auction_expected_utility_matrix if auction == "first"
+                               else vickery_auction_expected_utility_matrix)
+    tolerance = 0.5 * _grid_step(bid_grid, values) if tolerance is None else float(tolerance)
+
+    types = np.arange(len(values))
+    bid_indexes = _nearest_bid_indexes(bid_grid, _initial_bids(initial_bids, values, value_probabilities, auction, bidder_count))
+
+    regrets = []
+    best = None
+    iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        bid_distribution = np.bincount(bid_indexes, weights=value_probabilities, minlength=len(bid_grid))
+        win_probabilities, beat_probabilities = _win_probabilities(bid_distribution, bidder_count)
+        if auction == "first":
+            utilities = expected_utility_matrix(values, bid_grid, win_probabilities)
+        else:
+            # payments follow the distribution of the highest other bid, a tie is paid at the own bid
+            utilities = (expected_utility_matrix(values, bid_grid, beat_probabilities)
+                         + (values[:, None] - bid_grid[None, :]) * (win_probabilities - beat_probabilities))
+
+        gains = utilities.max(axis=1) - utilities[types, bid_indexes]
+        regrets.append(float(gains.max()))
+        if best is None or regrets[-1] < best[0]:
+            best = (regrets[-1], bid_indexes, win_probabilities[0], utilities[types, bid_indexes], iteration)
+        if regrets[-1] <= tolerance or iteration - best[4] >= patience:
+            break
+
+        steps = utilities.argmax(axis=1) - bid_indexes
+        steps = np.sign(steps) * np.maximum(1, np.round(step_fraction * np.abs(steps))).astype(int)
+        bid_indexes = np.where((gains > 0) & (gains >= MOVING_GAIN_SHARE * regrets[-1]), bid_indexes + steps, bid_indexes)
+
+    max_regret, bid_indexes, win_probabilities, expected_utilities, _ = best
+    return BidFunction(values, value_probabilities, bid_grid[bid_indexes], win_probabilities, expected_utilities,
+                       iteration, max_regret <= tolerance, max_regret, regrets)
+
+
+def _type_distribution(values, probabilities):
+    values = np.asarray(values, dtype=float)
+    if probabilities is None:
+        values, counts = np.unique(values, return_counts=True)
+        if len(values) > SAMPLE_BIN_COUNT:
+            bins = np.minimum(((values - values[0]) / (values[-1] - values[0]) * SAMPLE_BIN_COUNT).astype(int),
+                              SAMPLE_BIN_COUNT - 1)
+            totals = np.bincount(bins, weights=values * counts, minlength=SAMPLE_BIN_COUNT)
+            counts = np.bincount(bins, weights=counts, minlength=SAMPLE_BIN_COUNT)
+            values, counts = totals[counts > 0] / counts[counts > 0], counts[counts > 0]
+        return values, counts / counts.sum()
+
+    probabilities = np.asarray(probabilities, dtype=float)
+    if probabilities.shape != values.shape or probabilities.min() < 0:
+        raise ValueError("Expected one non-negative probability per value.")
+    order = np.argsort(values)
+    return values[order], probabilities[order] / probabilities.sum()
+
+
+def _initial_bids(initial_bids, values: np.ndarray, value_probabilities: np.ndarray, auction: str,
+                  bidder_count: int) -> np.ndarray:
+    if isinstance(initial_bids, str):
+        if initial_bids not in INITIAL_BID_FUNCTIONS:
+            raise ValueError(f"Unknown initial bids {initial_bids}, expected one of {INITIAL_BID_FUNCTIONS} or one bid per type.")
+        if initial_bids == "truthful":
+            return values
+        return _continuous_equilibrium_bids(values, value_probabilities, auction, bidder_count)
+    bids = np.asarray(initial_bids, dtype=float)
+    if bids.shape != values.shape:
+        raise ValueError(f"Expected one initial bid per type ({len(values)}), got shape {bids.shape}.")
+    return bids
+
+
+def _continuous_equilibrium_bids(values: np.ndarray, value_probabilities: np.ndarray, auction: str,
+                                 bidder_count: int) -> np.ndarray:
+    if auction == "second":
+        return values
+    # E[Y | Y < v] for the highest value Y of the other bidders, the lowest type bids its value
+    at_most = np.cumsum(value_probabilities) ** (bidder_count - 1)
+    below = np.concatenate([[0.0], at_most[:-1]])
+    expected_below = np.concatenate([[0.0], np.cumsum(values * (at_most - below))[:-1]])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(below > 0, expected_below / below, values)
+
+
+def _nearest_bid_indexes(bid_grid: np.ndarray, bids: np.ndarray) -> np.ndarray:
+    upper = np.clip(np.searchsorted(bid_grid, bids), 0, len(bid_grid) - 1)
+    lower = np.maximum(upper - 1, 0)
+    return np.where(np.abs(bid_grid[lower] - bids) <= np.abs(bid_grid[upper] - bids), lower, upper)
+
+
+def _grid_step(bid_grid: np.ndarray, values: np.ndarray) -> float:
+    step = float(np.diff(bid_grid).max()) if len(bid_grid) > 1 else 0.0
+    return step if step > 0 else np.finfo(float).eps * max(float(np.abs(values).max()), 1.0)
+
+
+def _win_probabilities(bid_distribution: np.ndarray, bidder_count: int):
+    """
+    Winning probability of every bid, a tie with k opponents won with probability 1 / (k + 1),
+    and the probability that every opponent bids strictly less (the CDF of the highest other bid).
+    """
+    opponents = bidder_count - 1
+    at_most = np.cumsum(bid_distribution)
+    below = at_most - bid_distribution
+    beat_probabilities = np.clip(below ** opponents, 0.0, 1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shared = (at_most ** bidder_count - below ** bidder_count) / (bidder_count * bid_distribution)
+    win_probabilities = np.where(bid_distribution > 1e-15, shared, beat_probabilities)
+    return np.clip(win_probabilities, 0.0, 1.0)[None, :], beat_probabilities[None, :]
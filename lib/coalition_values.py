@@ -0,0 +1,295 @@
+import json
+import os
+from collections import OrderedDict
+from fractions import Fraction
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from lib.instrumentation import COALITION_EVALUATIONS, COALITION_LOOKUPS, count
+
+# Above this many players coalition worths are always kept in a dict
+DENSE_PLAYER_LIMIT = 26
+
+
+class CoalitionValues:
+    """
+    Worth of coalitions keyed by bitmask, bit i is set when players[i] is a member.
+
+    Complete (or nearly complete) characteristic functions are stored as a flat array of
+    2^n worths indexed by the mask; sparse inputs fall back to a {mask: worth} dict.
+
+    Lookups return floats unless `exact=True` is passed; then worths come back as given, so
+    `Fraction`s and integers above 2^53 reach the "exact" backend without rounding.
+    """
+
+    def __init__(self, players: list[str], coalitions: list[tuple] = None, worth_of_coalition: list[float] = None):
+        """
+        :param players: Player names, their order defines the bit positions.
+        :param coalitions: Coalitions as tuples of player names (a single name is a singleton).
+        :param worth_of_coalition: Worth of every coalition, aligned with `coalitions`.
+        """
+        self.players = list(players)
+        self._player_bits = {player: 1 << index for index, player in enumerate(self.players)}
+        if len(self._player_bits) != len(self.players):
+            raise ValueError("Player names must be unique.")
+
+        self._worth: np.ndarray = None
+        # worths as given next to the float _worth array, None while the floats hold them exactly
+        self._exact_worth: np.ndarray = None
+        self._sparse_worth: Dict[int, float] = None
+
+        coalitions = [] if coalitions is None else coalitions
+        worth_of_coalition = [] if worth_of_coalition is None else worth_of_coalition
+        if len(coalitions) != len(worth_of_coalition):
+            raise ValueError(f"Expected one worth per coalition, got {len(worth_of_coalition)} worths for {len(coalitions)} coalitions.")
+
+        masks = [self.mask(coalition) for coalition in coalitions]
+        if self.player_count <= DENSE_PLAYER_LIMIT and 4 * len(masks) >= self.coalition_count:
+            self._set_dense_worth(masks, worth_of_coalition)
+        else:
+            self._sparse_worth = dict(zip(masks, worth_of_coalition))
+
+    @classmethod
+    def from_array(cls, players: list[str], worth: np.ndarray) -> 'CoalitionValues':
+        """Wrap a flat array of 2^n worths already indexed by bitmask."""
+        values = cls(players)
+        worth = np.asarray(worth)
+        if worth.shape != (values.coalition_count,):
+            raise ValueError(f"Expected {values.coalition_count} worths, got shape {worth.shape}.")
+        values._worth, values._sparse_worth = worth.astype(float), None
+        values._exact_worth = _exact_worth(worth)
+        return values
+
+    def _set_dense_worth(self, masks: list, worth_of_coalition: list):
+        worths = np.asarray(worth_of_coalition)
+        self._worth = np.full(self.coalition_count, np.nan)
+        self._worth[masks] = worths.astype(float)
+        exact_worth = _exact_worth(worths)
+        if exact_worth is not None:
+            self._exact_worth = np.zeros(self.coalition_count, dtype=exact_worth.dtype)
+            self._exact_worth[masks] = exact_worth
+
+    @property
+    def player_count(self) -> int:
+        return len(self.players)
+
+    @property
+    def coalition_count(self) -> int:
+        return 1 << self.player_count
+
+    @property
+    def is_dense(self) -> bool:
+        return self._worth is not None
+
+    def mask(self, coalition) -> int:
+        members = (coalition,) if isinstance(coalition, str) else coalition
+        mask = 0
+        for member in members:
+            if member not in self._player_bits:
+                raise ValueError(f"Player {member} is not one of {self.players}.")
+            mask |= self._player_bits[member]
+        return mask
+
+    def members(self, mask: int) -> tuple:
+        return tuple(player for player, bit in self._player_bits.items() if mask & bit)
+
+    def worth(self, coalition, exact: bool = False) -> float:
+        return self.worth_of_mask(self.mask(coalition), exact)
+
+    def __getitem__(self, coalition) -> float:
+        return self.worth(coalition)
+
+    def worth_of_mask(self, mask: int, exact: bool = False) -> float:
+        """Worth of the coalition `mask`, as given instead of as a float when `exact`."""
+        count(COALITION_LOOKUPS)
+        if self._worth is not None:
+            worth = self._worth[mask]
+            if np.isnan(worth):
+                raise KeyError(f"Worth of coalition {self.members(mask)} is unknown.")
+            if exact and self._exact_worth is not None:
+                return _as_python(self._exact_worth[mask])
+            return float(worth)
+        if mask not in self._sparse_worth:
+            raise KeyError(f"Worth of coalition {self.members(mask)} is unknown.")
+        worth = self._sparse_worth[mask]
+        return _as_python(worth) if exact else float(worth)
+
+    def items(self, exact: bool = False) -> Iterator[Tuple[int, float]]:
+        """Iterate over (mask, worth) of every coalition with a known worth, worths as in `worth_of_mask`."""
+        if self._sparse_worth is not None:
+            for mask, worth in self._sparse_worth.items():
+                yield mask, _as_python(worth) if exact else float(worth)
+            return
+        worth = self._exact_worth if exact and self._exact_worth is not None else self._worth
+        for mask in np.flatnonzero(~np.isnan(self._worth)).tolist():
+            yield mask, _as_python(worth[mask])
+
+    def array(self, exact: bool = False) -> np.ndarray:
+        """
+        The flat worth array indexed by mask, every coalition must be known.
+
+        :param exact: Return the worths as given (an integer or object array when floats would
+            round them) instead of the float array.
+        """
+        if self._worth is None:
+            if self.player_count > DENSE_PLAYER_LIMIT or len(self._sparse_worth) != self.coalition_count:
+                raise ValueError("A dense worth array needs the worth of every coalition.")
+            self._set_dense_worth(list(self._sparse_worth), list(self._sparse_worth.values()))
+            self._sparse_worth = None
+
+        if np.isnan(self._worth).any():
+            raise ValueError("Worth of every coalition of the players is required.")
+        count(COALITION_LOOKUPS, self.coalition_count)
+        if exact and self._exact_worth is not None:
+            return self._exact_worth
+        return self._worth
+
+    def is_complete(self) -> bool:
+        if self._worth is not None:
+            return not np.isnan(self._worth).any()
+        return len(self._sparse_worth) == self.coalition_count
+
+
+def _exact_worth(worths: np.ndarray) -> Optional[np.ndarray]:
+    # floats (and integers up to 2^53) are held exactly by the float array, other worths are kept as given
+    if worths.dtype.kind in "fb" or worths.size == 0:
+        return None
+    if worths.dtype.kind in "iu" and int(np.abs(worths).max()) <= 2 ** 53:
+        return None
+    return worths
+
+
+def _as_python(worth):
+    return worth.item() if isinstance(worth, np.generic) else worth
+
+
+def coalition_sizes(player_count: int) -> np.ndarray:
+    """Number of members of every mask in 0..2^n-1."""
+    sizes = np.zeros(1, dtype=np.uint8)
+    for _ in range(player_count):
+        sizes = np.concatenate([sizes, sizes + 1])
+    return sizes
+
+
+def split_by_player(values: np.ndarray, player_index: int, player_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Split a flat mask-indexed array into the coalitions without and with players[player_index]."""
+    # bit i of the mask is axis (n - 1 - i) when the flat array is viewed as a 2 x 2 x ... x 2 cube
+    cube = values.reshape((2,) * player_count)
+    axis = player_count - 1 - player_index
+    return np.take(cube, 0, axis=axis).ravel(), np.take(cube, 1, axis=axis).ravel()
+
+
+def iter_player_bits(mask: int) -> Iterable[int]:
+    """Indexes of the players in `mask`."""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    max_size: Optional[int]
+    current_size: int
+
+
+class CharacteristicFunction(CoalitionValues):
+    """
+    Lazily evaluated worth of coalitions with a bitmask-keyed LRU cache.
+
+    The wrapped callable receives a coalition as a tuple of player names in `players` order
+    and is only called for coalitions that are not cached, so with an unbounded cache every
+    coalition is evaluated at most once. The cache can be persisted between runs with `save`.
+    """
+
+    def __init__(self, players: list[str], function: Callable[[tuple], float], max_size: int = None, path: str = None):
+        """
+        :param players: Player names, their order defines the bit positions.
+        :param function: Characteristic function, called with a tuple of player names.
+        :param max_size: Most coalitions kept in the cache, None keeps all of them.
+        :param path: JSON file the cache is loaded from (when it exists) and saved to.
+        """
+        super().__init__(players)
+        self.function = function
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict = OrderedDict()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    @property
+    def is_dense(self) -> bool:
+        return False
+
+    def is_complete(self) -> bool:
+        return True
+
+    def worth_of_mask(self, mask: int, exact: bool = False) -> float:
+        count(COALITION_LOOKUPS)
+        if mask in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(mask)
+            worth = self._cache[mask]
+        else:
+            self.misses += 1
+            count(COALITION_EVALUATIONS)
+            # cached as returned, so the "exact" backend sees the worth before any rounding
+            worth = _as_python(self.function(self.members(mask)))
+            self._cache[mask] = worth
+            if self.max_size is not None and len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+        return worth if exact else float(worth)
+
+    def items(self, exact: bool = False) -> Iterator[Tuple[int, float]]:
+        for mask in range(self.coalition_count):
+            yield mask, self.worth_of_mask(mask, exact)
+
+    def array(self, exact: bool = False) -> np.ndarray:
+        if self.player_count > DENSE_PLAYER_LIMIT:
+            raise ValueError(f"A dense worth array is limited to {DENSE_PLAYER_LIMIT} players.")
+        if exact:
+            return np.asarray([worth for _, worth in self.items(exact=True)])
+        return np.fromiter((worth for _, worth in self.items()), dtype=float, count=self.coalition_count)
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.max_size, len(self._cache))
+
+    def cache_clear(self):
+        self._cache.clear()
+        self.hits = self.misses = 0
+
+    def save(self, path: str = None):
+        path = self.path if path is None else path
+        if path is None:
+            raise ValueError("No path to save the characteristic function cache to.")
+        with open(path, "w") as file:
+            # worths that are neither ints nor floats (`Fraction`s) are stored as strings like "1/3"
+            json.dump({"players": self.players,
+                       "worth": {str(mask): worth if isinstance(worth, (int, float)) else str(worth)
+                                 for mask, worth in self._cache.items()}}, file)
+
+    def load(self, path: str):
+        with open(path) as file:
+            stored = json.load(file)
+        if stored["players"] != self.players:
+            raise ValueError(f"Cache at {path} was stored for players {stored['players']}, not {self.players}.")
+        for mask, worth in stored["worth"].items():
+            self._cache[int(mask)] = Fraction(worth) if isinstance(worth, str) else worth
+        while self.max_size is not None and len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+
+def as_coalition_values(players, coalitions: list[tuple] = None, worth_of_coalition: list[float] = None,
+                        characteristic_function: Callable[[tuple], float] = None) -> CoalitionValues:
+    """Coalition worths from a container, a callable or the (players, coalitions, worth_of_coalition) lists."""
+    if isinstance(players, CoalitionValues):
+        return players
+    if characteristic_function is not None:
+        if isinstance(characteristic_function, CoalitionValues):
+            return characteristic_function
+        return CharacteristicFunction(players, characteristic_function)
+    return CoalitionValues(players, coalitions, worth_of_coalition)
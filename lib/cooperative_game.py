@@ -1,47 +1,249 @@
-def shapley_values(players:list[str], coalitions:list[tuple], worth_of_coalition:list[tuple]) -> dict[str, float]:
-    # sort colistions for consistent lookup
-    sorted_coalitions = [tuple(sorted(coalition)) for coalition in coalitions]
+from fractions import Fraction
+from math import factorial
 
-    permutations:list[tuple] = _permutation(players)
-    shapley_values:dict[str, float] = {player: 0.0 for player in players}
+import numpy as np
 
-    for perm in permutations:
-        for player in perm:
-            coalition_before = tuple((perm[:perm.index(player)]))
-            coalition_with = tuple(sorted(perm[:perm.index(player)+1]))
+from lib.coalition_values import DENSE_PLAYER_LIMIT, as_coalition_values, coalition_sizes, iter_player_bits, split_by_player
+from lib.exact_arithmetic import check_backend, integer_scaled, to_fraction
+from lib.instrumentation import phase, timed_phase
 
-            index_before = sorted_coalitions.index(tuple(sorted(coalition_before)))
-            index_with = sorted_coalitions.index(tuple(sorted(coalition_with)))
+@timed_phase("shapley_values")
+def shapley_values(players:list[str], coalitions:list[tuple] = None, worth_of_coalition:list[tuple] = None,
+                   characteristic_function = None, backend:str = "float") -> dict[str, float]:
+    """
+    Exact Shapley values. `players` may also be a `CoalitionValues`, then the other arguments are ignored.
+    characteristic_function: Callable (or `CharacteristicFunction`) used instead of the coalition lists,
+                             every coalition is evaluated once.
+    backend: "float", or "exact" for `Fraction` values computed without rounding (worths are used as
+             given, floats read as fractions, see `lib.exact_arithmetic.to_fraction`).
+    """
+    check_backend(backend)
+    values = as_coalition_values(players, coalitions, worth_of_coalition, characteristic_function)
+    player_count = values.player_count
+    if backend == "exact":
+        return _exact_shapley_values(values)
+
+    # exact subset formula: phi_i = sum over S without i of |S|!(n-|S|-1)!/n! * (v(S + i) - v(S))
+    size_weights = np.array([factorial(size) * factorial(player_count - size - 1) / factorial(player_count)
+                             for size in range(player_count)])
+
+    shapley_values:dict[str, float] = {player: 0.0 for player in values.players}
+    if values.is_complete() and values.player_count <= DENSE_PLAYER_LIMIT:
+        with phase("worth_array"):
+            worth = values.array()
+        sizes = coalition_sizes(player_count)
+        for player_index, player in enumerate(values.players):
+            without, with_player = split_by_player(worth, player_index, player_count)
+            sizes_without, _ = split_by_player(sizes, player_index, player_count)
+            shapley_values[player] = float(np.dot(size_weights[sizes_without], with_player - without))
+        return shapley_values
+
+    for mask, worth in values.items():
+        size_without = bin(mask).count("1") - 1
+        for player_index in iter_player_bits(mask):
+            marginal_contribution = worth - values.worth_of_mask(mask ^ (1 << player_index))
+            shapley_values[values.players[player_index]] += float(size_weights[size_without]) * marginal_contribution
+
+    return shapley_values
+
+@timed_phase("banzhaf_indexes")
+def banzhaf_indexes(players:list[str], coalitions:list[tuple] = None, worth_of_coalition:list[tuple] = None,
+                    characteristic_function = None, backend:str = "float") -> dict[str, float]:
+    """
+    Banzhaf indexes. `players` may also be a `CoalitionValues`, then the other arguments are ignored.
+    characteristic_function: Callable (or `CharacteristicFunction`) used instead of the coalition lists,
+                             every coalition is evaluated once.
+    backend: "float", or "exact" for `Fraction` indexes as in `shapley_values`.
+    """
+    check_backend(backend)
+    values = as_coalition_values(players, coalitions, worth_of_coalition, characteristic_function)
+    player_count = values.player_count
+    if backend == "exact":
+        return _exact_banzhaf_indexes(values)
+
+    banzhaf_values:dict[str, float] = {player: 0.0 for player in values.players}
+    if values.is_complete() and values.player_count <= DENSE_PLAYER_LIMIT:
+        with phase("worth_array"):
+            worth = values.array()
+        for player_index, player in enumerate(values.players):
+            without, with_player = split_by_player(worth, player_index, player_count)
+            banzhaf_values[player] = float((with_player - without).sum()) / (2 ** (player_count - 1))
+        return banzhaf_values
+
+    for mask, worth in values.items():
+        for player_index in iter_player_bits(mask):
+            marginal_contribution = worth - values.worth_of_mask(mask ^ (1 << player_index))
+            banzhaf_values[values.players[player_index]] += marginal_contribution / (2 ** (player_count - 1))
+
+    return banzhaf_values
+
+def _exact_shapley_values(values) -> dict[str, Fraction]:
+    player_count = values.player_count
+    size_weights = [factorial(size) * factorial(player_count - size - 1) for size in range(player_count)]
+
+    shapley_values:dict[str, Fraction] = {player: Fraction(0) for player in values.players}
+    if values.is_complete() and values.player_count <= DENSE_PLAYER_LIMIT:
+        # integer worth numerators over one denominator, marginal contributions are summed per coalition size
+        # and the size weights applied once per size; int64 unless up to 2^n sums could overflow it
+        with phase("worth_array"):
+            worth, denominator = integer_scaled(values.array(exact=True), headroom_bits=player_count + 1)
+        sizes = coalition_sizes(player_count)
+        for player_index, player in enumerate(values.players):
+            without, with_player = split_by_player(worth, player_index, player_count)
+            sizes_without, _ = split_by_player(sizes, player_index, player_count)
+            size_totals = np.zeros(player_count, dtype=worth.dtype)
+            np.add.at(size_totals, sizes_without, with_player - without)
+            total = sum(int(size_total) * size_weight for size_total, size_weight in zip(size_totals, size_weights))
+            shapley_values[player] = Fraction(total, factorial(player_count) * denominator)
+        return shapley_values
+
+    for mask, worth in values.items(exact=True):
+        size_weight = Fraction(size_weights[bin(mask).count("1") - 1], factorial(player_count))
+        for player_index in iter_player_bits(mask):
+            marginal_contribution = to_fraction(worth) - to_fraction(values.worth_of_mask(mask ^ (1 << player_index), exact=True))
+            shapley_values[values.players[player_index]] += size_weight * marginal_contribution
+
+    return shapley_values
+
+def _exact_banzhaf_indexes(values) -> dict[str, Fraction]:
+    player_count = values.player_count
+
+    banzhaf_values:dict[str, Fraction] = {player: Fraction(0) for player in values.players}
+    if values.is_complete() and values.player_count <= DENSE_PLAYER_LIMIT:
+        with phase("worth_array"):
+            worth, denominator = integer_scaled(values.array(exact=True), headroom_bits=player_count + 1)
+        for player_index, player in enumerate(values.players):
+            without, with_player = split_by_player(worth, player_index, player_count)
+            banzhaf_values[player] = Fraction(int((with_player - without).sum()), denominator * 2 ** (player_count - 1))
+        return banzhaf_values
+
+    for mask, worth in values.items(exact=True):
+        for player_index in iter_player_bits(mask):
+            marginal_contribution = to_fraction(worth) - to_fraction(values.worth_of_mask(mask ^ (1 << player_index), exact=True))
+            banzhaf_values[values.players[player_index]] += marginal_contribution / 2 ** (player_count - 1)
+
+    return banzhaf_values
+
+@timed_phase("weighted_voting_shapley_values")
+def weighted_voting_shapley_values(players:list[str], weights:list[int], quota:int, backend:str = "float") -> dict[str, float]:
+    """
+    Shapley-Shubik index of the weighted voting game where a coalition is worth 1 when its
+    total weight reaches the quota and 0 otherwise. Pseudo-polynomial in the quota.
+    :param players: Player names.
+    :param weights: Non-negative integer weight of every player.
+    :param quota: Total weight a coalition needs to win.
+    :param backend: "float", or "exact" for `Fraction` indexes.
+    """
+    check_backend(backend)
+    player_count = len(players)
+    weights = _validate_voting_game(players, weights, quota)
+
+    # counts[s, w] = number of coalitions with s players and total weight w < quota; float counts
+    # keep every total weight so that players can be removed without growing rounding errors
+    dtype = _count_dtype(player_count, backend)
+    weight_levels = sum(weights) + 1 if dtype is np.float64 else quota
+    counts = _losing_coalition_counts(weights, weight_levels, player_count + 1, dtype)
+    size_weights = [factorial(size) * factorial(player_count - size - 1) for size in range(player_count)]
+
+    shapley_values:dict[str, float] = {}
+    for player, weight in zip(players, weights):
+        counts_without = _remove_player_counts(counts, weight)
+        # swings: coalitions of others losing alone but winning with the player
+        swings = counts_without[:player_count, max(0, quota - weight):quota].sum(axis=1)
+        total = sum(int(count) * size_weight for count, size_weight in zip(swings, size_weights))
+        shapley_values[player] = Fraction(total, factorial(player_count)) if backend == "exact" else total / factorial(player_count)
 
-            marginal_contribution = worth_of_coalition[index_with] - worth_of_coalition[index_before]
-            shapley_values[player] += marginal_contribution / len(permutations)
-            
     return shapley_values
 
-def _permutation(elements: list[str]) -> list[tuple]:
-    if len(elements) == 0:
-        return [()]
-
-    perms = []
-    for i in range(len(elements)):
-        rest_elements = elements[:i] + elements[i+1:]
-        for p in _permutation(rest_elements):
-            perms.append((elements[i],) + p)
-    return perms
-
-def banzhaf_indexes(players:list[str], coalitions:list[tuple], worth_of_coalition:list[tuple]) -> dict[str, float]:
-    # sort colistions for consistent lookup
-    sorted_coalitions = [tuple(sorted(coalition)) for coalition in coalitions]
-
-    banzhaf_values:dict[str, float] = {player: 0.0 for player in players}
-
-    for coalition in sorted_coalitions:
-        for player in coalition:
-            coalition_without = tuple(sorted(set(coalition) - {player}))
-            index_without = sorted_coalitions.index(tuple(sorted(coalition_without)))
-            index_with = sorted_coalitions.index(tuple(sorted(coalition)))
-
-            marginal_contribution = worth_of_coalition[index_with] - worth_of_coalition[index_without]
-            banzhaf_values[player] += marginal_contribution / (2 ** (len(players) - 1))
-    
-    return banzhaf_values
\ No newline at end of file
+@timed_phase("weighted_voting_banzhaf_indexes")
+def weighted_voting_banzhaf_indexes(players:list[str], weights:list[int], quota:int, backend:str = "float") -> dict[str, float]:
+    """
+    Banzhaf index (swings / 2^(n-1), as in `banzhaf_indexes`) of the weighted voting game
+    where a coalition is worth 1 when its total weight reaches the quota and 0 otherwise.
+    :param players: Player names.
+    :param weights: Non-negative integer weight of every player.
+    :param quota: Total weight a coalition needs to win.
+    :param backend: "float", or "exact" for `Fraction` indexes.
+    """
+    check_backend(backend)
+    weights = _validate_voting_game(players, weights, quota)
+
+    # counts[0, w] = number of coalitions with total weight w < quota, sizes are not needed
+    counts = _losing_coalition_counts(weights, quota, 1, _count_dtype(len(players), backend))
+
+    banzhaf_values:dict[str, float] = {}
+    for player, weight in zip(players, weights):
+        counts_without = _remove_player_counts(counts, weight)
+        swings = int(counts_without[0, max(0, quota - weight):].sum())
+        if backend == "exact":
+            banzhaf_values[player] = Fraction(swings, 2 ** (len(players) - 1))
+        else:
+            banzhaf_values[player] = swings / (2 ** (len(players) - 1))
+
+    return banzhaf_values
+
+def _validate_voting_game(players:list[str], weights:list[int], quota:int) -> list[int]:
+    if len(players) != len(weights):
+        raise ValueError(f"Expected one weight per player, got {len(weights)} weights for {len(players)} players.")
+    weights = [int(weight) for weight in weights]
+    if min(weights, default=0) < 0 or quota <= 0:
+        raise ValueError("Weights must be non-negative and the quota positive.")
+    return weights
+
+def _count_dtype(player_count:int, backend:str):
+    # coalition counts stay below 2^n: int64 holds them exactly up to 62 players, beyond that
+    # the exact backend needs Python ints and the float backend uses float64
+    if player_count <= 62:
+        return np.int64
+    return object if backend == "exact" else np.float64
+
+def _losing_coalition_counts(weights:list[int], weight_levels:int, size_levels:int, dtype=np.int64) -> np.ndarray:
+    # counts of the coalitions by size and total weight, total weights from weight_levels on are dropped
+    counts = np.zeros((size_levels, weight_levels), dtype=dtype)
+    counts[0, 0] = 1
+    for weight in weights:
+        if weight >= weight_levels:
+            continue
+        if size_levels == 1:
+            counts[0, weight:] = counts[0, weight:] + counts[0, :weight_levels - weight]
+        else:
+            counts[1:, weight:] = counts[1:, weight:] + counts[:-1, :weight_levels - weight]
+    return counts
+
+def _remove_player_counts(counts:np.ndarray, weight:int) -> np.ndarray:
+    # undo the player's step of _losing_coalition_counts: counts = without + without shifted by the
+    # player's size and weight, solved along the size axis (or in blocks of `weight` totals)
+    size_levels, quota = counts.shape
+    if weight >= quota:
+        return counts
+    if size_levels > 1 and counts.dtype == np.float64:
+        return _remove_player_float_counts(counts, weight)
+    without = counts.copy()
+    if size_levels > 1:
+        for size in range(1, size_levels):
+            without[size, weight:] = counts[size, weight:] - without[size - 1, :quota - weight]
+        return without
+
+    if weight == 0:
+        # the player never changes the weight, every count is doubled
+        return counts // 2
+    for start in range(weight, quota, weight):
+        stop = min(start + weight, quota)
+        without[0, start:stop] = counts[0, start:stop] - without[0, start - weight:stop - weight]
+    return without
+
+def _remove_player_float_counts(counts:np.ndarray, weight:int) -> np.ndarray:
+    # counts over every total weight: the sizes below the middle are solved upwards from the empty
+    # coalition and the others downwards from the grand coalition, the direction in which the
+    # rounding errors of the subtractions shrink instead of growing with the binomial coefficients
+    size_levels, weight_levels = counts.shape
+    middle = size_levels // 2
+    without = np.zeros_like(counts)
+    without[0] = counts[0]
+    for size in range(1, middle + 1):
+        without[size] = counts[size]
+        without[size, weight:] -= without[size - 1, :weight_levels - weight]
+    for size in range(size_levels - 1, middle + 1, -1):
+        # counts[size, v + weight] = without[size, v + weight] + without[size - 1, v]
+        without[size - 1, :weight_levels - weight] = counts[size, weight:] - without[size, weight:]
+    return without
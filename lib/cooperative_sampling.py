@@ -0,0 +1,211 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from lib.coalition_values import CharacteristicFunction, CoalitionValues
+
+SHAPLEY_METHODS = ("permutation", "antithetic", "stratified")
+
+_worker_values: Optional[CoalitionValues] = None
+
+
+class SamplingResult(NamedTuple):
+    """Monte Carlo estimate of a power index with normal-approximation error bounds."""
+    values: dict
+    half_widths: dict
+    samples: int
+    converged: bool
+
+    def confidence_intervals(self) -> dict:
+        return {player: (value - self.half_widths[player], value + self.half_widths[player])
+                for player, value in self.values.items()}
+
+
+def approximate_shapley_values(players: list[str], characteristic_function, method: str = "permutation",
+                               target_error: float = None, confidence: float = 0.95, max_samples: int = 10000,
+                               batch_size: int = 100, processes: int = 1, seed: int = None) -> SamplingResult:
+    """
+    Estimate Shapley values by sampling.
+
+    :param players: Player names.
+    :param characteristic_function: Callable receiving a coalition (tuple of player names in
+        `players` order) and returning its worth, or a `CoalitionValues`/`CharacteristicFunction`.
+        Callables are wrapped in a `CharacteristicFunction` cache, one per worker process.
+        It must be picklable when processes > 1.
+    :param method: "permutation" samples player orders, "antithetic" pairs every order with
+        its reverse, "stratified" samples every (player, coalition size) stratum equally.
+    :param target_error: Stop once every confidence half-width is at most this value.
+    :param confidence: Confidence level of the reported intervals.
+    :param max_samples: Upper bound on samples (orders, order pairs or stratified rounds).
+    :param batch_size: Samples per task, also how often the stopping rule is checked.
+    :param processes: Worker processes.
+    :param seed: Seed, results only depend on it and not on `processes`.
+    """
+    if method not in SHAPLEY_METHODS:
+        raise ValueError(f"Unknown sampling method {method}, expected one of {SHAPLEY_METHODS}.")
+    batch = _stratified_batch if method == "stratified" else _permutation_batch
+    return _run_sampling(players, characteristic_function, batch, method == "antithetic",
+                         target_error, confidence, max_samples, batch_size, processes, seed)
+
+
+def approximate_banzhaf_indexes(players: list[str], characteristic_function, target_error: float = None,
+                                confidence: float = 0.95, max_samples: int = 10000, batch_size: int = 100,
+                                processes: int = 1, seed: int = None) -> SamplingResult:
+    """
+    Estimate Banzhaf indexes (as in `banzhaf_indexes`) from uniformly sampled coalitions.
+    Arguments as in `approximate_shapley_values`, a sample is one random coalition.
+    """
+    return _run_sampling(players, characteristic_function, _banzhaf_batch, False,
+                         target_error, confidence, max_samples, batch_size, processes, seed)
+
+
+def _run_sampling(players, characteristic_function, batch, antithetic, target_error, confidence,
+                  max_samples, batch_size, processes, seed) -> SamplingResult:
+    if isinstance(characteristic_function, CoalitionValues):
+        coalition_values = characteristic_function
+    else:
+        coalition_values = CharacteristicFunction(players, characteristic_function)
+    players = coalition_values.players
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+    # one child seed per batch index keeps results independent of scheduling
+    seeds = np.random.SeedSequence(seed)
+    batch_sizes = [min(batch_size, max_samples - start) for start in range(0, max_samples, batch_size)]
+    batch_seeds = seeds.spawn(len(batch_sizes))
+
+    totals = None
+    values, half_widths = {}, {}
+    samples, converged = 0, False
+    for sums, squares, counts in _iter_batches(coalition_values, batch, antithetic,
+                                               zip(batch_seeds, batch_sizes), processes):
+        totals = (sums, squares, counts) if totals is None else (totals[0] + sums, totals[1] + squares, totals[2] + counts)
+        samples += int(counts.min())
+        estimates, half_width = _estimate(*totals, z)
+        values = dict(zip(players, estimates.tolist()))
+        half_widths = dict(zip(players, half_width.tolist()))
+        if target_error is not None and samples > 1 and half_width.max() <= target_error:
+            converged = True
+            break
+
+    return SamplingResult(values, half_widths, samples, converged)
+
+
+def _iter_batches(values, batch, antithetic, tasks, processes):
+    if processes <= 1:
+        for batch_seed, size in tasks:
+            yield batch(values, batch_seed, size, antithetic)
+        return
+
+    with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(values,)) as executor:
+        pending = deque()
+        tasks = iter(tasks)
+
+        def submit_next():
+            task = next(tasks, None)
+            if task is not None:
+                pending.append(executor.submit(_run_batch_in_worker, batch, *task, antithetic))
+
+        for _ in range(2 * processes):
+            submit_next()
+        try:
+            while pending:
+                result = pending.popleft().result()
+                submit_next()
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def _init_worker(values):
+    global _worker_values
+    _worker_values = values
+
+
+def _run_batch_in_worker(batch, batch_seed, size, antithetic):
+    return batch(_worker_values, batch_seed, size, antithetic)
+
+
+def _estimate(sums: np.ndarray, squares: np.ndarray, counts: np.ndarray, z: float):
+    # strata are the last axis (one stratum for the unstratified methods)
+    means = sums / counts
+    variances = np.maximum(squares / counts - means ** 2, 0.0) * counts / np.maximum(counts - 1, 1)
+    strata = sums.shape[1]
+    estimates = means.mean(axis=1)
+    half_widths = z * np.sqrt((variances / counts).sum(axis=1)) / strata
+    return estimates, half_widths
+
+
+def _worth(values, member_indexes) -> float:
+    mask = 0
+    for index in member_indexes:
+        mask |= 1 << index
+    return values.worth_of_mask(mask)
+
+
+def _permutation_batch(values, batch_seed, size, antithetic):
+    rng = np.random.default_rng(batch_seed)
+    player_count = values.player_count
+    sums, squares = np.zeros((player_count, 1)), np.zeros((player_count, 1))
+
+    for _ in range(size):
+        order = rng.permutation(player_count)
+        contributions = _order_contributions(values, order)
+        if antithetic:
+            contributions = (contributions + _order_contributions(values, order[::-1])) / 2
+        sums[:, 0] += contributions
+        squares[:, 0] += contributions ** 2
+
+    return sums, squares, np.full((player_count, 1), size)
+
+
+def _order_contributions(values, order) -> np.ndarray:
+    contributions = np.zeros(values.player_count)
+    mask = 0
+    previous = values.worth_of_mask(mask)
+    for player_index in order.tolist():
+        mask |= 1 << player_index
+        current = values.worth_of_mask(mask)
+        contributions[player_index] = current - previous
+        previous = current
+    return contributions
+
+
+def _stratified_batch(values, batch_seed, size, antithetic):
+    # stratum k of player i: marginal contribution to a uniform coalition of k other players
+    rng = np.random.default_rng(batch_seed)
+    player_count = values.player_count
+    sums, squares = np.zeros((player_count, player_count)), np.zeros((player_count, player_count))
+
+    for _ in range(size):
+        for player_index in range(player_count):
+            others = np.delete(np.arange(player_count), player_index)
+            for coalition_size in range(player_count):
+                coalition = rng.choice(others, coalition_size, replace=False).tolist()
+                contribution = (_worth(values, coalition + [player_index])
+                                - _worth(values, coalition))
+                sums[player_index, coalition_size] += contribution
+                squares[player_index, coalition_size] += contribution ** 2
+
+    return sums, squares, np.full((player_count, player_count), size)
+
+
+def _banzhaf_batch(values, batch_seed, size, antithetic):
+    # S without i is uniform over coalitions of the others, as the Banzhaf index averages over
+    rng = np.random.default_rng(batch_seed)
+    player_count = values.player_count
+    sums, squares = np.zeros((player_count, 1)), np.zeros((player_count, 1))
+
+    for _ in range(size):
+        members = set(np.flatnonzero(rng.random(player_count) < 0.5).tolist())
+        worth = _worth(values, members)
+        for player_index in range(player_count):
+            flipped = _worth(values, members ^ {player_index})
+            contribution = worth - flipped if player_index in members else flipped - worth
+            sums[player_index, 0] += contribution
+            squares[player_index, 0] += contribution ** 2
+
+    return sums, squares, np.full((player_count, 1), size)
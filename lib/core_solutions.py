@@ -0,0 +1,356 @@
+"""
+Core, least core and nucleolus of cooperative games.
+
+The allocations are found with linear programs over the coalition constraints
+x(S) + epsilon >= v(S). Only a few of the 2^n constraints are ever binding, so they are
+generated lazily: the program starts with the single-player coalitions, and after every solve
+a vectorized scan over the coalition worths adds the most violated coalitions, re-solving from
+the previous basis, until none is violated. The linear programs stay a few hundred rows tall
+and the scan is the only step touching every coalition.
+
+Coalitions of a `CoalitionValues` without a known worth impose no constraint.
+"""
+from itertools import count
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from lib.coalition_values import DENSE_PLAYER_LIMIT, CoalitionValues, as_coalition_values
+from lib.instrumentation import timed_phase
+from lib.linear_programming import solve_linear_program
+
+# Coalitions added to the linear program per scan, as a multiple of the player count
+VIOLATED_PER_PLAYER = 4
+# Coalitions scored per block of the scan over a dense worth array
+SCAN_BLOCK_SIZE = 1 << 22
+# Low player bits enumerated inside a scan block
+SCAN_LOW_BITS = 16
+# Coalitions left slack in this many consecutive solves are dropped from the linear program
+DROP_AFTER_SLACK_SOLVES = 3
+# Solves per round after which coalitions are no longer dropped, so a round always ends
+DROP_SOLVE_LIMIT = 100
+
+
+class LeastCoreResult(NamedTuple):
+    """
+    An allocation of the least core and its epsilon: every coalition gets at least its worth
+    minus epsilon. The core is non-empty exactly when epsilon <= 0.
+
+    constraints is the number of coalition constraints in the last linear program.
+    """
+    allocation: Dict[str, float]
+    epsilon: float
+    constraints: int
+
+
+@timed_phase("least_core")
+def least_core(players: list[str], coalitions: list[tuple] = None, worth_of_coalition: list[float] = None,
+               characteristic_function=None, tolerance: float = 1e-9) -> LeastCoreResult:
+    """
+    Efficient allocation minimizing the largest excess v(S) - x(S) over the proper coalitions.
+    `players` may also be a `CoalitionValues`, arguments as in `shapley_values`.
+
+    :param tolerance: Relative to the largest worth, excesses up to this count as satisfied.
+    """
+    values = as_coalition_values(players, coalitions, worth_of_coalition, characteristic_function)
+    solver = _LexicographicSolver(values, tolerance)
+    allocation, epsilon = solver.solve_round()
+    return LeastCoreResult(solver.allocation_dict(allocation), epsilon * solver.scale, len(solver.free))
+
+
+@timed_phase("core_allocation")
+def core_allocation(players: list[str], coalitions: list[tuple] = None, worth_of_coalition: list[float] = None,
+                    characteristic_function=None, tolerance: float = 1e-9) -> Optional[Dict[str, float]]:
+    """A core allocation (from the least core), None when the core is empty. Arguments as in `least_core`."""
+    values = as_coalition_values(players, coalitions, worth_of_coalition, characteristic_function)
+    solver = _LexicographicSolver(values, tolerance)
+    allocation, epsilon = solver.solve_round()
+    return solver.allocation_dict(allocation) if epsilon <= tolerance else None
+
+
+@timed_phase("is_in_core")
+def is_in_core(allocation: Dict[str, float], players: list[str], coalitions: list[tuple] = None,
+               worth_of_coalition: list[float] = None, characteristic_function=None, tolerance: float = 1e-9) -> bool:
+    """
+    Whether `allocation` (player -> payoff) is efficient and gives every coalition at least its worth.
+    Other arguments as in `least_core`.
+    """
+    values = as_coalition_values(players, coalitions, worth_of_coalition, characteristic_function)
+    scanner = _CoalitionScanner(values)
+    scale = scanner.scale
+    payoffs = np.array([allocation[player] for player in values.players], dtype=float) / scale
+    grand_coalition = values.worth_of_mask(values.coalition_count - 1) / scale
+    if abs(payoffs.sum() - grand_coalition) > tolerance:
+        return False
+    masks, _ = scanner.most_violated(payoffs, None, tolerance, 1)
+    return len(masks) == 0
+
+
+@timed_phase("nucleolus")
+def nucleolus(players: list[str], coalitions: list[tuple] = None, worth_of_coalition: list[float] = None,
+              characteristic_function=None, tolerance: float = 1e-9) -> Dict[str, float]:
+    """
+    The nucleolus: the efficient allocation lexicographically minimizing the sorted excesses.
+    Arguments as in `least_core`.
+
+    Solved as a sequence of least core programs. After every round the coalitions whose
+    constraint is binding in all optimal solutions (positive dual) are fixed at that round's
+    epsilon, and every coalition whose payoff is then determined leaves the program; each
+    round fixes a new direction, so at most n rounds are needed.
+    """
+    values = as_coalition_values(players, coalitions, worth_of_coalition, characteristic_function)
+    solver = _LexicographicSolver(values, tolerance)
+    allocation, _ = solver.solve_round()
+    while solver.rank < values.player_count and solver.fix_binding_coalitions():
+        if solver.rank == values.player_count:
+            allocation = solver.fixed_allocation()
+            break
+        allocation, _ = solver.solve_round()
+    return solver.allocation_dict(allocation)
+
+
+def _indicator(mask: int, player_count: int) -> np.ndarray:
+    return np.array([(mask >> player_index) & 1 for player_index in range(player_count)], dtype=float)
+
+
+def _subset_sums(weights: np.ndarray) -> np.ndarray:
+    """sums[mask] = total weight of the members of mask, built one player bit at a time."""
+    sums = np.zeros(1)
+    for weight in weights:
+        sums = np.concatenate([sums, sums + weight])
+    return sums
+
+
+class _CoalitionScanner:
+    """Finds the coalitions with the largest excess v(S) - x(S) for an allocation x."""
+
+    def __init__(self, values: CoalitionValues):
+        self.player_count = values.player_count
+        self.full_mask = values.coalition_count - 1
+        if values.is_complete() and values.player_count <= DENSE_PLAYER_LIMIT:
+            self.worth = values.array()
+            self.masks = None
+        else:
+            if values.player_count > 62:
+                raise ValueError("Coalitions of more than 62 players are not supported.")
+            known = [(mask, worth) for mask, worth in values.items() if 0 < mask < self.full_mask]
+            self.masks = np.array([mask for mask, _ in known], dtype=np.int64)
+            self.worth = np.array([worth for _, worth in known], dtype=float)
+            self.bits = np.zeros((len(known), self.player_count), dtype=np.uint8)
+            for player_index in range(self.player_count):
+                self.bits[:, player_index] = (self.masks >> player_index) & 1
+        self.scale = max(1.0, float(np.abs(self.worth).max(initial=0.0)))
+        self.worth = self.worth / self.scale
+
+    @timed_phase("coalition_scan")
+    def most_violated(self, allocation: np.ndarray, direction: Optional[np.ndarray], threshold: float,
+                      count: int) -> Tuple[List[int], np.ndarray]:
+        """
+        Up to `count` proper coalitions with excess above `threshold`, largest first. With a
+        `direction`, coalitions S with direction(S) == 0 (payoff already determined) are skipped.
+        """
+        if self.masks is not None:
+            excess = self.worth - self._sparse_sums(allocation)
+            keep = excess > threshold
+            if direction is not None:
+                keep &= np.abs(self._sparse_sums(direction)) > _SPAN_TOLERANCE
+            return self._top(self.masks[keep], excess[keep], count)
+
+        low_bits = min(self.player_count, SCAN_LOW_BITS)
+        low_sums, high_sums = _subset_sums(allocation[:low_bits]), _subset_sums(allocation[low_bits:])
+        if direction is not None:
+            low_direction, high_direction = _subset_sums(direction[:low_bits]), _subset_sums(direction[low_bits:])
+        block_rows = max(1, SCAN_BLOCK_SIZE >> low_bits)
+
+        found_masks, found_excess = [], []
+        for start in range(0, len(high_sums), block_rows):
+            stop = min(start + block_rows, len(high_sums))
+            block = self.worth[start << low_bits:stop << low_bits].reshape(stop - start, -1)
+            excess = block - high_sums[start:stop, None]
+            excess -= low_sums
+            positions = np.flatnonzero(excess > threshold)
+            if direction is not None:
+                # only the few coalitions above the threshold are tested against the direction
+                spanned = high_direction[start + (positions >> low_bits)] + low_direction[positions & ((1 << low_bits) - 1)]
+                positions = positions[np.abs(spanned) > _SPAN_TOLERANCE]
+            masks = positions + (start << low_bits)
+            proper = (masks != 0) & (masks != self.full_mask)
+            masks, excess = self._top(masks[proper], excess.ravel()[positions][proper], count)
+            found_masks.extend(masks)
+            found_excess.append(excess)
+        if not found_masks:
+            return [], np.zeros(0)
+        return self._top(np.array(found_masks, dtype=np.int64), np.concatenate(found_excess), count)
+
+    def _sparse_sums(self, weights: np.ndarray) -> np.ndarray:
+        sums = np.zeros(len(self.masks))
+        for player_index, weight in enumerate(weights):
+            if weight != 0:
+                sums += weight * self.bits[:, player_index]
+        return sums
+
+    @staticmethod
+    def _top(masks: np.ndarray, excess: np.ndarray, count: int) -> Tuple[List[int], np.ndarray]:
+        if len(masks) > count:
+            top = np.argpartition(-excess, count - 1)[:count]
+            masks, excess = masks[top], excess[top]
+        order = np.argsort(-excess, kind="stable")
+        return masks[order].tolist(), excess[order]
+
+
+# |direction(S)| at or below this means the payoff of S is fixed by the fixed coalitions
+_SPAN_TOLERANCE = 1e-9
+
+
+class _LexicographicSolver:
+    """
+    Least core programs with generated constraints, in worths divided by the largest one.
+
+    fixed maps the coalitions whose excess is settled (the grand coalition at 0) to that
+    excess, free lists the coalitions constrained by x(S) + epsilon >= v(S).
+    """
+
+    def __init__(self, values: CoalitionValues, tolerance: float):
+        self.values = values
+        self.player_count = values.player_count
+        self.scanner = _CoalitionScanner(values)
+        self.scale = self.scanner.scale
+        self.tolerance = tolerance
+        self.fixed: Dict[int, float] = {self.scanner.full_mask: 0.0}
+        self.fixed_worth = {self.scanner.full_mask: values.worth_of_mask(self.scanner.full_mask) / self.scale}
+        self.free: List[int] = []
+        self.free_worth: Dict[int, float] = {}
+        # consecutive solves every free coalition was not binding in
+        self.slack_solves: Dict[int, int] = {}
+        self.program_coalitions = set()
+        self.duals = np.zeros(0)
+        self.basis: Tuple = ()
+        self.direction: Optional[np.ndarray] = None
+        self.rank = 1
+        self._update_span()
+
+        # the single-player coalitions keep every round bounded
+        for player_index in range(self.player_count):
+            self._add_free(1 << player_index)
+
+    @timed_phase("solve_round")
+    def solve_round(self) -> Tuple[np.ndarray, float]:
+        """Minimize epsilon over the free coalitions, adding violated ones until there are none."""
+        for solve in count(1):
+            if self.free:
+                allocation, epsilon = self._solve_program()
+            else:
+                # nothing constrains epsilon yet, start from the least norm allocation of the fixed coalitions
+                allocation, epsilon, self.duals = self.fixed_allocation(), -np.inf, np.zeros(0)
+            masks, _ = self.scanner.most_violated(allocation, self.direction, epsilon + self.tolerance,
+                                                  VIOLATED_PER_PLAYER * self.player_count)
+            new_masks = [mask for mask in masks if mask not in self.free_worth]
+            if not new_masks:
+                return allocation, epsilon
+            if solve < DROP_SOLVE_LIMIT:
+                self._drop_slack_coalitions()
+            if not [mask for mask in new_masks if self._add_free(mask)]:
+                return allocation, epsilon
+
+    def fix_binding_coalitions(self) -> bool:
+        """Fix the free coalitions with a positive dual at the last epsilon, drop the determined ones."""
+        binding = [mask for mask, dual in zip(self.free, self.duals) if dual > self.tolerance]
+        if not binding:
+            return False
+        for mask in binding:
+            self.fixed[mask] = self.epsilon
+            self.fixed_worth[mask] = self.free_worth.pop(mask)
+        self._update_span()
+        self.free = [mask for mask in self.free if mask in self.free_worth and not self._is_determined(mask)]
+        self.free_worth = {mask: self.free_worth[mask] for mask in self.free}
+        self.slack_solves = {mask: self.slack_solves[mask] for mask in self.free}
+        return True
+
+    def fixed_allocation(self) -> np.ndarray:
+        """The allocation solving the fixed equalities x(S) = v(S) - excess, the least norm one below full rank."""
+        masks = list(self.fixed)
+        matrix = np.array([_indicator(mask, self.player_count) for mask in masks])
+        rhs = np.array([self.fixed_worth[mask] - self.fixed[mask] for mask in masks])
+        return np.linalg.lstsq(matrix, rhs, rcond=None)[0]
+
+    def allocation_dict(self, allocation: np.ndarray) -> Dict[str, float]:
+        return {player: float(payoff) * self.scale for player, payoff in zip(self.values.players, allocation)}
+
+    def _add_free(self, mask: int) -> bool:
+        if mask in self.free_worth or mask in self.fixed or self._is_determined(mask):
+            return False
+        try:
+            worth = self.values.worth_of_mask(mask)
+        except KeyError:
+            return False
+        self.free.append(mask)
+        self.free_worth[mask] = worth / self.scale
+        self.slack_solves[mask] = 0
+        return True
+
+    def _drop_slack_coalitions(self):
+        # the slack of a dropped row is basic, so the rest of the basis stays a basis; the
+        # single-player coalitions are kept to keep the program bounded
+        dropped = {mask for mask, solves in self.slack_solves.items()
+                   if solves >= DROP_AFTER_SLACK_SOLVES and mask & (mask - 1)}
+        if dropped:
+            self.free = [mask for mask in self.free if mask not in dropped]
+            for mask in dropped:
+                del self.free_worth[mask], self.slack_solves[mask]
+
+    def _is_determined(self, mask: int) -> bool:
+        if self.direction is None:
+            return True
+        return abs(float(_indicator(mask, self.player_count) @ self.direction)) <= _SPAN_TOLERANCE
+
+    def _update_span(self):
+        # a fixed random combination of the null space of the fixed coalitions: a coalition's
+        # payoff is determined exactly when its indicator is orthogonal to the whole null space,
+        # which with probability one is when it is orthogonal to this single direction
+        matrix = np.array([_indicator(mask, self.player_count) for mask in self.fixed])
+        _, singular_values, right_vectors = np.linalg.svd(matrix)
+        self.rank = int((singular_values > 1e-9 * max(1.0, singular_values.max())).sum())
+        if self.rank == self.player_count:
+            self.direction = None
+            return
+        null_space = right_vectors[self.rank:].T
+        direction = null_space @ np.random.default_rng(0).standard_normal(null_space.shape[1])
+        self.direction = direction / np.linalg.norm(direction)
+
+    def _solve_program(self) -> Tuple[np.ndarray, float]:
+        # variables x+ (n), x- (n), epsilon+, epsilon-; maximize -epsilon
+        player_count = self.player_count
+        fixed = list(self.fixed)
+        free_rows = np.array([_indicator(mask, player_count) for mask in self.free]).reshape(-1, player_count)
+        fixed_rows = np.array([_indicator(mask, player_count) for mask in fixed])
+
+        objective = np.concatenate([np.zeros(2 * player_count), [-1.0, 1.0]])
+        inequalities = np.hstack([-free_rows, free_rows, -np.ones((len(free_rows), 1)), np.ones((len(free_rows), 1))])
+        inequality_rhs = -np.array([self.free_worth[mask] for mask in self.free])
+        equalities = np.hstack([fixed_rows, -fixed_rows, np.zeros((len(fixed), 2))])
+        equality_rhs = np.array([self.fixed_worth[mask] - self.fixed[mask] for mask in fixed])
+
+        labels = ([("x+", index) for index in range(player_count)] + [("x-", index) for index in range(player_count)]
+                  + [("epsilon+",), ("epsilon-",)] + [("free", mask) for mask in self.free]
+                  + [("upper", mask) for mask in fixed] + [("lower", mask) for mask in fixed])
+        indexes = {label: index for index, label in enumerate(labels)}
+        # the previous basis plus the slacks of the rows added since is a basis of the new program
+        basis = ([indexes[label] for label in self.basis if label in indexes]
+                 + [indexes[("free", mask)] for mask in self.free if mask not in self.program_coalitions])
+        self.program_coalitions = set(self.free)
+
+        result = solve_linear_program(objective, inequalities, inequality_rhs, equalities, equality_rhs,
+                                      basis=basis if self.basis else None)
+        if result.status == "unbounded":
+            raise ValueError("The least core is unbounded, the worth of every single-player coalition is needed.")
+        if result.status != "optimal":
+            raise ValueError(f"Least core program ended with status {result.status}.")
+
+        self.basis = tuple(labels[variable] for variable in result.basis)
+        self.duals = result.duals[:len(self.free)]
+        slacks = inequality_rhs - inequalities @ result.x
+        for mask, slack in zip(self.free, slacks):
+            self.slack_solves[mask] = self.slack_solves[mask] + 1 if slack > self.tolerance else 0
+        self.epsilon = float(result.x[2 * player_count] - result.x[2 * player_count + 1])
+        allocation = result.x[:player_count] - result.x[player_count:2 * player_count]
+        return allocation, self.epsilon
@@ -0,0 +1,120 @@
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+
+from lib.instrumentation import ELIMINATION_ROUNDS, count, phase, timed_phase
+
+# Upper bound for the boolean block compared at once (rows x strategies x opponent strategies)
+COMPARISON_BLOCK_SIZE = 1 << 24
+
+
+class EliminationStep(NamedTuple):
+    """One removal of the iterated elimination, indexes refer to the original game."""
+    player_index: int
+    dominant_strategy: str
+    dominated_strategy: str
+    dominant_index: int
+    dominated_index: int
+
+
+class _PlayerDominance:
+    """Pairwise dominance bookkeeping for one player over the alive opponent strategies.
+
+    Columns of `payoffs` are the opponent strategies (or opponent profiles for more players).
+    worse_counts[i, j] counts alive columns where strategy i pays less than j,
+    better_counts[i, j] counts those where it pays more. i weakly dominates j when
+    worse_counts[i, j] == 0 and better_counts[i, j] > 0, strictly when better_counts[i, j]
+    equals the number of alive columns.
+    """
+
+    def __init__(self, payoffs: np.ndarray):
+        self.payoffs = payoffs
+        strategy_count, opponent_count = payoffs.shape
+        self.alive = np.ones(strategy_count, dtype=bool)
+        self.alive_opponent_count = opponent_count
+        self.worse_counts = np.zeros((strategy_count, strategy_count), dtype=np.int32)
+        self.better_counts = np.zeros((strategy_count, strategy_count), dtype=np.int32)
+
+        chunk = max(1, COMPARISON_BLOCK_SIZE // max(1, strategy_count * opponent_count))
+        for start in range(0, strategy_count, chunk):
+            block = payoffs[start:start + chunk, None, :]
+            self.worse_counts[start:start + chunk] = (block < payoffs[None, :, :]).sum(axis=2)
+            self.better_counts[start:start + chunk] = (block > payoffs[None, :, :]).sum(axis=2)
+
+    @timed_phase("remove_opponent_columns")
+    def remove_opponent_columns(self, column_indexes: np.ndarray):
+        """Remove several alive columns at once, e.g. every opponent profile using a removed strategy."""
+        strategy_count = self.payoffs.shape[0]
+        chunk = max(1, COMPARISON_BLOCK_SIZE // max(1, strategy_count * strategy_count))
+        for start in range(0, len(column_indexes), chunk):
+            columns = self.payoffs[:, column_indexes[start:start + chunk]]
+            self.worse_counts -= (columns[:, None, :] < columns[None, :, :]).sum(axis=2, dtype=np.int32)
+            self.better_counts -= (columns[:, None, :] > columns[None, :, :]).sum(axis=2, dtype=np.int32)
+        self.alive_opponent_count -= len(column_indexes)
+
+    def first_dominance(self, strictly_only: bool):
+        """Return the first (dominant, dominated) pair in row-major order or None."""
+        if strictly_only:
+            dominance = (self.better_counts == self.alive_opponent_count) & (self.better_counts > 0)
+        else:
+            dominance = (self.worse_counts == 0) & (self.better_counts > 0)
+        dominance &= self.alive[:, None]
+        dominance &= self.alive[None, :]
+
+        flat_index = int(np.argmax(dominance))
+        if not dominance.flat[flat_index]:
+            return None
+        return divmod(flat_index, dominance.shape[1])
+
+
+@timed_phase("iterated_elimination")
+def iterated_elimination(game, strictly_only: bool = False) -> Tuple[List[List[int]], List[EliminationStep]]:
+    """Iteratively remove dominated strategies of `game` using index masks.
+
+    Every round removes the first dominated strategy of player 1, or of the next player if
+    player 1 has none, exactly like repeatedly calling `get_weakly_dominant_strategies` (or the
+    strict variant) and removing the first dominated strategy found.
+
+    The game provides `_player_payoff_matrix(player)` with the player's strategies on the rows
+    and one column per opponent profile, and `_profile_columns(player, strategy_indexes)` with
+    the columns of the opponent profiles made of the given strategies.
+
+    :param game: A `TwoPlayerStrategicFormGame` or `NPlayerStrategicFormGame`.
+    :param strictly_only: Only eliminate strictly dominated strategies.
+    :return: The surviving strategy indexes per player and the elimination trace.
+    """
+    players = game.players
+    with phase("dominance_counts"):
+        dominance = [_PlayerDominance(game._player_payoff_matrix(player_index)) for player_index in players]
+
+    trace: List[EliminationStep] = []
+    while True:
+        step = None
+        for player_index in players:
+            pair = dominance[player_index].first_dominance(strictly_only)
+            if pair is not None:
+                step = (player_index, pair)
+                break
+
+        if step is None:
+            break
+
+        count(ELIMINATION_ROUNDS)
+        player_index, (dominant_index, dominated_index) = step
+        for other_index in players:
+            if other_index != player_index:
+                # alive opponent profiles of other_index that use the removed strategy
+                strategy_indexes = [np.flatnonzero(player.alive) for player in dominance]
+                strategy_indexes[player_index] = [dominated_index]
+                dominance[other_index].remove_opponent_columns(game._profile_columns(other_index, strategy_indexes))
+        dominance[player_index].alive[dominated_index] = False
+
+        player_strategies = game._strategies[player_index]
+        trace.append(EliminationStep(player_index,
+                                     player_strategies[dominant_index],
+                                     player_strategies[dominated_index],
+                                     dominant_index,
+                                     dominated_index))
+
+    surviving_indexes = [np.flatnonzero(player.alive).tolist() for player in dominance]
+    return surviving_indexes, trace
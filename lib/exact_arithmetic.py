@@ -0,0 +1,80 @@
+"""
+Helpers of the "exact" numeric backend.
+
+Values are read as fractions: integers, `Fraction`s and floats as the exact value they hold (so
+0.1 is read as 3602879701896397/36028797018963968, not 1/10). Snapping floats to the simplest
+fraction within a few units in the last place is opt-in, see `to_fraction`.
+Whole arrays are scaled by their common denominator to integer numerators, so sums and
+products run on integers (int64 when they cannot overflow, Python ints otherwise) and
+fractions are only formed for the final results.
+"""
+from fractions import Fraction
+from math import lcm
+from typing import Tuple
+
+import numpy as np
+
+NUMERIC_BACKENDS = ("float", "exact")
+
+# Largest denominator a float is snapped to when snapping is asked for
+MAX_DENOMINATOR = 10 ** 9
+
+_FLOAT_EPSILON = float(np.finfo(float).eps)
+
+
+def check_backend(backend: str):
+    if backend not in NUMERIC_BACKENDS:
+        raise ValueError(f"Unknown numeric backend {backend}, expected one of {NUMERIC_BACKENDS}.")
+
+
+def to_fraction(value, snap: bool = False) -> Fraction:
+    """
+    `value` as a fraction, floats exactly as they are stored.
+
+    :param value: An int, float, `Fraction` or anything else `Fraction` accepts.
+    :param snap: Read floats as the simplest fraction with a denominator up to MAX_DENOMINATOR
+        within 4 ulps instead (so 1/3 given as 0.333... is read as 1/3, but so is every float
+        that close to it).
+    """
+    if isinstance(value, (float, np.floating)):
+        exact = Fraction(float(value))
+        if not snap:
+            return exact
+        snapped = exact.limit_denominator(MAX_DENOMINATOR)
+        return snapped if abs(snapped - exact) <= 4 * _FLOAT_EPSILON * abs(exact) else exact
+    if isinstance(value, (int, np.integer)):
+        return Fraction(int(value))
+    return Fraction(value)
+
+
+def integer_scaled(values, headroom_bits: int = 0, snap: bool = False) -> Tuple[np.ndarray, int]:
+    """
+    Integer numerators and a common denominator with values == numerators / denominator.
+
+    :param values: Array-like of ints, floats or fractions.
+    :param headroom_bits: The numerators are int64 when they still fit after growing by this
+        many bits (e.g. summing 2^headroom_bits of them), Python ints (object dtype) otherwise.
+    :param snap: Snap non-integral floats, see `to_fraction`.
+    """
+    array = np.asarray(values)
+    if array.dtype.kind in "biu":
+        numerators, denominator = array, 1
+    elif (array.dtype.kind == "f" and np.isfinite(array).all()
+          and np.abs(array).max(initial=0.0) < 2.0 ** 53 and (array == np.round(array)).all()):
+        numerators, denominator = array.astype(np.int64), 1
+    else:
+        fractions = [to_fraction(value, snap) for value in array.ravel().tolist()]
+        denominator = lcm(*(fraction.denominator for fraction in fractions)) if fractions else 1
+        numerators = np.empty(len(fractions), dtype=object)
+        numerators[:] = [fraction.numerator * (denominator // fraction.denominator) for fraction in fractions]
+        numerators = numerators.reshape(array.shape)
+
+    largest = int(np.abs(numerators).max(initial=0))
+    if largest.bit_length() + headroom_bits < 63:
+        return numerators.astype(np.int64), denominator
+    return numerators.astype(object), denominator
+
+
+def float_error_bound(magnitude, terms: int):
+    """Bound on the rounding error of a float sum of `terms` products whose absolute values add up to `magnitude`."""
+    return 2.0 * (terms + 1) * _FLOAT_EPSILON * np.asarray(magnitude, dtype=float)
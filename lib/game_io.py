@@ -0,0 +1,218 @@
+"""
+Binary on-disk format for games.
+
+A file holds
+
+    8 bytes    magic b"GTGAME1\\0"
+    8 bytes    header length, little endian uint64
+    header     UTF-8 JSON: kind, constructor arguments (strategy names, auction parameters),
+               user metadata and the dtype / shape / offset of every array block
+    blocks     raw C-order arrays, each aligned to BLOCK_ALIGNMENT bytes
+
+Loading memory-maps the blocks read-only, so a large game opens without reading its payoffs
+and several worker processes loading the same file share the pages of the OS file cache.
+"""
+import json
+import struct
+from typing import Dict, NamedTuple, Tuple, Union
+
+import numpy as np
+
+from lib.auction import VickeryAuction
+from lib.n_player_strategic_form_game import NPlayerStrategicFormGame
+from lib.strategic_form_game import TwoPlayerStrategicFormGame, _restrict
+
+MAGIC = b"GTGAME1\0"
+FORMAT_VERSION = 1
+BLOCK_ALIGNMENT = 64
+# Bytes written at once when copying a block to the file
+WRITE_CHUNK_SIZE = 1 << 24
+
+_HEADER_LENGTH = struct.Struct("<Q")
+
+
+class _PayoffView(NamedTuple):
+    """One player's payoffs of a subgame view, `storage[rows][:, cols]` gathered a few rows at a time."""
+    storage: np.ndarray
+    rows: np.ndarray
+    cols: np.ndarray
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.rows), len(self.cols)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.storage.dtype
+
+    def __getitem__(self, row_slice: slice) -> np.ndarray:
+        return _restrict(self.storage, self.rows[row_slice], self.cols)
+
+
+# A tuple (one array per player) is stored as one block per player, "name[player]", in its own dtype
+BlockArray = Union[np.ndarray, _PayoffView]
+BlockArrays = Union[BlockArray, Tuple[BlockArray, ...]]
+
+
+def save_game(game, path: str, metadata: dict = None):
+    """
+    Save a `TwoPlayerStrategicFormGame` (or subgame view), `NPlayerStrategicFormGame` or
+    `VickeryAuction` to `path`.
+
+    :param game: The game to save.
+    :param path: Destination file.
+    :param metadata: JSON serializable data stored in the header, see `read_game_header`.
+    """
+    header, described_blocks = _describe_game(game)
+    blocks = _player_blocks(described_blocks)
+    header["version"] = FORMAT_VERSION
+    header["metadata"] = {} if metadata is None else metadata
+
+    offset = 0
+    header["blocks"] = {}
+    for name, array in blocks.items():
+        dtype, shape = array.dtype, array.shape
+        if dtype.hasobject:
+            raise ValueError(f"Cannot save the {name} block with dtype {dtype}, only numeric payoffs are supported.")
+        offset = _align(offset)
+        header["blocks"][name] = {"dtype": dtype.str, "shape": list(shape), "offset": offset}
+        offset += dtype.itemsize * int(np.prod(shape))
+
+    encoded_header = json.dumps(header).encode("utf-8")
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(_HEADER_LENGTH.pack(len(encoded_header)))
+        file.write(encoded_header)
+        data_start = _align(file.tell())
+        for name, array in blocks.items():
+            file.seek(data_start + header["blocks"][name]["offset"])
+            _write_block(file, array)
+
+
+def load_game(path: str, mmap: bool = True):
+    """
+    Load a game saved with `save_game`.
+
+    :param path: File written by `save_game`.
+    :param mmap: Memory-map the payoff blocks read-only, otherwise read them into memory.
+    :return: The game, rebuilt through its usual constructor.
+    """
+    header, data_start = _read_header(path)
+    blocks = {name: _load_block(path, data_start, block, mmap) for name, block in header["blocks"].items()}
+
+    kind = header["kind"]
+    if kind == "two_player":
+        first_player_payoffs, second_player_payoffs = _player_arrays(blocks, "payoffs")
+        return _two_player_class(header["class"]).from_payoff_arrays(header["strategies"], first_player_payoffs, second_player_payoffs)
+    if kind == "n_player":
+        payoff_tensors = _player_arrays(blocks, "payoffs")
+        if payoff_tensors:
+            return NPlayerStrategicFormGame.from_payoff_tensors(header["strategies"], list(payoff_tensors))
+        return NPlayerStrategicFormGame.from_sparse_payoffs(header["strategies"], blocks["profiles"],
+                                                            blocks["payoffs_sparse"], blocks["fill_values"])
+    if kind == "vickery_auction":
+        auction = VickeryAuction(header["theta_values"], header["bids"], header["tie_breacker"])
+        first_player_payoffs, second_player_payoffs = _player_arrays(blocks, "payoffs")
+        auction._strategic_form_game = TwoPlayerStrategicFormGame.from_payoff_arrays(
+            header["strategies"], first_player_payoffs, second_player_payoffs)
+        return auction
+    raise ValueError(f"Unknown game kind {kind} in {path}.")
+
+
+def read_game_header(path: str) -> dict:
+    """The JSON header of a saved game (kind, constructor arguments, metadata and blocks)."""
+    return _read_header(path)[0]
+
+
+def _describe_game(game) -> Tuple[dict, Dict[str, BlockArrays]]:
+    if isinstance(game, VickeryAuction):
+        strategic_form_game = game.game()
+        return ({"kind": "vickery_auction",
+                 "theta_values": np.asarray(game.theta_values).tolist(),
+                 "bids": np.asarray(game.bids).tolist(),
+                 "tie_breacker": game.tie_breacker,
+                 "strategies": strategic_form_game._strategies},
+                {"payoffs": _two_player_payoffs(strategic_form_game)})
+
+    if isinstance(game, TwoPlayerStrategicFormGame):
+        return ({"kind": "two_player", "class": type(game).__name__, "strategies": game._strategies},
+                {"payoffs": _two_player_payoffs(game)})
+
+    if isinstance(game, NPlayerStrategicFormGame):
+        header = {"kind": "n_player", "strategies": game._strategies}
+        if game.is_sparse:
+            return header, {"profiles": game._sparse_profiles,
+                            "payoffs_sparse": game._sparse_payoffs,
+                            "fill_values": game._fill_values}
+        return header, {"payoffs": tuple(game._payoff_tensors)}
+
+    raise TypeError(f"Cannot save games of type {type(game).__name__}.")
+
+
+def _two_player_payoffs(game: TwoPlayerStrategicFormGame) -> Tuple[BlockArray, ...]:
+    # read from the shared storage, so saving a subgame view never gathers its full payoff matrices
+    if game._view_indexes is None:
+        return game._payoff_storage
+    rows, cols = game._view_indexes
+    return tuple(_PayoffView(matrix, rows, cols) for matrix in game._payoff_storage)
+
+
+def _player_blocks(blocks: Dict[str, BlockArrays]) -> Dict[str, BlockArray]:
+    player_blocks = {}
+    for name, arrays in blocks.items():
+        if isinstance(arrays, tuple):
+            player_blocks.update((f"{name}[{player}]", array) for player, array in enumerate(arrays))
+        else:
+            player_blocks[name] = arrays
+    return player_blocks
+
+
+def _player_arrays(blocks: Dict[str, np.ndarray], name: str) -> Tuple[np.ndarray, ...]:
+    # the per player blocks "name[player]" saved for a tuple
+    arrays = []
+    while f"{name}[{len(arrays)}]" in blocks:
+        arrays.append(blocks[f"{name}[{len(arrays)}]"])
+    return tuple(arrays)
+
+
+def _two_player_class(class_name: str) -> type:
+    if class_name == "PrintableTwoPlayerStrategicFormGame":
+        from lib.printable_strategic_form_game import PrintableTwoPlayerStrategicFormGame
+        return PrintableTwoPlayerStrategicFormGame
+    return TwoPlayerStrategicFormGame
+
+
+def _align(offset: int) -> int:
+    return -(-offset // BLOCK_ALIGNMENT) * BLOCK_ALIGNMENT
+
+
+def _write_block(file, array: BlockArray):
+    # copies at most WRITE_CHUNK_SIZE bytes at a time, so subgame views are never materialized
+    row_count, row_size = array.shape[0], int(np.prod(array.shape[1:]))
+    rows = array if isinstance(array, _PayoffView) else array.reshape(row_count, row_size)
+    chunk = max(1, WRITE_CHUNK_SIZE // max(1, array.dtype.itemsize * row_size))
+    for start in range(0, row_count, chunk):
+        file.write(np.ascontiguousarray(rows[start:start + chunk]).data)
+
+
+def _read_header(path: str) -> Tuple[dict, int]:
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a saved game.")
+        (header_length,) = _HEADER_LENGTH.unpack(file.read(_HEADER_LENGTH.size))
+        header = json.loads(file.read(header_length).decode("utf-8"))
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported game file version {header.get('version')} in {path}.")
+    return header, _align(len(MAGIC) + _HEADER_LENGTH.size + header_length)
+
+
+def _load_block(path: str, data_start: int, block: dict, mmap: bool) -> np.ndarray:
+    dtype = np.dtype(block["dtype"])
+    shape = tuple(block["shape"])
+    count = int(np.prod(shape))
+    offset = data_start + block["offset"]
+    if count == 0:
+        return np.empty(shape, dtype=dtype)
+    if mmap:
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape)
+    return np.fromfile(path, dtype=dtype, count=count, offset=offset).reshape(shape)
@@ -0,0 +1,130 @@
+"""
+Opt-in operation counters and phase timings of the solvers in `lib`.
+
+    with instrument() as report:
+        game.eliminate_dominated_strategies()
+    print(report.counters[ELIMINATION_ROUNDS], report.phases["iterated_elimination"].seconds)
+
+Solvers call `count` at their lookups and wrap their phases in `with phase(...)` or
+`@timed_phase(...)`. While no `instrument` block is active these return after one truthiness
+check of a module list, so the hooks cost close to nothing when instrumentation is disabled.
+Nested `instrument` blocks all receive the events, and phases started inside another phase are
+reported as "outer/inner".
+"""
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Callable, Dict, List, NamedTuple
+
+# Counter names used across lib
+PAYOFF_LOOKUPS = "payoff_lookups"
+STRATEGY_INDEX_LOOKUPS = "strategy_index_lookups"
+COALITION_LOOKUPS = "coalition_lookups"
+COALITION_EVALUATIONS = "coalition_evaluations"
+SUBGAMES_BUILT = "subgames_built"
+ELIMINATION_ROUNDS = "elimination_rounds"
+SIMPLEX_PIVOTS = "simplex_pivots"
+
+# callback(kind, name, value): ("count", counter name, amount) or ("phase", phase path, seconds)
+InstrumentationCallback = Callable[[str, str, float], None]
+
+
+class PhaseTiming(NamedTuple):
+    """How often a phase ran and the wall-clock seconds spent in it over all runs."""
+    calls: int
+    seconds: float
+
+
+class InstrumentationReport:
+    """Counters and phase timings collected by one `instrument` block."""
+
+    def __init__(self, callback: InstrumentationCallback = None):
+        self.callback = callback
+        self.counters: Dict[str, int] = {}
+        self.phases: Dict[str, PhaseTiming] = {}
+
+    def add_count(self, name: str, amount: int):
+        self.counters[name] = self.counters.get(name, 0) + amount
+        if self.callback is not None:
+            self.callback("count", name, amount)
+
+    def add_phase(self, path: str, seconds: float):
+        calls, total = self.phases.get(path, (0, 0.0))
+        self.phases[path] = PhaseTiming(calls + 1, total + seconds)
+        if self.callback is not None:
+            self.callback("phase", path, seconds)
+
+    def as_dict(self) -> dict:
+        """JSON-serializable report: {"counters": {name: count}, "phases": {path: {"calls", "seconds"}}}."""
+        return {"counters": dict(self.counters),
+                "phases": {path: timing._asdict() for path, timing in self.phases.items()}}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(counters={self.counters!r}, phases={self.phases!r})"
+
+
+_active_reports: List[InstrumentationReport] = []
+_phase_stack: List[str] = []
+_DISABLED_PHASE = nullcontext()
+
+
+@contextmanager
+def instrument(callback: InstrumentationCallback = None):
+    """
+    Collect counters and phase timings of everything run inside the block.
+
+    :param callback: Called for every event as it happens, see `InstrumentationCallback`.
+    :return: The `InstrumentationReport` filled while the block runs.
+    """
+    report = InstrumentationReport(callback)
+    _active_reports.append(report)
+    try:
+        yield report
+    finally:
+        _active_reports.remove(report)
+
+
+def is_enabled() -> bool:
+    return bool(_active_reports)
+
+
+def count(name: str, amount: int = 1):
+    """Add `amount` to the counter `name` of every active report."""
+    if not _active_reports:
+        return
+    for report in _active_reports:
+        report.add_count(name, int(amount))
+
+
+def phase(name: str):
+    """Context manager timing the enclosed code as phase `name` of every active report."""
+    if not _active_reports:
+        return _DISABLED_PHASE
+    return _timed_phase(name)
+
+
+def timed_phase(name: str):
+    """Decorator timing every call of the function as phase `name`, see `phase`."""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _active_reports:
+                return function(*args, **kwargs)
+            with _timed_phase(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def _timed_phase(name: str):
+    path = f"{_phase_stack[-1]}/{name}" if _phase_stack else name
+    _phase_stack.append(path)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        _phase_stack.pop()
+        for report in list(_active_reports):
+            report.add_phase(path, seconds)
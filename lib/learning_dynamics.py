@@ -0,0 +1,268 @@
+"""
+Learning dynamics approximating equilibria of two-player games too large for the exact solvers.
+
+Every method runs a batch of independent seeds at once: the strategies of all seeds are the
+rows of one matrix, so an iteration is a pair of matrix products with the payoff matrices.
+Runs stop per seed once the exploitability of its average strategies drops below the
+tolerance, and the returned `LearningState` can be saved and passed back to resume.
+
+    fictitious_play          best response to the opponent's empirical average
+    regret_matching          play in proportion to positive cumulative regrets (plus=True: CFR+ style)
+    multiplicative_weights   exponential weights (Hedge) on cumulative utilities
+    replicator_dynamics      discrete-time replicator equation
+
+Utilities are divided by the payoff range of each player, so step sizes and the behaviour
+do not depend on the payoff scale; exploitabilities are reported in payoff units.
+"""
+from typing import Callable, List, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+
+from lib.instrumentation import timed_phase
+
+MixedStrategy = List[List[float]]
+Seeds = Union[int, Sequence[int]]
+
+METHODS = ("fictitious_play", "regret_matching", "multiplicative_weights", "replicator_dynamics")
+
+
+class LearningState(NamedTuple):
+    """
+    A run of one method over a batch of seeds, after `iteration` iterations.
+
+    strategies are the strategies played in the last iteration and strategy_sums the weighted
+    sums of all strategies played, one row per seed for each player. accumulated holds the
+    regrets (regret matching) or the logits (multiplicative weights). exploitability and
+    converged are measured on the average strategies at the last check.
+    """
+    method: str
+    iteration: int
+    seeds: np.ndarray
+    strategies: Tuple[np.ndarray, np.ndarray]
+    strategy_sums: Tuple[np.ndarray, np.ndarray]
+    accumulated: Tuple[np.ndarray, np.ndarray]
+    exploitability: np.ndarray
+    converged: np.ndarray
+
+    def average_strategies(self, seed_index: int = 0) -> MixedStrategy:
+        """Average strategies of one seed, as [[player1 probabilities], [player2 probabilities]]."""
+        return [(sums[seed_index] / sums[seed_index].sum()).tolist() for sums in self.strategy_sums]
+
+    def current_strategies(self, seed_index: int = 0) -> MixedStrategy:
+        """Strategies played in the last iteration by one seed."""
+        return [strategies[seed_index].tolist() for strategies in self.strategies]
+
+
+def fictitious_play(game, **kwargs) -> LearningState:
+    """Simultaneous fictitious play, see `run_learning_dynamics` for the arguments."""
+    return run_learning_dynamics(game, "fictitious_play", **kwargs)
+
+
+def regret_matching(game, plus: bool = False, **kwargs) -> LearningState:
+    """
+    Regret matching; with `plus` negative regrets are reset to zero every iteration, the
+    players update in turn and later iterations weigh more in the average (regret matching+,
+    as in CFR+).
+    See `run_learning_dynamics` for the other arguments.
+    """
+    return run_learning_dynamics(game, "regret_matching_plus" if plus else "regret_matching", **kwargs)
+
+
+def multiplicative_weights(game, **kwargs) -> LearningState:
+    """Multiplicative weights, `step_size` is the learning rate. See `run_learning_dynamics`."""
+    return run_learning_dynamics(game, "multiplicative_weights", **kwargs)
+
+
+def replicator_dynamics(game, **kwargs) -> LearningState:
+    """Replicator dynamics, `step_size` is the time step. See `run_learning_dynamics`."""
+    return run_learning_dynamics(game, "replicator_dynamics", **kwargs)
+
+
+@timed_phase("run_learning_dynamics")
+def run_learning_dynamics(game, method: str, iterations: int = 10000, tolerance: float = 1e-3, seeds: Seeds = 1,
+                          step_size: float = 0.1, check_every: int = 100, state: LearningState = None,
+                          checkpoint: Callable[[LearningState], None] = None, checkpoint_every: int = None) -> LearningState:
+    """
+    Run a learning method until every seed is within `tolerance` or `iterations` are done.
+
+    :param game: A `TwoPlayerStrategicFormGame`.
+    :param method: One of METHODS, or "regret_matching_plus".
+    :param iterations: Total iterations, including those of a resumed `state`.
+    :param tolerance: A seed stops once the exploitability of its average strategies is at most this.
+    :param seeds: Number of seeds (0..seeds-1) or the seeds themselves, every seed starts from
+        its own random interior mixed strategies.
+    :param step_size: Learning rate of multiplicative weights and time step of the replicator dynamics.
+    :param check_every: Iterations between exploitability checks.
+    :param state: A previous state of the same method to resume, its seeds are kept.
+    :param checkpoint: Called with the current state every `checkpoint_every` iterations and at the end.
+    :param checkpoint_every: Iterations between checkpoints, None only checkpoints at the end.
+    """
+    payoffs = [np.asarray(game._player_payoff_matrix(player_index), dtype=float) for player_index in game.players]
+    if any(matrix.size == 0 for matrix in payoffs):
+        raise ValueError("Cannot run learning dynamics on a game without strategies.")
+    # player p's utility of every own strategy is opponent_mix @ scaled[p].T
+    scaled = [matrix / _spread(matrix) for matrix in payoffs]
+
+    if state is None:
+        state = _initial_state(method, payoffs[0].shape, seeds)
+    elif state.method != method:
+        raise ValueError(f"Cannot resume a {state.method} run with {method}.")
+    update = _UPDATES[state.method]
+
+    strategies = [array.copy() for array in state.strategies]
+    strategy_sums = [array.copy() for array in state.strategy_sums]
+    accumulated = [array.copy() for array in state.accumulated]
+    exploitability = state.exploitability.copy()
+    converged = state.converged.copy()
+    iteration = state.iteration
+
+    def current_state():
+        # copies, the arrays of the run keep changing after a checkpoint
+        return LearningState(state.method, iteration, state.seeds, tuple(array.copy() for array in strategies),
+                             tuple(array.copy() for array in strategy_sums), tuple(array.copy() for array in accumulated),
+                             exploitability.copy(), converged.copy())
+
+    while iteration < iterations and not converged.all():
+        active = np.flatnonzero(~converged)
+        # only the seeds still running are updated, finished ones keep their final state
+        batch = [array[active] for array in strategies]
+        batch_sums = [array[active] for array in strategy_sums]
+        batch_accumulated = [array[active] for array in accumulated]
+        stop = min(iterations, (iteration // check_every + 1) * check_every)
+        if checkpoint is not None and checkpoint_every is not None:
+            stop = min(stop, (iteration // checkpoint_every + 1) * checkpoint_every)
+
+        for step in range(iteration + 1, stop + 1):
+            update(scaled, batch, batch_sums, batch_accumulated, step, step_size)
+
+        for player_index in game.players:
+            strategies[player_index][active] = batch[player_index]
+            strategy_sums[player_index][active] = batch_sums[player_index]
+            accumulated[player_index][active] = batch_accumulated[player_index]
+        iteration = stop
+
+        if iteration % check_every == 0 or iteration == iterations:
+            averages = [sums[active] / sums[active].sum(axis=1, keepdims=True) for sums in strategy_sums]
+            exploitability[active] = game.exploitabilities(*averages)
+            converged[active] = exploitability[active] <= tolerance
+        if checkpoint is not None and checkpoint_every is not None and iteration % checkpoint_every == 0:
+            checkpoint(current_state())
+
+    final_state = current_state()
+    if checkpoint is not None:
+        checkpoint(final_state)
+    return final_state
+
+
+def save_learning_state(state: LearningState, path: str):
+    """Write a `LearningState` to `path` (numpy .npz) for resuming a run later."""
+    np.savez(path, method=state.method, iteration=state.iteration, seeds=state.seeds,
+             strategies_0=state.strategies[0], strategies_1=state.strategies[1],
+             strategy_sums_0=state.strategy_sums[0], strategy_sums_1=state.strategy_sums[1],
+             accumulated_0=state.accumulated[0], accumulated_1=state.accumulated[1],
+             exploitability=state.exploitability, converged=state.converged)
+
+
+def load_learning_state(path: str) -> LearningState:
+    """Read a state written by `save_learning_state`."""
+    with np.load(path) as data:
+        return LearningState(str(data["method"]), int(data["iteration"]), data["seeds"],
+                             (data["strategies_0"], data["strategies_1"]),
+                             (data["strategy_sums_0"], data["strategy_sums_1"]),
+                             (data["accumulated_0"], data["accumulated_1"]),
+                             data["exploitability"], data["converged"])
+
+
+def _spread(payoffs: np.ndarray) -> float:
+    spread = float(payoffs.max() - payoffs.min())
+    return spread if spread > 0 else 1.0
+
+
+def _initial_state(method: str, shape: Tuple[int, int], seeds: Seeds) -> LearningState:
+    if method not in _UPDATES:
+        raise ValueError(f"Unknown learning method {method}, expected one of {list(METHODS) + ['regret_matching_plus']}.")
+    seeds = np.arange(seeds) if np.isscalar(seeds) else np.asarray(seeds)
+
+    strategies = []
+    for strategy_count in shape:
+        mixes = np.empty((len(seeds), strategy_count))
+        for row, seed in enumerate(seeds.tolist()):
+            # Dirichlet(1) draws are uniform over the simplex and strictly interior
+            mixes[row] = np.random.default_rng(seed).dirichlet(np.ones(strategy_count))
+        strategies.append(mixes)
+
+    if method == "multiplicative_weights":
+        accumulated = [np.log(mixes) for mixes in strategies]
+    else:
+        accumulated = [np.zeros_like(mixes) for mixes in strategies]
+    return LearningState(method, 0, seeds, tuple(strategies), tuple(mixes.copy() for mixes in strategies),
+                         tuple(accumulated), np.full(len(seeds), np.inf), np.zeros(len(seeds), dtype=bool))
+
+
+def _pure_utilities(scaled: List[np.ndarray], strategies: List[np.ndarray]) -> List[np.ndarray]:
+    # utilities[p][s, k]: seed s, own strategy k of player p against the opponent's current mix
+    return [strategies[1] @ scaled[0].T, strategies[0] @ scaled[1].T]
+
+
+def _fictitious_play(scaled, strategies, strategy_sums, accumulated, step, step_size):
+    averages = [sums / sums.sum(axis=1, keepdims=True) for sums in strategy_sums]
+    for player_index, utilities in enumerate(_pure_utilities(scaled, averages)):
+        best_responses = np.zeros_like(utilities)
+        best_responses[np.arange(len(utilities)), utilities.argmax(axis=1)] = 1.0
+        strategies[player_index][...] = best_responses
+        strategy_sums[player_index] += best_responses
+
+
+def _regret_matching(scaled, strategies, strategy_sums, accumulated, step, step_size):
+    for player_index, utilities in enumerate(_pure_utilities(scaled, strategies)):
+        accumulated[player_index] += utilities - np.einsum('ij,ij->i', utilities, strategies[player_index])[:, None]
+    for player_index in (0, 1):
+        strategies[player_index][...] = _positive_regret_mix(accumulated[player_index])
+        strategy_sums[player_index] += strategies[player_index]
+
+
+def _regret_matching_plus(scaled, strategies, strategy_sums, accumulated, step, step_size):
+    # players update in turn, player 2 already answers player 1's new strategy, as in CFR+
+    for player_index in (0, 1):
+        opponent_mixes = strategies[1 - player_index]
+        utilities = opponent_mixes @ scaled[player_index].T
+        regrets = accumulated[player_index]
+        regrets += utilities - np.einsum('ij,ij->i', utilities, strategies[player_index])[:, None]
+        np.maximum(regrets, 0.0, out=regrets)
+        strategies[player_index][...] = _positive_regret_mix(regrets)
+        strategy_sums[player_index] += step * strategies[player_index]
+
+
+def _positive_regret_mix(regrets: np.ndarray) -> np.ndarray:
+    """Mix proportional to the positive regrets, uniform where no regret is positive."""
+    positive = np.maximum(regrets, 0.0)
+    totals = positive.sum(axis=1, keepdims=True)
+    return np.where(totals > 0, positive / np.where(totals > 0, totals, 1.0), 1.0 / positive.shape[1])
+
+
+def _multiplicative_weights(scaled, strategies, strategy_sums, accumulated, step, step_size):
+    for player_index, utilities in enumerate(_pure_utilities(scaled, strategies)):
+        accumulated[player_index] += step_size * utilities
+    for player_index in (0, 1):
+        logits = accumulated[player_index] - accumulated[player_index].max(axis=1, keepdims=True)
+        weights = np.exp(logits)
+        strategies[player_index][...] = weights / weights.sum(axis=1, keepdims=True)
+        strategy_sums[player_index] += strategies[player_index]
+
+
+def _replicator_dynamics(scaled, strategies, strategy_sums, accumulated, step, step_size):
+    # utilities span at most 1 after scaling, so a step below 1 keeps every probability positive
+    for player_index, utilities in enumerate(_pure_utilities(scaled, strategies)):
+        mixes = strategies[player_index]
+        average_utility = np.einsum('ij,ij->i', utilities, mixes)[:, None]
+        mixes *= 1.0 + step_size * (utilities - average_utility)
+        mixes /= mixes.sum(axis=1, keepdims=True)
+    for player_index in (0, 1):
+        strategy_sums[player_index] += strategies[player_index]
+
+
+_UPDATES = {"fictitious_play": _fictitious_play,
+            "regret_matching": _regret_matching,
+            "regret_matching_plus": _regret_matching_plus,
+            "multiplicative_weights": _multiplicative_weights,
+            "replicator_dynamics": _replicator_dynamics}
@@ -0,0 +1,243 @@
+"""
+Dense simplex solver for small and medium linear programs.
+
+    maximize    c @ x
+    subject to  A_ub @ x <= b_ub
+                A_eq @ x == b_eq
+                x >= 0
+
+Every equality row is kept as a pair of inequalities, so all rows have a slack variable and
+the all-slack basis is always available. A previous optimal basis can be passed back in to
+re-solve a modified program: after small edits the old basis is usually optimal or a few
+pivots away. Primal infeasibility of the start basis is repaired with the dual simplex when
+the basis is still dual feasible and with a single-artificial phase one otherwise.
+"""
+from typing import NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from lib.instrumentation import SIMPLEX_PIVOTS, count, timed_phase
+
+# Consecutive degenerate pivots after which variables are chosen by Bland's rule
+BLAND_AFTER_DEGENERATE_PIVOTS = 50
+
+
+class LinearProgramResult(NamedTuple):
+    """
+    Outcome of `solve_linear_program`.
+
+    status is "optimal", "infeasible", "unbounded" or "iteration_limit". duals hold one value
+    per A_ub row followed by one per A_eq row. basis lists the basic variables by index: the
+    x variables first, then the slacks of the A_ub rows, of the A_eq rows and of the negated
+    A_eq rows. Pass it back as `basis` to warm-start a related program.
+    """
+    status: str
+    x: np.ndarray
+    objective: float
+    duals: np.ndarray
+    basis: Tuple[int, ...]
+    iterations: int
+
+
+@timed_phase("solve_linear_program")
+def solve_linear_program(c, A_ub=None, b_ub=None, A_eq=None, b_eq=None, basis: Sequence[int] = None,
+                         max_iterations: int = None, tolerance: float = 1e-9) -> LinearProgramResult:
+    """
+    Maximize `c @ x` over x >= 0 with the simplex method.
+
+    :param c: Objective coefficients, one per variable.
+    :param A_ub: Inequality constraint matrix, rows of A_ub @ x <= b_ub.
+    :param b_ub: Inequality right-hand sides.
+    :param A_eq: Equality constraint matrix, rows of A_eq @ x == b_eq.
+    :param b_eq: Equality right-hand sides.
+    :param basis: Basic variables of a previous result to start from. Unknown, duplicate or
+        linearly dependent entries are dropped and the basis is completed with slacks.
+    :param max_iterations: Give up after this many pivots, None allows 50 * (rows + variables).
+    :param tolerance: Values within this distance of zero are treated as zero.
+    """
+    c = np.asarray(c, dtype=float).ravel()
+    variable_count = len(c)
+    A_ub, b_ub = _constraint_block(A_ub, b_ub, variable_count)
+    A_eq, b_eq = _constraint_block(A_eq, b_eq, variable_count)
+
+    tableau = _SimplexTableau(np.vstack([A_ub, A_eq, -A_eq]), np.concatenate([b_ub, b_eq, -b_eq]), tolerance)
+    if basis is not None:
+        tableau.load_basis(basis)
+    if max_iterations is None:
+        max_iterations = 50 * (tableau.row_count + variable_count)
+
+    status = tableau.solve(np.concatenate([c, np.zeros(tableau.row_count)]), max_iterations)
+
+    values = tableau.values()
+    x = values[:variable_count]
+    # the dual of a row is minus the reduced cost of its slack, an equality has two opposite rows
+    slack_duals = -tableau.costs[variable_count:variable_count + tableau.row_count]
+    inequality_count, equality_count = len(b_ub), len(b_eq)
+    duals = np.concatenate([slack_duals[:inequality_count],
+                            slack_duals[inequality_count:inequality_count + equality_count]
+                            - slack_duals[inequality_count + equality_count:]])
+    return LinearProgramResult(status, x, float(c @ x), duals, tuple(tableau.basis), tableau.iterations)
+
+
+def _constraint_block(matrix, rhs, variable_count: int) -> Tuple[np.ndarray, np.ndarray]:
+    if matrix is None:
+        return np.zeros((0, variable_count)), np.zeros(0)
+    matrix = np.asarray(matrix, dtype=float).reshape(-1, variable_count)
+    rhs = np.asarray(rhs, dtype=float).ravel()
+    if len(rhs) != len(matrix):
+        raise ValueError(f"Expected {len(matrix)} right-hand sides, got {len(rhs)}.")
+    return matrix, rhs
+
+
+class _SimplexTableau:
+    """
+    Tableau B^-1 [A | I | artificial | b] of the rows A x + s = b, with the reduced costs kept
+    as an extra row. Columns are the variables, then one slack per row, then the artificial
+    variable of phase one; the last column holds the values of the basic variables.
+    """
+
+    def __init__(self, constraints: np.ndarray, rhs: np.ndarray, tolerance: float):
+        self.row_count, self.variable_count = constraints.shape
+        self.column_count = self.variable_count + self.row_count
+        self.artificial = self.column_count
+        self.original = np.hstack([constraints, np.eye(self.row_count), np.zeros((self.row_count, 1)), rhs[:, None]])
+        self.matrix = self.original.copy()
+        self.basis = list(range(self.variable_count, self.column_count))
+        self.costs = np.zeros(self.column_count + 2)
+        self.tolerance = tolerance
+        self.iterations = 0
+        self.max_iterations = 0
+
+    def load_basis(self, basis: Sequence[int]):
+        """Start from `basis`: factorized at once when it is a valid basis, otherwise pivoted in column by column."""
+        requested = list(dict.fromkeys(int(column) for column in basis if 0 <= int(column) < self.column_count))
+        if len(requested) == self.row_count:
+            try:
+                matrix = np.linalg.solve(self.original[:, requested], self.original)
+            except np.linalg.LinAlgError:
+                matrix = None
+            if matrix is not None and np.allclose(matrix[:, requested], np.eye(self.row_count), atol=1e-7):
+                self.matrix = matrix
+                self.basis = requested
+                return
+
+        # crash: pivot the requested columns into rows still held by slacks that were not requested
+        kept = set(requested)
+        for column in requested:
+            if column in self.basis:
+                continue
+            free_rows = [row for row, basic in enumerate(self.basis) if basic >= self.variable_count and basic not in kept]
+            if not free_rows:
+                break
+            entries = np.abs(self.matrix[free_rows, column])
+            best = int(np.argmax(entries))
+            if entries[best] > 1e-7:
+                self._pivot(free_rows[best], column)
+
+    def solve(self, costs: np.ndarray, max_iterations: int) -> str:
+        self.max_iterations = max_iterations
+        self._set_costs(costs)
+        if self._rhs().min(initial=0.0) < -self.tolerance:
+            if self.costs[:self.column_count].max() <= self.tolerance:
+                status = self._dual_simplex()
+                if status != "optimal":
+                    return status
+            else:
+                status = self._phase_one()
+                if status != "optimal":
+                    return status
+                self._set_costs(costs)
+        return self._primal_simplex()
+
+    def values(self) -> np.ndarray:
+        values = np.zeros(self.column_count + 1)
+        values[self.basis] = np.clip(self._rhs(), 0.0, None)
+        return values[:self.column_count]
+
+    def _rhs(self) -> np.ndarray:
+        return self.matrix[:, -1]
+
+    def _set_costs(self, costs: np.ndarray):
+        # reduced costs c - c_B B^-1 [A | b], the last entry is minus the objective value
+        full_costs = np.zeros(self.column_count + 2)
+        full_costs[:len(costs)] = costs
+        self.costs = full_costs - full_costs[self.basis] @ self.matrix
+
+    def _pivot(self, row: int, column: int):
+        count(SIMPLEX_PIVOTS)
+        pivot_row = self.matrix[row] / self.matrix[row, column]
+        self.matrix -= np.outer(self.matrix[:, column], pivot_row)
+        self.matrix[row] = pivot_row
+        self.costs -= self.costs[column] * pivot_row
+        self.basis[row] = column
+        self.iterations += 1
+
+    def _primal_simplex(self, allow_artificial: bool = False) -> str:
+        """Pivot to optimality from a primal feasible basis, Dantzig's rule with a fallback to Bland's."""
+        column_limit = self.column_count + 1 if allow_artificial else self.column_count
+        degenerate_pivots = 0
+        while True:
+            reduced_costs = self.costs[:column_limit]
+            bland = degenerate_pivots >= BLAND_AFTER_DEGENERATE_PIVOTS
+            if bland:
+                improving = np.flatnonzero(reduced_costs > self.tolerance)
+                if len(improving) == 0:
+                    return "optimal"
+                column = int(improving[0])
+            else:
+                column = int(np.argmax(reduced_costs))
+                if reduced_costs[column] <= self.tolerance:
+                    return "optimal"
+            if self.iterations >= self.max_iterations:
+                return "iteration_limit"
+
+            entries = self.matrix[:, column]
+            candidates = np.flatnonzero(entries > self.tolerance)
+            if len(candidates) == 0:
+                return "unbounded"
+            ratios = self._rhs()[candidates] / entries[candidates]
+            tied = candidates[ratios <= ratios.min() + self.tolerance]
+            if bland:
+                row = int(tied[np.argmin(np.asarray(self.basis)[tied])])
+            else:
+                row = int(tied[np.argmax(entries[tied])])
+
+            degenerate_pivots = degenerate_pivots + 1 if ratios.min() <= self.tolerance else 0
+            self._pivot(row, column)
+
+    def _dual_simplex(self) -> str:
+        """Pivot to primal feasibility from a dual feasible basis, keeping it dual feasible."""
+        while True:
+            rhs = self._rhs()
+            row = int(np.argmin(rhs))
+            if rhs[row] >= -self.tolerance:
+                return "optimal"
+            if self.iterations >= self.max_iterations:
+                return "iteration_limit"
+
+            entries = self.matrix[row, :self.column_count]
+            candidates = np.flatnonzero(entries < -self.tolerance)
+            if len(candidates) == 0:
+                return "infeasible"
+            ratios = self.costs[candidates] / entries[candidates]
+            tied = candidates[ratios <= ratios.min() + self.tolerance]
+            self._pivot(row, int(tied[np.argmin(entries[tied])]))
+
+    def _phase_one(self) -> str:
+        """Maximize -a over the rows x_B - a = b, which one pivot on the most negative row makes feasible."""
+        self.matrix[:, self.artificial] = -1.0
+        self._set_costs(np.eye(1, self.column_count + 1, self.artificial).ravel() * -1.0)
+        self._pivot(int(np.argmin(self._rhs())), self.artificial)
+        status = self._primal_simplex(allow_artificial=True)
+        if status != "optimal":
+            return status
+        if -self.costs[-1] < -self.tolerance * max(1.0, np.abs(self._rhs()).max()):
+            return "infeasible"
+
+        if self.artificial in self.basis:
+            # degenerate: the artificial is basic at zero, swap it for any other column of its row
+            row = self.basis.index(self.artificial)
+            column = int(np.argmax(np.abs(self.matrix[row, :self.column_count])))
+            self._pivot(row, column)
+        self.matrix[:, self.artificial] = 0.0
+        return "optimal"
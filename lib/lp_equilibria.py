@@ -0,0 +1,174 @@
+"""
+Linear programming solutions of two-player games: maximin strategies, values of zero-sum
+games and correlated equilibria, all solved with `lib.linear_programming`.
+
+Every solution carries the optimal basis keyed by strategy names, so passing it back as
+`warm_start` re-solves an edited game (changed payoffs, removed or added strategies) from
+where the previous solve ended instead of from scratch.
+"""
+from typing import Hashable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from lib.linear_programming import solve_linear_program
+
+MixedStrategy = List[List[float]]
+BasisLabels = Tuple[Hashable, ...]
+
+
+class MaximinSolution(NamedTuple):
+    """
+    The strategy guaranteeing a player the highest expected payoff whatever the opponent does.
+
+    value is that guaranteed payoff and opponent_strategy the opponent's mix holding the
+    player down to it.
+    """
+    value: float
+    strategy: List[float]
+    opponent_strategy: List[float]
+    basis: BasisLabels
+
+
+class ZeroSumSolution(NamedTuple):
+    """Value of the game for player 1 and the optimal strategies as [[player1 probabilities], [player2 probabilities]]."""
+    value: float
+    strategies: MixedStrategy
+    basis: BasisLabels
+
+
+class CorrelatedEquilibrium(NamedTuple):
+    """Probability of every profile (rows x cols) and the expected utility of both players under it."""
+    distribution: np.ndarray
+    expected_utility: List[float]
+    basis: BasisLabels
+
+
+def maximin_strategy(game, player_index: int, warm_start=None) -> MaximinSolution:
+    """
+    The maximin strategy of `player_index` against every possible opponent behaviour.
+
+    :param game: A `TwoPlayerStrategicFormGame`.
+    :param player_index: 0 for player 1 (rows), 1 for player 2 (columns).
+    :param warm_start: A previous `MaximinSolution` of the same player to start from.
+    """
+    payoffs = np.asarray(game._player_payoff_matrix(player_index), dtype=float)
+    strategies = game._strategies[player_index]
+    opponent_strategies = game._strategies[game._get_opponent(player_index)]
+    value, strategy, opponent_strategy, basis = _solve_matrix_game(payoffs, strategies, opponent_strategies, warm_start)
+    return MaximinSolution(value, strategy, opponent_strategy, basis)
+
+
+def zero_sum_solution(game, warm_start=None) -> ZeroSumSolution:
+    """
+    Value and optimal strategies of a zero-sum (or constant-sum) game.
+
+    Only player 1's payoffs are read: the result is player 1's maximin strategy and player 2's
+    minimax strategy against it, the Nash equilibrium when the game is constant-sum.
+
+    :param game: A `TwoPlayerStrategicFormGame`.
+    :param warm_start: A previous `ZeroSumSolution` to start from.
+    """
+    payoffs = np.asarray(game._player_payoff_matrix(game.first_player), dtype=float)
+    value, first_player_strategy, second_player_strategy, basis = _solve_matrix_game(
+        payoffs, game._strategies[game.first_player], game._strategies[game.second_player], warm_start)
+    return ZeroSumSolution(value, [first_player_strategy, second_player_strategy], basis)
+
+
+def correlated_equilibrium(game, objective=None, warm_start=None) -> CorrelatedEquilibrium:
+    """
+    Correlated equilibrium maximizing a linear objective over the profile distribution.
+
+    A distribution is a correlated equilibrium when no player gains by deviating from a
+    recommended strategy to another one: for every pair of own strategies (s, t) the expected
+    payoff of following s is at least that of playing t instead, conditioned on s.
+
+    :param game: A `TwoPlayerStrategicFormGame`.
+    :param objective: rows x cols weight of every profile, the sum of both payoffs (social
+        welfare) by default.
+    :param warm_start: A previous `CorrelatedEquilibrium` to start from.
+    """
+    first_player_payoffs, second_player_payoffs = (np.asarray(payoffs, dtype=float) for payoffs in game._payoff_matrices)
+    rows, cols = first_player_payoffs.shape
+    if rows == 0 or cols == 0:
+        raise ValueError("Cannot solve a game without strategies.")
+    if objective is None:
+        objective = first_player_payoffs + second_player_payoffs
+    objective = np.asarray(objective, dtype=float)
+    if objective.shape != (rows, cols):
+        raise ValueError(f"Expected a {rows} x {cols} objective, got shape {objective.shape}.")
+
+    # scaling every player's incentive constraints and the objective keeps the tableau well conditioned
+    constraints = np.vstack([_incentive_constraints(first_player_payoffs / _spread(first_player_payoffs)),
+                             _incentive_constraints(second_player_payoffs.T / _spread(second_player_payoffs)).reshape(-1, cols, rows)
+                             .transpose(0, 2, 1).reshape(-1, rows * cols)])
+    first_player_strategies = game._strategies[game.first_player]
+    second_player_strategies = game._strategies[game.second_player]
+    labels = ([("profile", first, second) for first in first_player_strategies for second in second_player_strategies]
+              + [("first_player", strategy, deviation) for strategy, deviation in _deviations(first_player_strategies)]
+              + [("second_player", strategy, deviation) for strategy, deviation in _deviations(second_player_strategies)]
+              + [("total", "upper"), ("total", "lower")])
+
+    result = solve_linear_program(objective.ravel() / _spread(objective), constraints, np.zeros(len(constraints)),
+                                  np.ones((1, rows * cols)), [1.0], basis=_warm_basis(warm_start, labels))
+    _check_status(result.status)
+    distribution = np.clip(result.x, 0.0, None).reshape(rows, cols)
+    distribution /= distribution.sum()
+    return CorrelatedEquilibrium(distribution,
+                                 [float((distribution * first_player_payoffs).sum()), float((distribution * second_player_payoffs).sum())],
+                                 tuple(labels[variable] for variable in result.basis))
+
+
+def _solve_matrix_game(payoffs: np.ndarray, strategies: List[str], opponent_strategies: List[str],
+                       warm_start) -> Tuple[float, List[float], List[float], BasisLabels]:
+    """Row player maximin of `payoffs` and the column player's minimax strategy."""
+    rows, cols = payoffs.shape
+    if rows == 0 or cols == 0:
+        raise ValueError("Cannot solve a game without strategies.")
+
+    # with payoffs mapped into [1, 2], maximize sum(y) s.t. payoffs @ y <= 1, y >= 0: the column
+    # player plays y / sum(y), the row player the normalized duals, and the value is 1 / sum(y)
+    lowest, spread = payoffs.min(), _spread(payoffs)
+    scaled = (payoffs - lowest) / spread + 1.0
+    labels = ([("opponent", strategy) for strategy in opponent_strategies]
+              + [("own", strategy) for strategy in strategies])
+
+    result = solve_linear_program(np.ones(cols), scaled, np.ones(rows), basis=_warm_basis(warm_start, labels))
+    _check_status(result.status)
+    total = result.x.sum()
+    strategy = np.clip(result.duals, 0.0, None)
+    value = (1.0 / total - 1.0) * spread + lowest
+    return (float(value), (strategy / strategy.sum()).tolist(), (result.x / total).tolist(),
+            tuple(labels[variable] for variable in result.basis))
+
+
+def _incentive_constraints(payoffs: np.ndarray) -> np.ndarray:
+    """
+    Rows sum_j p[s, j] * (payoffs[t, j] - payoffs[s, j]) <= 0 for every strategy pair s != t of
+    the row player, over the row-major flattened distribution p.
+    """
+    rows, cols = payoffs.shape
+    constraints = np.zeros((rows, rows, rows * cols))
+    for strategy in range(rows):
+        constraints[strategy, :, strategy * cols:(strategy + 1) * cols] = payoffs - payoffs[strategy]
+    return constraints[~np.eye(rows, dtype=bool)]
+
+
+def _deviations(strategies: List[str]):
+    return [(strategy, deviation) for strategy in strategies for deviation in strategies if deviation != strategy]
+
+
+def _spread(payoffs: np.ndarray) -> float:
+    spread = float(payoffs.max() - payoffs.min()) if payoffs.size else 0.0
+    return spread if spread > 0 else 1.0
+
+
+def _warm_basis(warm_start, labels: List[Hashable]) -> Optional[List[int]]:
+    if warm_start is None:
+        return None
+    indexes = {label: index for index, label in enumerate(labels)}
+    return [indexes[label] for label in warm_start.basis if label in indexes]
+
+
+def _check_status(status: str):
+    if status != "optimal":
+        raise ValueError(f"Linear program ended with status {status}.")
@@ -0,0 +1,300 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, islice
+from math import comb
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from lib.instrumentation import timed_phase
+
+MixedStrategy = List[List[float]]
+
+# Number of support pairs handed to a worker process at once
+SUPPORT_CHUNK_SIZE = 256
+# Below this many support pairs the process start-up costs more than it saves, they are solved serially
+PARALLEL_MIN_SUPPORT_PAIRS = 1 << 17
+
+_worker_payoffs: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+
+@timed_phase("support_enumeration")
+def support_enumeration(game, max_equilibria: int = None, time_limit: float = None,
+                        processes: int = None, tolerance: float = 1e-9) -> List[MixedStrategy]:
+    """
+    Find mixed Nash equilibria by enumerating pairs of equally sized supports.
+    Finds every equilibrium of a non-degenerate game.
+
+    :param game: A `TwoPlayerStrategicFormGame`.
+    :param max_equilibria: Stop after this many equilibria.
+    :param time_limit: Stop after this many seconds.
+    :param processes: Worker processes, None uses every CPU and 1 runs in this process. Games with
+        fewer than PARALLEL_MIN_SUPPORT_PAIRS support pairs always run in this process.
+    :param tolerance: Numerical tolerance for probabilities and best-response checks.
+    :return: Equilibria as [[player1 probabilities], [player2 probabilities]].
+    """
+    return list(iter_support_enumeration(game, max_equilibria, time_limit, processes, tolerance))
+
+
+def iter_support_enumeration(game, max_equilibria: int = None, time_limit: float = None,
+                             processes: int = None, tolerance: float = 1e-9) -> Iterator[MixedStrategy]:
+    """Generator version of `support_enumeration`, equilibria are yielded by growing support size."""
+    first_player_payoffs, second_player_payoffs = (np.asarray(payoffs, dtype=float) for payoffs in game._payoff_matrices)
+    deadline = None if time_limit is None else time.time() + time_limit
+    if max_equilibria is not None and max_equilibria <= 0:
+        return
+
+    rows, cols = first_player_payoffs.shape
+    pair_count = sum(comb(rows, size) * comb(cols, size) for size in range(1, min(rows, cols) + 1))
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or pair_count < PARALLEL_MIN_SUPPORT_PAIRS:
+        chunks = (_solve_support_chunk(first_player_payoffs, second_player_payoffs, chunk, deadline, tolerance)
+                  for chunk in _support_chunks(rows, cols))
+        yield from _take_equilibria(chunks, max_equilibria, deadline)
+        return
+
+    with ProcessPoolExecutor(processes, initializer=_init_worker,
+                             initargs=(first_player_payoffs, second_player_payoffs)) as executor:
+        pending = deque()
+        chunk_iterator = _support_chunks(rows, cols)
+
+        def submit_next():
+            if deadline is not None and time.time() > deadline:
+                return
+            chunk = next(chunk_iterator, None)
+            if chunk is not None:
+                pending.append(executor.submit(_solve_support_chunk_in_worker, chunk, deadline, tolerance))
+
+        for _ in range(2 * processes):
+            submit_next()
+
+        def results():
+            while pending:
+                equilibria = pending.popleft().result()
+                submit_next()
+                yield equilibria
+
+        try:
+            yield from _take_equilibria(results(), max_equilibria, deadline)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+@timed_phase("lemke_howson")
+def lemke_howson(game, initial_dropped_label: int = 0, max_pivots: int = None,
+                 tolerance: float = 1e-12) -> MixedStrategy:
+    """
+    Follow the Lemke–Howson path from the artificial equilibrium by dropping one label.
+
+    Labels 0..rows-1 are player 1 strategies and rows..rows+cols-1 player 2 strategies.
+
+    :param game: A `TwoPlayerStrategicFormGame`.
+    :param initial_dropped_label: Label dropped at the start of the path.
+    :param max_pivots: Give up (ValueError) after this many pivots.
+    :param tolerance: Pivot elements below this value are treated as zero.
+    :return: The equilibrium as [[player1 probabilities], [player2 probabilities]].
+    """
+    first_player_payoffs, second_player_payoffs = (np.asarray(payoffs, dtype=float) for payoffs in game._payoff_matrices)
+    return _lemke_howson(first_player_payoffs, second_player_payoffs, initial_dropped_label, max_pivots, tolerance)
+
+
+@timed_phase("lemke_howson_equilibria")
+def lemke_howson_equilibria(game, max_equilibria: int = None, time_limit: float = None,
+                            max_pivots: int = None, tolerance: float = 1e-12) -> List[MixedStrategy]:
+    """
+    Run `lemke_howson` from every initial dropped label and keep the distinct equilibria.
+    Scales to large games but, unlike `support_enumeration`, may miss equilibria.
+    """
+    first_player_payoffs, second_player_payoffs = (np.asarray(payoffs, dtype=float) for payoffs in game._payoff_matrices)
+    deadline = None if time_limit is None else time.time() + time_limit
+
+    equilibria: List[MixedStrategy] = []
+    seen = set()
+    for label in range(sum(first_player_payoffs.shape)):
+        if max_equilibria is not None and len(equilibria) >= max_equilibria:
+            break
+        if deadline is not None and time.time() > deadline:
+            break
+
+        equilibrium = _lemke_howson(first_player_payoffs, second_player_payoffs, label, max_pivots, tolerance)
+        key = tuple(np.round(np.concatenate(equilibrium), 9))
+        if key not in seen:
+            seen.add(key)
+            equilibria.append(equilibrium)
+    return equilibria
+
+
+def _support_pairs(rows: int, cols: int):
+    for size in range(1, min(rows, cols) + 1):
+        for first_support in combinations(range(rows), size):
+            for second_support in combinations(range(cols), size):
+                yield first_support, second_support
+
+
+def _support_chunks(rows: int, cols: int):
+    pairs = _support_pairs(rows, cols)
+    while True:
+        chunk = list(islice(pairs, SUPPORT_CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _take_equilibria(chunk_results, max_equilibria, deadline):
+    found = 0
+    for equilibria in chunk_results:
+        for equilibrium in equilibria:
+            yield equilibrium
+            found += 1
+            if max_equilibria is not None and found >= max_equilibria:
+                return
+        if deadline is not None and time.time() > deadline:
+            return
+
+
+def _init_worker(first_player_payoffs, second_player_payoffs):
+    global _worker_payoffs
+    _worker_payoffs = (first_player_payoffs, second_player_payoffs)
+
+
+def _solve_support_chunk_in_worker(chunk, deadline, tolerance):
+    return _solve_support_chunk(*_worker_payoffs, chunk, deadline, tolerance)
+
+
+def _solve_support_chunk(first_player_payoffs, second_player_payoffs, chunk, deadline, tolerance) -> List[MixedStrategy]:
+    equilibria = []
+    for first_support, second_support in chunk:
+        if deadline is not None and time.time() > deadline:
+            break
+        equilibrium = _solve_support_pair(first_player_payoffs, second_player_payoffs,
+                                          list(first_support), list(second_support), tolerance)
+        if equilibrium is not None:
+            equilibria.append(equilibrium)
+    return equilibria
+
+
+def _solve_support_pair(first_player_payoffs, second_player_payoffs, first_support, second_support, tolerance):
+    # player 2 mixes over second_support so that player 1 is indifferent over first_support, and vice versa
+    second_player_mix = _indifference_mix(first_player_payoffs[np.ix_(first_support, second_support)], tolerance)
+    first_player_mix = _indifference_mix(second_player_payoffs[np.ix_(first_support, second_support)].T, tolerance)
+    if first_player_mix is None or second_player_mix is None:
+        return None
+
+    rows, cols = first_player_payoffs.shape
+    first_player_mix = _expand_mix(first_player_mix, first_support, rows)
+    second_player_mix = _expand_mix(second_player_mix, second_support, cols)
+
+    # no strategy outside the support may do better than the ones inside
+    for payoffs, own_mix, opponent_mix in ((first_player_payoffs, first_player_mix, second_player_mix),
+                                           (second_player_payoffs.T, second_player_mix, first_player_mix)):
+        utilities = payoffs @ opponent_mix
+        if utilities.max() > own_mix @ utilities + tolerance * max(1.0, abs(utilities).max()):
+            return None
+
+    return [np.clip(first_player_mix, 0.0, None).tolist(), np.clip(second_player_mix, 0.0, None).tolist()]
+
+
+def _expand_mix(support_mix: np.ndarray, support: List[int], size: int) -> np.ndarray:
+    mix = np.zeros(size)
+    mix[support] = support_mix
+    return mix
+
+
+def _indifference_mix(payoffs: np.ndarray, tolerance: float) -> Optional[np.ndarray]:
+    """Mix over the columns of the square `payoffs` making every row earn the same utility, probabilities above -`tolerance`."""
+    size = payoffs.shape[0]
+    system = np.zeros((size + 1, size + 1))
+    system[:size, :size] = payoffs
+    system[:size, size] = -1.0
+    system[size, :size] = 1.0
+    rhs = np.zeros(size + 1)
+    rhs[size] = 1.0
+    try:
+        solution = np.linalg.solve(system, rhs)
+    except np.linalg.LinAlgError:
+        return None
+
+    mix = solution[:size]
+    if not np.all(np.isfinite(mix)) or mix.min() < -tolerance:
+        return None
+    return mix
+
+
+class _Tableau:
+    """Tableau of one best-response polytope, variables are identified by their label."""
+
+    def __init__(self, constraints: np.ndarray, basis: List[int], slack_labels: List[int], tolerance: float):
+        self.matrix = constraints
+        self.basis = basis
+        self.slack_labels = slack_labels
+        self.tolerance = tolerance
+
+    def pivot(self, entering_label: int) -> int:
+        column = self.matrix[:, entering_label]
+        candidates = np.flatnonzero(column > self.tolerance)
+        if len(candidates) == 0:
+            raise ValueError("Lemke–Howson path is unbounded; payoffs must be positive.")
+
+        # lexicographic minimum ratio test keeps the path well defined for degenerate games,
+        # the ratios of a further column are only computed while rows are still tied
+        for label in [-1] + self.slack_labels:
+            ratios = self.matrix[candidates, label] / column[candidates]
+            candidates = candidates[ratios <= ratios.min() + self.tolerance]
+            if len(candidates) == 1:
+                break
+        row = candidates[0]
+
+        pivot_row = self.matrix[row] / self.matrix[row, entering_label]
+        self.matrix -= np.outer(column, pivot_row)
+        self.matrix[row] = pivot_row
+
+        leaving_label = self.basis[row]
+        self.basis[row] = entering_label
+        return leaving_label
+
+    def strategy(self, labels: range) -> np.ndarray:
+        values = np.zeros(len(labels))
+        for row, label in enumerate(self.basis):
+            if label in labels:
+                values[label - labels.start] = self.matrix[row, -1]
+        return values / values.sum()
+
+
+def _lemke_howson(first_player_payoffs, second_player_payoffs, initial_dropped_label, max_pivots, tolerance) -> MixedStrategy:
+    rows, cols = first_player_payoffs.shape
+    if not 0 <= initial_dropped_label < rows + cols:
+        raise ValueError(f"Initial dropped label must be in [0, {rows + cols}), got {initial_dropped_label}.")
+
+    # shift payoffs to be positive, equilibria do not change
+    first_player_payoffs = first_player_payoffs - first_player_payoffs.min() + 1.0
+    second_player_payoffs = second_player_payoffs - second_player_payoffs.min() + 1.0
+
+    first_player_labels = range(rows)
+    second_player_labels = range(rows, rows + cols)
+
+    # player 1 polytope: B^T x + s = 1, x_i carries label i and s_j label rows + j
+    first_polytope = _Tableau(np.hstack([second_player_payoffs.T, np.eye(cols), np.ones((cols, 1))]),
+                              list(second_player_labels), list(second_player_labels), tolerance)
+    # player 2 polytope: r + A y = 1, r_i carries label i and y_j label rows + j
+    second_polytope = _Tableau(np.hstack([np.eye(rows), first_player_payoffs, np.ones((rows, 1))]),
+                               list(first_player_labels), list(first_player_labels), tolerance)
+
+    tableau = first_polytope if initial_dropped_label < rows else second_polytope
+    entering_label = initial_dropped_label
+    pivots = 0
+    while True:
+        leaving_label = tableau.pivot(entering_label)
+        pivots += 1
+        if leaving_label == initial_dropped_label:
+            break
+        if max_pivots is not None and pivots >= max_pivots:
+            raise ValueError(f"Lemke–Howson did not finish within {max_pivots} pivots.")
+        entering_label = leaving_label
+        tableau = second_polytope if tableau is first_polytope else first_polytope
+
+    return [first_polytope.strategy(first_player_labels).tolist(),
+            second_polytope.strategy(second_player_labels).tolist()]
@@ -0,0 +1,470 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from lib.dominance_elimination import EliminationStep, iterated_elimination
+from lib.exact_arithmetic import check_backend, float_error_bound, integer_scaled
+from lib.instrumentation import PAYOFF_LOOKUPS, STRATEGY_INDEX_LOOKUPS, SUBGAMES_BUILT, count
+
+StrategyLists = List[List[str]]
+Profile = Tuple[int, ...]
+
+# Number of profiles checked per block when streaming pure Nash equilibria
+PROFILE_BLOCK_SIZE = 1 << 20
+
+
+class NPlayerStrategicFormGame:
+    """A strategic form game for any number of players.
+
+    strategies[p] lists the strategy names of player p. The payoffs of player p are kept
+    as a tensor of shape (len(strategies[0]), ..., len(strategies[N - 1])), so axis p of
+    every tensor belongs to the strategies of player p.
+
+    Payoffs are stored either densely (one numpy tensor per player) or sparsely as the
+    coordinates of the explicitly given profiles plus a fill payoff for every other profile,
+    see `from_sparse_payoffs`. Best responses, pure Nash equilibria and expected utilities
+    work on both without materializing the dense tensors; dominance elimination compares
+    whole strategy slices and materializes one player's tensor at a time.
+    """
+
+    def __init__(self, strategies: StrategyLists, payoffs=None):
+        """Initialize the game with the strategies and optional dense payoffs.
+
+        Args:
+            strategies: One list of strategy names per player.
+            payoffs: Nested lists (or an array) of shape s_1 x ... x s_N x N, the last axis
+                holds the payoff tuple (player1, ..., playerN) of a profile.
+        """
+        self._strategies = [list(player_strategies) for player_strategies in strategies]
+        # _strategy_indexes[player] maps a strategy name to its first index for that player
+        self._strategy_indexes = []
+        for player_strategies in self._strategies:
+            lookup = {}
+            for index, strategy in enumerate(player_strategies):
+                lookup.setdefault(strategy, index)
+            self._strategy_indexes.append(lookup)
+
+        self._payoff_tensors = None
+        self._sparse_profiles = None
+        self._sparse_payoffs = None
+        self._fill_values = None
+        self._sparse_line_cache = {}
+        if payoffs is not None:
+            values = np.asarray(payoffs)
+            if values.shape != self.shape + (self.player_count,):
+                raise ValueError(f"Payoffs must have shape {self.shape + (self.player_count,)}, got {values.shape}.")
+            self._set_payoff_tensors([values[..., player_index] for player_index in self.players])
+
+    @classmethod
+    def from_payoff_tensors(cls, strategies: StrategyLists, payoff_tensors) -> 'NPlayerStrategicFormGame':
+        """Build a game directly from one dense payoff tensor per player.
+
+        Args:
+            strategies: One list of strategy names per player.
+            payoff_tensors: payoff_tensors[p] is an array-like of shape s_1 x ... x s_N.
+        """
+        game = cls(strategies)
+        game._set_payoff_tensors(payoff_tensors)
+        return game
+
+    @classmethod
+    def from_sparse_payoffs(cls, strategies: StrategyLists, profiles, payoffs, fill_value=0) -> 'NPlayerStrategicFormGame':
+        """Build a game whose payoffs are only given for some profiles.
+
+        Args:
+            strategies: One list of strategy names per player.
+            profiles: K x N strategy indexes of the explicitly given profiles.
+            payoffs: K x N payoffs of those profiles.
+            fill_value: Payoff of every player in the remaining profiles, a scalar or one
+                value per player.
+        """
+        game = cls(strategies)
+        profiles = np.asarray(profiles, dtype=np.intp).reshape(-1, game.player_count)
+        payoffs = np.asarray(payoffs).reshape(-1, game.player_count)
+        if len(profiles) != len(payoffs):
+            raise ValueError(f"Expected one payoff tuple per profile, got {len(payoffs)} for {len(profiles)} profiles.")
+        if len(profiles) and ((profiles < 0).any() or (profiles >= np.asarray(game.shape)).any()):
+            raise ValueError("Profile strategy indexes are out of range.")
+
+        # keep the profiles in row-major order, the last one given wins on duplicates
+        flat_indexes = np.ravel_multi_index(profiles.T, game.shape) if len(profiles) else np.zeros(0, dtype=np.intp)
+        _, last = np.unique(flat_indexes[::-1], return_index=True)
+        keep = len(flat_indexes) - 1 - last
+        fill_values = np.asarray(fill_value)
+        dtype = np.result_type(payoffs, fill_values)
+        game._sparse_profiles = profiles[keep]
+        game._sparse_payoffs = payoffs[keep].astype(dtype)
+        game._fill_values = np.broadcast_to(fill_values.astype(dtype), (game.player_count,)).copy()
+        return game
+
+    @classmethod
+    def from_two_player_game(cls, game) -> 'NPlayerStrategicFormGame':
+        """Convert a `TwoPlayerStrategicFormGame`."""
+        return cls.from_payoff_tensors(game._strategies, game._payoff_matrices)
+
+    def _set_payoff_tensors(self, payoff_tensors):
+        tensors = [np.ascontiguousarray(tensor) for tensor in payoff_tensors]
+        if len(tensors) != self.player_count or any(tensor.shape != self.shape for tensor in tensors):
+            raise ValueError(f"Expected {self.player_count} payoff tensors of shape {self.shape}.")
+        self._payoff_tensors = tensors
+        self._sparse_profiles = self._sparse_payoffs = self._fill_values = None
+        self._sparse_line_cache = {}
+
+    @property
+    def players(self) -> List[int]:
+        return list(range(len(self._strategies)))
+
+    @property
+    def player_count(self) -> int:
+        return len(self._strategies)
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return tuple(len(player_strategies) for player_strategies in self._strategies)
+
+    @property
+    def is_sparse(self) -> bool:
+        return self._payoff_tensors is None
+
+    def payoff_tensor(self, player_index: int) -> np.ndarray:
+        """Dense payoffs of `player_index`, materialized for sparse games."""
+        if not self.is_sparse:
+            return self._payoff_tensors[player_index]
+        tensor = np.full(self.shape, self._fill_values[player_index])
+        tensor[tuple(self._sparse_profiles.T)] = self._sparse_payoffs[:, player_index]
+        return tensor
+
+    def strategy_index(self, player_index: int, strategy: str) -> int:
+        """Index of `strategy` among the strategies of `player_index`."""
+        count(STRATEGY_INDEX_LOOKUPS)
+        if strategy not in self._strategy_indexes[player_index]:
+            raise ValueError(f"Strategy {strategy} not found in player {player_index + 1}'s strategies.")
+        return self._strategy_indexes[player_index][strategy]
+
+    def _profile_to_indexes(self, strategies: Sequence[str], player_indexes: Sequence[int]) -> Profile:
+        return tuple(self.strategy_index(player_index, strategy) for player_index, strategy in zip(player_indexes, strategies))
+
+    def get_output(self, *strategies: str) -> tuple:
+        """Payoff tuple of the profile given by one strategy name per player."""
+        return self.get_output_by_indexes(*self._profile_to_indexes(strategies, self.players))
+
+    def get_output_by_indexes(self, *strategy_indexes: int) -> tuple:
+        """Index variant of `get_output`."""
+        count(PAYOFF_LOOKUPS)
+        if not self.is_sparse:
+            return tuple(tensor[strategy_indexes].item() for tensor in self._payoff_tensors)
+
+        flat_index = np.ravel_multi_index(strategy_indexes, self.shape)
+        stored = self._sparse_flat_indexes()
+        position = np.searchsorted(stored, flat_index)
+        if position < len(stored) and stored[position] == flat_index:
+            return tuple(self._sparse_payoffs[position].tolist())
+        return tuple(self._fill_values.tolist())
+
+    def _sparse_flat_indexes(self) -> np.ndarray:
+        if 'flat' not in self._sparse_line_cache:
+            self._sparse_line_cache['flat'] = np.ravel_multi_index(self._sparse_profiles.T, self.shape)
+        return self._sparse_line_cache['flat']
+
+    def _opponent_shape(self, player_index: int) -> Tuple[int, ...]:
+        return self.shape[:player_index] + self.shape[player_index + 1:]
+
+    def best_responses(self, caller_index: int, opponent_strategies: Sequence[str]) -> List[str]:
+        """Best responses of `caller_index` to the strategies of the other players (in player order)."""
+        opponents = [player_index for player_index in self.players if player_index != caller_index]
+        opponent_strategy_indexes = self._profile_to_indexes(opponent_strategies, opponents)
+        caller_strategies = self._strategies[caller_index]
+        return [caller_strategies[response_index]
+                for response_index in self.best_response_indexes(caller_index, opponent_strategy_indexes)]
+
+    def best_response_indexes(self, caller_index: int, opponent_strategy_indexes: Sequence[int]) -> List[int]:
+        """Index variant of `best_responses`."""
+        values = self._payoff_line(caller_index, tuple(opponent_strategy_indexes))
+        if len(values) == 0:
+            return []
+        return np.flatnonzero(values == values.max()).tolist()
+
+    def _payoff_line(self, player_index: int, opponent_strategy_indexes: Profile) -> np.ndarray:
+        # payoffs of player_index for each of its strategies against a fixed opponent profile
+        if not self.is_sparse:
+            selection = opponent_strategy_indexes[:player_index] + (slice(None),) + opponent_strategy_indexes[player_index:]
+            return self._payoff_tensors[player_index][selection]
+
+        line_keys, _, _, order = self._sparse_lines(player_index)
+        opponent_shape = self._opponent_shape(player_index)
+        key = np.ravel_multi_index(opponent_strategy_indexes, opponent_shape) if opponent_shape else 0
+        start, stop = np.searchsorted(line_keys, [key, key + 1])
+        stored = order[start:stop]
+        values = np.full(self.shape[player_index], self._fill_values[player_index])
+        values[self._sparse_profiles[stored, player_index]] = self._sparse_payoffs[stored, player_index]
+        return values
+
+    def _sparse_lines(self, player_index: int):
+        """Group the stored profiles by the opponent profile of `player_index`.
+
+        Returns the sorted line key of every stored profile, the distinct keys, the best
+        payoff of `player_index` on each of those lines (counting the fill payoff when the
+        line is not fully stored) and the stored profile order matching the sorted keys.
+        """
+        if player_index in self._sparse_line_cache:
+            return self._sparse_line_cache[player_index]
+
+        opponent_shape = self._opponent_shape(player_index)
+        opponents = np.delete(self._sparse_profiles, player_index, axis=1)
+        keys = np.ravel_multi_index(opponents.T, opponent_shape) if opponent_shape else np.zeros(len(opponents), dtype=np.intp)
+        order = np.argsort(keys, kind='stable')
+        line_keys = keys[order]
+        distinct_keys, starts, counts = np.unique(line_keys, return_index=True, return_counts=True)
+
+        line_best = np.empty(len(distinct_keys), dtype=self._sparse_payoffs.dtype)
+        if len(distinct_keys):
+            line_best = np.maximum.reduceat(self._sparse_payoffs[order, player_index], starts)
+        incomplete = counts < self.shape[player_index]
+        line_best[incomplete] = np.maximum(line_best[incomplete], self._fill_values[player_index])
+
+        self._sparse_line_cache[player_index] = (line_keys, distinct_keys, line_best, order)
+        return self._sparse_line_cache[player_index]
+
+    def best_response_mask(self, player_index: int) -> np.ndarray:
+        """Boolean tensor, True where the strategy of `player_index` is a best response to the others."""
+        tensor = self.payoff_tensor(player_index)
+        if tensor.size == 0:
+            return np.zeros(self.shape, dtype=bool)
+        return tensor == tensor.max(axis=player_index, keepdims=True)
+
+    def pure_nash_equilibria(self) -> List[Tuple[str, ...]]:
+        return list(self.iter_pure_nash_equilibria(strategy_names=True))
+
+    def pure_nash_equilibrium_indexes(self) -> List[Profile]:
+        """Index variant of `pure_nash_equilibria`."""
+        return list(self.iter_pure_nash_equilibria())
+
+    def iter_pure_nash_equilibria(self, strategy_names: bool = False, chunk_size: int = PROFILE_BLOCK_SIZE):
+        """Stream the pure Nash equilibria in row-major profile order.
+
+        The best payoff of every player along its own axis is computed once; profiles are then
+        checked against all players' maxima a block of about `chunk_size` profiles at a time.
+
+        Args:
+            strategy_names: Yield tuples of strategy names instead of strategy indexes.
+            chunk_size: Number of profiles checked per block.
+        """
+        if any(size == 0 for size in self.shape):
+            return
+        equilibria = self._iter_sparse_equilibria(chunk_size) if self.is_sparse else self._iter_dense_equilibria(chunk_size)
+        for profiles in equilibria:
+            for profile in map(tuple, profiles.tolist()):
+                if strategy_names:
+                    yield tuple(self._strategies[player_index][index] for player_index, index in enumerate(profile))
+                else:
+                    yield profile
+
+    def _iter_dense_equilibria(self, chunk_size: int):
+        best = [tensor.max(axis=player_index, keepdims=True) for player_index, tensor in enumerate(self._payoff_tensors)]
+        rows_per_block = max(1, chunk_size // max(1, int(np.prod(self.shape[1:]))))
+        for start in range(0, self.shape[0], rows_per_block):
+            block = slice(start, start + rows_per_block)
+            is_equilibrium = np.ones((min(rows_per_block, self.shape[0] - start),) + self.shape[1:], dtype=bool)
+            for player_index, tensor in enumerate(self._payoff_tensors):
+                # the best payoff of player 1 does not depend on its own (row) strategy
+                player_best = best[player_index] if player_index == 0 else best[player_index][block]
+                is_equilibrium &= tensor[block] == player_best
+            profiles = np.argwhere(is_equilibrium)
+            profiles[:, 0] += start
+            yield profiles
+
+    def _iter_sparse_equilibria(self, chunk_size: int):
+        # a stored profile is an equilibrium when it reaches the best payoff of every line through it
+        stored_flat = self._sparse_flat_indexes()
+        is_stored_equilibrium = np.ones(len(stored_flat), dtype=bool)
+        worse_lines = []
+        fill_profiles_possible = True
+        for player_index in self.players:
+            line_keys, distinct_keys, line_best, order = self._sparse_lines(player_index)
+            line_of_stored = np.empty(len(order), dtype=np.intp)
+            line_of_stored[order] = np.searchsorted(distinct_keys, line_keys)
+            is_stored_equilibrium &= self._sparse_payoffs[:, player_index] == line_best[line_of_stored]
+
+            # a profile with the fill payoff is not a best response on lines where a stored profile pays more
+            worse = distinct_keys[line_best > self._fill_values[player_index]]
+            worse_lines.append(worse)
+            if len(worse) == int(np.prod(self._opponent_shape(player_index))):
+                fill_profiles_possible = False
+
+        stored_equilibria = stored_flat[is_stored_equilibrium]
+        profile_count = int(np.prod(self.shape))
+        if not fill_profiles_possible or len(stored_flat) == profile_count:
+            for start in range(0, len(stored_equilibria), chunk_size):
+                yield np.stack(np.unravel_index(stored_equilibria[start:start + chunk_size], self.shape), axis=1)
+            return
+
+        for start in range(0, profile_count, chunk_size):
+            flat = np.arange(start, min(start + chunk_size, profile_count))
+            candidates = ~np.isin(flat, stored_flat, assume_unique=True)
+            profiles = np.unravel_index(flat, self.shape)
+            for player_index in self.players:
+                opponent_shape = self._opponent_shape(player_index)
+                if not opponent_shape:
+                    candidates &= len(worse_lines[player_index]) == 0
+                    continue
+                opponents = profiles[:player_index] + profiles[player_index + 1:]
+                keys = np.ravel_multi_index(opponents, opponent_shape)
+                candidates &= ~np.isin(keys, worse_lines[player_index])
+
+            first, last = np.searchsorted(stored_equilibria, [start, start + len(flat)])
+            equilibria = np.union1d(flat[candidates], stored_equilibria[first:last])
+            yield np.stack(np.unravel_index(equilibria, self.shape), axis=1)
+
+    def _player_payoff_matrix(self, player_index) -> np.ndarray:
+        """Payoffs of `player_index` with its own strategies on the rows and opponent profiles (row-major) on the columns."""
+        tensor = self.payoff_tensor(player_index)
+        return np.ascontiguousarray(np.moveaxis(tensor, player_index, 0)).reshape(self.shape[player_index], -1)
+
+    def _profile_columns(self, player_index, strategy_indexes) -> np.ndarray:
+        """Columns of `_player_payoff_matrix(player_index)` for the opponent profiles made of strategy_indexes."""
+        opponent_shape = self._opponent_shape(player_index)
+        opponent_indexes = strategy_indexes[:player_index] + strategy_indexes[player_index + 1:]
+        columns = np.arange(int(np.prod(opponent_shape)), dtype=np.intp).reshape(opponent_shape)
+        return columns[np.ix_(*[np.asarray(indexes, dtype=np.intp) for indexes in opponent_indexes])].ravel()
+
+    def eliminate_dominated_strategies(self, strictly_only=False) -> 'NPlayerStrategicFormGame':
+        return self.eliminate_dominated_strategies_with_trace(strictly_only)[0]
+
+    def eliminate_dominated_strategies_with_trace(self, strictly_only=False) -> Tuple['NPlayerStrategicFormGame', List[EliminationStep]]:
+        """Iteratively eliminate dominated strategies.
+
+        Returns the final subgame together with the list of `EliminationStep`s that led to it.
+        """
+        surviving_indexes, trace = iterated_elimination(self, strictly_only)
+        if len(trace) == 0:
+            return self, trace
+
+        return self.subgame_by_indexes(surviving_indexes), trace
+
+    def subgame(self, substrategies: StrategyLists) -> 'NPlayerStrategicFormGame':
+        """Subgame keeping the named strategies of every player, unknown names are skipped."""
+        count(STRATEGY_INDEX_LOOKUPS, sum(len(player_strategies) for player_strategies in substrategies))
+        strategy_indexes = [[lookup[strategy] for strategy in player_strategies if strategy in lookup]
+                            for lookup, player_strategies in zip(self._strategy_indexes, substrategies)]
+        return self.subgame_by_indexes(strategy_indexes)
+
+    def subgame_by_indexes(self, strategy_indexes: List[List[int]]) -> 'NPlayerStrategicFormGame':
+        """Index variant of `subgame`, strategy_indexes[player] lists the kept strategy indexes."""
+        count(SUBGAMES_BUILT)
+        substrategies = [[self._strategies[player_index][i] for i in strategy_indexes[player_index]] for player_index in self.players]
+        kept = [np.asarray(indexes, dtype=np.intp) for indexes in strategy_indexes]
+        if not self.is_sparse:
+            selection = np.ix_(*kept)
+            return NPlayerStrategicFormGame.from_payoff_tensors(substrategies, [tensor[selection] for tensor in self._payoff_tensors])
+
+        # new_index[player][old_index] is the subgame index of a kept strategy, -1 otherwise
+        profiles = []
+        is_kept = np.ones(len(self._sparse_profiles), dtype=bool)
+        for player_index, indexes in enumerate(kept):
+            new_index = np.full(self.shape[player_index], -1, dtype=np.intp)
+            new_index[indexes] = np.arange(len(indexes))
+            profiles.append(new_index[self._sparse_profiles[:, player_index]])
+            is_kept &= profiles[-1] >= 0
+        sub_profiles = np.stack(profiles, axis=1)[is_kept]
+        return NPlayerStrategicFormGame.from_sparse_payoffs(substrategies, sub_profiles,
+                                                            self._sparse_payoffs[is_kept], self._fill_values)
+
+    def expected_utility(self, mixed_strategy: List[List[float]]) -> List[float]:
+        """
+        Calculate expected utility for every player given their mixed strategies.
+        mixed_strategy: One list of strategy probabilities per player.
+        Returns a list with the expected utility of every player.
+        """
+        mixes = self._as_mixes(mixed_strategy)
+        if self.is_sparse:
+            # the fill payoff is received with the remaining probability
+            probabilities = np.prod([mix[self._sparse_profiles[:, player_index]] for player_index, mix in enumerate(mixes)], axis=0)
+            return (probabilities @ (self._sparse_payoffs - self._fill_values) + self._fill_values).tolist()
+
+        return [float(self._contract(tensor, mixes)) for tensor in self._payoff_tensors]
+
+    def strategy_utilities(self, player_index: int, mixed_strategy: List[List[float]]) -> np.ndarray:
+        """
+        Expected utility of every pure strategy of `player_index` against the mixed strategies
+        of the other players. mixed_strategy[player_index] is ignored.
+        """
+        mixes = self._as_mixes(mixed_strategy)
+        if self.is_sparse:
+            fill = self._fill_values[player_index]
+            probabilities = np.prod([mix[self._sparse_profiles[:, other_index]]
+                                     for other_index, mix in enumerate(mixes) if other_index != player_index], axis=0)
+            weights = probabilities * (self._sparse_payoffs[:, player_index] - fill)
+            return np.bincount(self._sparse_profiles[:, player_index], weights=weights, minlength=self.shape[player_index]) + fill
+
+        return self._contract(self._payoff_tensors[player_index], mixes, keep_axis=player_index)
+
+    def is_mixed_nash_equilibrium(self, mixed_strategy: List[List[float]], tolerance: float = 1e-6,
+                                  backend: str = "float") -> bool:
+        """
+        No player gains more than `tolerance` by switching to a pure strategy.
+        With backend="exact" (probabilities may be `Fraction`s) no player may gain anything: the
+        players whose float gain is within rounding error of zero are rechecked with integer
+        arithmetic and `tolerance` is ignored.
+        """
+        check_backend(backend)
+        utilities = self.expected_utility(mixed_strategy)
+        for player_index in self.players:
+            gain = self.strategy_utilities(player_index, mixed_strategy).max(initial=-np.inf) - utilities[player_index]
+            if backend == "float":
+                if gain > tolerance:
+                    return False
+            elif gain > 2 * self._utility_error_bound(player_index, mixed_strategy) or not self._is_exact_best_response(player_index, mixed_strategy):
+                return False
+        return True
+
+    def _utility_error_bound(self, player_index: int, mixed_strategy: List[List[float]]) -> float:
+        """Bound on the rounding error of the float utilities of `player_index`."""
+        payoffs = self._sparse_payoffs[:, player_index] if self.is_sparse else self._payoff_tensors[player_index]
+        largest = max(float(np.abs(payoffs).max(initial=0)), abs(float(self._fill_values[player_index])) if self.is_sparse else 0.0)
+        magnitude = largest * float(np.prod([np.abs(mix).sum() for mix in self._as_mixes(mixed_strategy)]))
+        terms = sum(self.shape) + (len(self._sparse_profiles) if self.is_sparse else 0)
+        return float(float_error_bound(magnitude, terms))
+
+    def _is_exact_best_response(self, player_index: int, mixed_strategy: List[List[float]]) -> bool:
+        """The mixed strategy of `player_index` earns exactly its best pure strategy utility."""
+        self._as_mixes(mixed_strategy)
+        scaled_mixes = [integer_scaled(np.asarray(mix, dtype=object)) for mix in mixed_strategy]
+        mixes = [numerators.astype(object) for numerators, _ in scaled_mixes]
+
+        # utility numerators of every own strategy over the common denominator of payoffs and opponent mixes
+        if self.is_sparse:
+            payoffs, _ = integer_scaled(np.append(self._sparse_payoffs[:, player_index], self._fill_values[player_index]))
+            payoffs = payoffs.astype(object)
+            fill = payoffs[-1]
+            opponent_denominator = int(np.prod([denominator for other_index, (_, denominator) in enumerate(scaled_mixes)
+                                                if other_index != player_index], dtype=object))
+            probabilities = np.prod([mixes[other_index][self._sparse_profiles[:, other_index]]
+                                     for other_index in self.players if other_index != player_index], axis=0)
+            utilities = np.full(self.shape[player_index], fill * opponent_denominator, dtype=object)
+            np.add.at(utilities, self._sparse_profiles[:, player_index], probabilities * (payoffs[:-1] - fill))
+        else:
+            payoffs, _ = integer_scaled(self._payoff_tensors[player_index])
+            utilities = self._contract(payoffs.astype(object), mixes, keep_axis=player_index)
+
+        own_mix, own_denominator = mixes[player_index], scaled_mixes[player_index][1]
+        if len(utilities) == 0:
+            return True
+        return max(utilities) * own_denominator <= sum(own_mix * utilities)
+
+    def _as_mixes(self, mixed_strategy: List[List[float]]) -> List[np.ndarray]:
+        if len(mixed_strategy) != self.player_count:
+            raise ValueError(f"Expected one mixed strategy per player, got {len(mixed_strategy)}.")
+        mixes = [np.asarray(mix, dtype=float) for mix in mixed_strategy]
+        for player_index, mix in enumerate(mixes):
+            if mix.shape != (self.shape[player_index],):
+                raise ValueError(f"Mixed strategy of player {player_index + 1} needs {self.shape[player_index]} probabilities.")
+        return mixes
+
+    @staticmethod
+    def _contract(tensor: np.ndarray, mixes: List[np.ndarray], keep_axis: int = None) -> np.ndarray:
+        # contract from the last axis so the remaining axes keep their positions
+        result = tensor
+        for axis in reversed(range(len(mixes))):
+            if axis != keep_axis:
+                result = np.tensordot(result, mixes[axis], axes=([axis], [0]))
+        return result
@@ -1,14 +1,25 @@
-from typing import List, Optional, Sequence, Tuple
+import io
+import sys
+from typing import List, Optional, Sequence, TextIO, Tuple, Union
 
-from .strategic_form_game import TwoPlayerStrategicFormGame
+import numpy as np
+
+from .strategic_form_game import TwoPlayerStrategicFormGame, _restrict
 
 StrategyMatrix = List[List[str]]
 Payoff = Tuple[float, float]
+# A window of strategy indexes: a slice, a range or a (start, stop) pair
+Window = Optional[Union[slice, range, Tuple[int, int]]]
 
 STRATEGIES_ATTR = "_strategies"
-PAYOFFS_ATTR = "_payoffs"
+PAYOFF_STORAGE_ATTR = "_payoff_storage"
+VIEW_INDEXES_ATTR = "_view_indexes"
 PRINTIBLE_ATTR = "printible"
 
+# Upper bound on the payoffs measured at once when computing column widths
+WIDTH_BLOCK_SIZE = 1 << 20
+_POWERS_OF_TEN = np.array([10 ** exponent for exponent in range(1, 20)], dtype=np.uint64)
+
 
 def _clone_strategy_matrix(
     strategies: Optional[Sequence[Sequence[str]]]
@@ -24,87 +35,184 @@ def _clone_strategy_matrix(
     return cloned
 
 
-def _clone_payoff_matrix(
-    payoffs: Optional[Sequence[Sequence[Payoff]]]
-) -> Optional[List[List[Payoff]]]:
-    if payoffs is None:
-        return None
-    return [list(row) for row in payoffs]
-
-
 def _format_game(game: TwoPlayerStrategicFormGame, title: str = "TwoPlayerStrategicFormGame") -> str:
-    lines = [title]
-    lines.extend(_format_players_block(game))
-    lines.extend(_format_payoff_block(game))
-    return "\n".join(lines)
-
-
-def _format_players_block(game: TwoPlayerStrategicFormGame) -> List[str]:
+    stream = io.StringIO()
+    write_game(game, stream, title=title)
+    return stream.getvalue()[:-1]
+
+
+def write_game(
+    game: TwoPlayerStrategicFormGame,
+    stream: Optional[TextIO] = None,
+    title: str = "TwoPlayerStrategicFormGame",
+    rows: Window = None,
+    columns: Window = None,
+) -> None:
+    """Write the game to `stream` (stdout by default) one table row at a time.
+
+    `rows` / `columns` restrict the payoff table to a window of Player 1 / Player 2
+    strategies, given as a slice, a range or a (start, stop) pair; a summary line then
+    tells how much of the table was left out. Column widths come from the digit counts of
+    the payoff arrays, so no formatted cell is kept around.
+    """
+    stream = sys.stdout if stream is None else stream
+    stream.write(title + "\n")
+    for line in _format_players_block(game, (rows, columns)):
+        stream.write(line + "\n")
+    _write_payoff_block(game, stream, rows, columns)
+
+
+def _format_players_block(game: TwoPlayerStrategicFormGame, windows: Tuple[Window, Window] = (None, None)) -> List[str]:
     block = []
     for idx in range(2):
         strategies = _get_player_strategies(game, idx)
-        readable = ", ".join(strategies) if strategies else "—"
+        window = _window(windows[idx], len(strategies))
+        readable = ", ".join(strategies[strategy_idx] for strategy_idx in window) or "—"
+        if len(window) < len(strategies):
+            readable += f" (+{len(strategies) - len(window)} more)"
         block.append(f"  Player {idx + 1} strategies: {readable}")
     return block
 
 
-def _format_payoff_block(game: TwoPlayerStrategicFormGame) -> List[str]:
-    if not getattr(game, PAYOFFS_ATTR, None):
-        return ["  Payoff matrix: <empty>"]
+def _write_payoff_block(game: TwoPlayerStrategicFormGame, stream: TextIO, rows: Window, columns: Window) -> None:
+    payoff_shape = _payoff_shape(game)
+    if payoff_shape is None or payoff_shape[0] * payoff_shape[1] == 0:
+        stream.write("  Payoff matrix: <empty>\n")
+        return
 
     player1_strats = _get_player_strategies(game, 0)
     player2_strats = _get_player_strategies(game, 1)
 
     if not player1_strats or not player2_strats:
-        return [
-            "  Payoff matrix: <incomplete — define strategies for both players to display>"
-        ]
-
-    table_lines = _render_payoff_table(game, player1_strats, player2_strats)
-    indented = ["    " + line for line in table_lines]
-    return ["  Payoff matrix (rows: Player 1, cols: Player 2):"] + indented
-
-
-def _render_payoff_table(
-    game: TwoPlayerStrategicFormGame, p1_strats: List[str], p2_strats: List[str]
-) -> List[str]:
-    table = _build_payoff_table(game, p1_strats, p2_strats)
-    col_widths = [max(len(row[col]) for row in table) for col in range(len(table[0]))]
-
-    rendered = []
-    for idx, row in enumerate(table):
-        padded = [row[col].ljust(col_widths[col]) for col in range(len(row))]
-        rendered.append(" | ".join(padded))
-        if idx == 0:
-            separator = "-+-".join("-" * width for width in col_widths)
-            rendered.append(separator)
-    return rendered
-
-
-def _build_payoff_table(
-    game: TwoPlayerStrategicFormGame, p1_strats: List[str], p2_strats: List[str]
-) -> List[List[str]]:
-    header = ["P1 \\ P2"] + [str(strategy) for strategy in p2_strats]
-    table = [header]
-    for row_idx, p1_strategy in enumerate(p1_strats):
-        row = [str(p1_strategy)]
-        for col_idx in range(len(p2_strats)):
-            row.append(_format_payoff_entry(game, row_idx, col_idx))
-        table.append(row)
-    return table
-
-
-def _format_payoff_entry(game: TwoPlayerStrategicFormGame, row_index: int, column_index: int) -> str:
-    payoffs = getattr(game, PAYOFFS_ATTR, []) or []
-    if row_index >= len(payoffs):
-        return "—"
-    row = payoffs[row_index]
-    if column_index >= len(row):
-        return "—"
-    entry = row[column_index]
-    if isinstance(entry, tuple) and len(entry) == 2:
-        return f"({entry[0]}, {entry[1]})"
-    return str(entry)
+        stream.write("  Payoff matrix: <incomplete — define strategies for both players to display>\n")
+        return
+
+    row_window = _window(rows, len(player1_strats))
+    column_window = _window(columns, len(player2_strats))
+    header = ["P1 \\ P2"] + [str(player2_strats[col_idx]) for col_idx in column_window]
+    col_widths = _column_widths(game, payoff_shape, header, player1_strats, row_window, column_window)
+
+    stream.write("  Payoff matrix (rows: Player 1, cols: Player 2):\n")
+    _write_table_row(stream, header, col_widths)
+    stream.write("    " + "-+-".join("-" * width for width in col_widths) + "\n")
+    for row_idx in row_window:
+        row = [str(player1_strats[row_idx])] + _format_payoff_row(game, payoff_shape, row_idx, column_window)
+        _write_table_row(stream, row, col_widths)
+
+    if len(row_window) < len(player1_strats) or len(column_window) < len(player2_strats):
+        stream.write(f"  ... showing {_describe_window(row_window)} of {len(player1_strats)} rows, "
+                     f"{_describe_window(column_window)} of {len(player2_strats)} columns\n")
+
+
+def _write_table_row(stream: TextIO, row: List[str], col_widths: List[int]) -> None:
+    stream.write("    " + " | ".join(cell.ljust(width) for cell, width in zip(row, col_widths)) + "\n")
+
+
+def _window(selection: Window, count: int) -> range:
+    if selection is None:
+        return range(count)
+    if isinstance(selection, range):
+        selection = slice(selection.start, selection.stop, selection.step)
+    elif not isinstance(selection, slice):
+        selection = slice(*selection)
+    window = range(count)[selection]
+    if window.step < 0:
+        raise ValueError("Windows must keep the strategy order.")
+    return window
+
+
+def _describe_window(window: range) -> str:
+    if len(window) == 0:
+        return "none"
+    if window.step == 1:
+        return f"{window[0]}-{window[-1]}"
+    return f"{window[0]}-{window[-1]} (step {window.step})"
+
+
+def _inside(window: range, count: int) -> slice:
+    # strategies without payoffs (more names than matrix rows/cols) can only come last
+    return slice(window.start, min(window.stop, count), window.step)
+
+
+def _payoff_shape(game: TwoPlayerStrategicFormGame) -> Optional[Tuple[int, int]]:
+    storage = getattr(game, PAYOFF_STORAGE_ATTR, None)
+    if storage is None:
+        return None
+    view_indexes = getattr(game, VIEW_INDEXES_ATTR, None)
+    return storage[0].shape if view_indexes is None else (len(view_indexes[0]), len(view_indexes[1]))
+
+
+def _payoff_window(game: TwoPlayerStrategicFormGame, row_window: range, column_window: range) -> Tuple[np.ndarray, np.ndarray]:
+    # read straight from the shared payoff storage through the view indexes: only the window is
+    # gathered, never the whole restricted block behind `_payoff_matrices`
+    storage = getattr(game, PAYOFF_STORAGE_ATTR)
+    view_indexes = getattr(game, VIEW_INDEXES_ATTR, None)
+    rows = np.arange(row_window.start, row_window.stop, row_window.step, dtype=np.intp)
+    columns = np.arange(column_window.start, column_window.stop, column_window.step, dtype=np.intp)
+    if view_indexes is not None:
+        rows, columns = view_indexes[0][rows], view_indexes[1][columns]
+    return _restrict(storage[0], rows, columns), _restrict(storage[1], rows, columns)
+
+
+def _format_payoff_row(game: TwoPlayerStrategicFormGame, payoff_shape: Tuple[int, int], row_index: int,
+                       column_window: range) -> List[str]:
+    rows, columns = payoff_shape
+    if row_index >= rows:
+        return ["—"] * len(column_window)
+    player1, player2 = _payoff_window(game, range(row_index, row_index + 1), range(columns)[_inside(column_window, columns)])
+    cells = [f"({first}, {second})" for first, second in zip(player1[0].tolist(), player2[0].tolist())]
+    return cells + ["—"] * (len(column_window) - len(cells))
+
+
+def _column_widths(
+    game: TwoPlayerStrategicFormGame,
+    payoff_shape: Tuple[int, int],
+    header: List[str],
+    player1_strats: List[str],
+    row_window: range,
+    column_window: range,
+) -> List[int]:
+    rows, columns = payoff_shape
+    row_inside, column_inside = _inside(row_window, rows), _inside(column_window, columns)
+    inside_rows = len(range(rows)[row_inside])
+    inside_columns = len(range(columns)[column_inside])
+
+    widths = np.array([len(cell) for cell in header[1:]], dtype=np.int64)
+    # "—" fills cells outside the payoff matrix
+    if inside_rows < len(row_window):
+        widths = np.maximum(widths, 1)
+    widths[inside_columns:] = np.maximum(widths[inside_columns:], 1)
+
+    # "(player1, player2)" is 4 characters plus both numbers, measured a block of rows at a time
+    block_rows = max(1, WIDTH_BLOCK_SIZE // max(1, inside_columns))
+    inside_row_indexes = range(rows)[row_inside]
+    inside_column_indexes = range(columns)[column_inside]
+    for start in range(0, inside_rows, block_rows):
+        player1, player2 = _payoff_window(game, inside_row_indexes[start:start + block_rows], inside_column_indexes)
+        cell_widths = 4 + _value_widths(player1) + _value_widths(player2)
+        if cell_widths.size:
+            widths[:inside_columns] = np.maximum(widths[:inside_columns], cell_widths.max(axis=0))
+
+    first_width = max([len(header[0])] + [len(str(player1_strats[row_idx])) for row_idx in row_window])
+    return [first_width] + widths.tolist()
+
+
+def _value_widths(values: np.ndarray) -> np.ndarray:
+    """len(str(value)) of every entry, as printed after `tolist()`."""
+    if values.dtype.kind in "iu":
+        negative = values < 0
+        if values.dtype.kind == "i":
+            # -(v + 1) + 1 avoids overflowing the most negative value
+            magnitude = np.where(negative, -(values + 1), values).astype(np.uint64) + negative
+        else:
+            magnitude = values.astype(np.uint64)
+        return 1 + np.searchsorted(_POWERS_OF_TEN, magnitude, side="right") + negative
+    if values.dtype.kind == "b":
+        return np.where(values, 4, 5)
+    if values.dtype.kind == "f" and values.dtype.itemsize <= 8:
+        # numpy prints float64 with the same shortest repr as Python floats
+        return np.char.str_len(values.astype(np.float64).astype(str))
+    return np.vectorize(lambda value: len(str(value)), otypes=[np.int64])(values.tolist()).reshape(values.shape)
 
 
 def _get_player_strategies(game: TwoPlayerStrategicFormGame, player_index: int) -> List[str]:
@@ -131,9 +239,12 @@ class PrintableTwoPlayerStrategicFormGame(TwoPlayerStrategicFormGame):
         if isinstance(game, cls):
             return game
         strategies = _clone_strategy_matrix(getattr(game, STRATEGIES_ATTR, None))
-        payoffs = _clone_payoff_matrix(getattr(game, PAYOFFS_ATTR, None))
 
-        return cls(strategies=strategies, payoffs=payoffs)
+        printable = cls(strategies=strategies)
+        if getattr(game, PAYOFF_STORAGE_ATTR, None) is not None:
+            # payoffs are never modified in place, share them (and the view indexes) instead of copying
+            printable._set_payoff_view(getattr(game, PAYOFF_STORAGE_ATTR), game._view_indexes)
+        return printable
 
     def __repr__(self) -> str:
         return (
@@ -144,6 +255,10 @@ class PrintableTwoPlayerStrategicFormGame(TwoPlayerStrategicFormGame):
     def __str__(self) -> str:
         return _format_game(self, title=self.__class__.__name__)
 
+    def write(self, stream: Optional[TextIO] = None, rows: Window = None, columns: Window = None) -> None:
+        """Stream the game to `stream`, optionally only a window of rows and columns (see `write_game`)."""
+        write_game(self, stream, title=self.__class__.__name__, rows=rows, columns=columns)
+
 
 def _printible_property(game: TwoPlayerStrategicFormGame) -> str:
     return _format_game(game)
@@ -0,0 +1,103 @@
+from typing import List, NamedTuple
+
+import numpy as np
+
+PRICING_RULES = ("first", "second")
+TIE_BREAKING_RULES = ("lowest_index", "fixed_order", "random")
+
+# Bid profiles evaluated per vectorized block
+PROFILE_CHUNK_SIZE = 1 << 16
+
+
+class AuctionOutcomes(NamedTuple):
+    """Outcomes of a batch of M bid profiles over N bidders."""
+    winners: np.ndarray
+    payments: np.ndarray
+    utilities: np.ndarray
+
+
+class SealedBidAuction():
+    """
+    Sealed-bid auction for a single item between N bidders, the highest bid wins and pays
+    its own bid (first-price) or the highest other bid (second-price, Vickery).
+    """
+    def __init__(self, valuations: List[float], pricing: str = "second", tie_breaking: str = "lowest_index",
+                 priority: List[int] = None, seed: int = None):
+        """
+        :param valuations: Evaluation of the item for every bidder
+        :param pricing: "first" or "second" price
+        :param tie_breaking: Winner among the highest bids: "lowest_index", "fixed_order"
+        (first bidder in `priority`) or "random" (uniform, reproducible with `seed`)
+        :param priority: Bidder indexes from highest to lowest priority for "fixed_order",
+        [1, 0] matches VickeryAuction with tie_breacker=1
+        :param seed: Seed of the random tie breaking
+        """
+        if pricing not in PRICING_RULES:
+            raise ValueError(f"Unknown pricing {pricing}, expected one of {PRICING_RULES}.")
+        if tie_breaking not in TIE_BREAKING_RULES:
+            raise ValueError(f"Unknown tie breaking {tie_breaking}, expected one of {TIE_BREAKING_RULES}.")
+
+        self.valuations = np.asarray(valuations, dtype=float)
+        self.bidder_count = len(self.valuations)
+        self.pricing = pricing
+        self.tie_breaking = tie_breaking
+
+        if tie_breaking == "fixed_order":
+            if priority is None or sorted(priority) != list(range(self.bidder_count)):
+                raise ValueError("Fixed order tie breaking needs a priority permutation of the bidder indexes.")
+            # _ranks[bidder] is higher for bidders winning ties
+            self._ranks = np.empty(self.bidder_count)
+            self._ranks[np.asarray(priority)] = np.arange(self.bidder_count, 0, -1)
+        self._rng = np.random.default_rng(seed)
+
+    def evaluate(self, bid_profiles, valuations=None, chunk_size: int = PROFILE_CHUNK_SIZE) -> AuctionOutcomes:
+        """
+        Evaluate a batch of bid profiles.
+
+        :param bid_profiles: M x N array, row m holds the bids of all bidders in profile m
+        :param valuations: Optional M x N (or N) evaluations overriding the auction's ones
+        :param chunk_size: Profiles evaluated per vectorized block
+        :return: Winner index, payment and M x N utilities of every profile
+        """
+        bid_profiles = np.asarray(bid_profiles, dtype=float)
+        if bid_profiles.ndim == 1:
+            bid_profiles = bid_profiles[None, :]
+        if bid_profiles.shape[1] != self.bidder_count:
+            raise ValueError(f"Expected {self.bidder_count} bids per profile, got {bid_profiles.shape[1]}.")
+        valuations = self.valuations if valuations is None else np.asarray(valuations, dtype=float)
+        valuations = np.broadcast_to(valuations, bid_profiles.shape)
+
+        profile_count = len(bid_profiles)
+        winners = np.empty(profile_count, dtype=np.intp)
+        payments = np.empty(profile_count)
+        utilities = np.zeros(bid_profiles.shape)
+        for start in range(0, profile_count, chunk_size):
+            chunk = slice(start, start + chunk_size)
+            bids = bid_profiles[chunk]
+            rows = np.arange(len(bids))
+
+            winners[chunk] = self._winners(bids)
+            payments[chunk] = self._payments(bids, winners[chunk])
+            utilities[chunk][rows, winners[chunk]] = valuations[chunk][rows, winners[chunk]] - payments[chunk]
+
+        return AuctionOutcomes(winners, payments, utilities)
+
+    def outcome(self, bids: List[float]) -> tuple:
+        """Utilities of every bidder for a single bid profile."""
+        return tuple(self.evaluate([bids]).utilities[0].tolist())
+
+    def _winners(self, bids: np.ndarray) -> np.ndarray:
+        is_highest = bids == bids.max(axis=1, keepdims=True)
+        if self.tie_breaking == "lowest_index":
+            return np.argmax(is_highest, axis=1)
+        if self.tie_breaking == "fixed_order":
+            return np.argmax(np.where(is_highest, self._ranks, -1.0), axis=1)
+        return np.argmax(np.where(is_highest, self._rng.random(bids.shape), -1.0), axis=1)
+
+    def _payments(self, bids: np.ndarray, winners: np.ndarray) -> np.ndarray:
+        if self.pricing == "first":
+            return bids[np.arange(len(bids)), winners]
+        if self.bidder_count < 2:
+            return np.zeros(len(bids))
+        # the second highest bid equals the winning one on a tie
+        return np.partition(bids, -2, axis=1)[:, -2]
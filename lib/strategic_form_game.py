@@ -1,9 +1,45 @@
 from typing import List, Tuple
 
+import numpy as np
+
+from lib.dominance_elimination import EliminationStep, iterated_elimination
+from lib.exact_arithmetic import check_backend, float_error_bound, integer_scaled
+from lib.instrumentation import PAYOFF_LOOKUPS, STRATEGY_INDEX_LOOKUPS, SUBGAMES_BUILT, count
+
 StrategyMatrix = List[List[str]]
 Payoff = Tuple[int, int]
 PayoffMatrix = List[List[Payoff]]
 
+# Number of values per intermediate block in the batched mixed strategy computations
+PROFILE_BLOCK_SIZE = 1 << 22
+
+def _contiguous_slice(indexes: np.ndarray):
+    """The slice equal to `indexes` when they are increasing consecutive integers, else None."""
+    if len(indexes) == 0:
+        return slice(0, 0)
+    start = int(indexes[0])
+    if int(indexes[-1]) - start + 1 == len(indexes) and (len(indexes) == 1 or (np.diff(indexes) == 1).all()):
+        return slice(start, start + len(indexes))
+    return None
+
+
+def _restrict(matrix: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """matrix[rows][:, cols], slicing contiguous indexes first so only the kept block is ever copied."""
+    row_slice, col_slice = _contiguous_slice(rows), _contiguous_slice(cols)
+    if row_slice is not None and col_slice is not None:
+        return matrix[row_slice, col_slice]
+    if row_slice is not None:
+        return matrix[row_slice][:, cols]
+    if col_slice is not None:
+        return matrix[:, col_slice][rows]
+    return matrix[np.ix_(rows, cols)]
+
+
+def _as_python(value):
+    # numpy scalars become Python numbers, entries of object arrays (e.g. `Fraction`s) are returned as they are
+    return value.item() if isinstance(value, np.generic) else value
+
+
 class TwoPlayerStrategicFormGame:
     """A class representing a strategic form game for **two players**.
 
@@ -25,6 +61,17 @@ class TwoPlayerStrategicFormGame:
         [[(player1_payoff, player2_payoff), ...],
          [(player1_payoff, player2_payoff), ...],
          ...]
+
+    Internally the payoffs are kept as two contiguous numeric arrays of shape
+    rows x cols, one per player (see `from_payoff_arrays`). The list of tuples
+    above is only materialized on demand through `_payoffs`.
+
+    Subgames are views: they share the payoff arrays of the game they were cut
+    from and only hold the kept row and column indexes, so chained restrictions
+    (e.g. every step of the dominated strategy elimination) copy no payoffs.
+    `_payoff_matrices` returns the restricted arrays, as numpy views when the
+    kept indexes are contiguous, otherwise gathered once on first access.
+    `materialize` makes an independent copy.
     """
 
     first_player = 0
@@ -47,6 +94,103 @@ class TwoPlayerStrategicFormGame:
             # payoffs[i][j] stores (player1, player2) for strategies (i, j)
             self._payoffs = payoffs
 
+    @property
+    def _strategies(self) -> StrategyMatrix:
+        if '_strategy_matrix' not in self.__dict__:
+            raise AttributeError('_strategies')
+        return self._strategy_matrix
+
+    @_strategies.setter
+    def _strategies(self, strategies: StrategyMatrix):
+        self._strategy_matrix = strategies
+        # _strategy_indexes[player] maps a strategy name to its first index for that player
+        self._strategy_indexes = []
+        for player_strategies in strategies:
+            lookup = {}
+            for index, strategy in enumerate(player_strategies):
+                lookup.setdefault(strategy, index)
+            self._strategy_indexes.append(lookup)
+
+    @classmethod
+    def from_payoff_arrays(cls, strategies: StrategyMatrix, first_player_payoffs, second_player_payoffs) -> 'TwoPlayerStrategicFormGame':
+        """Build a game directly from one payoff array per player.
+
+        Args:
+            strategies: Two-row matrix of strategy names.
+            first_player_payoffs: Array-like of shape rows x cols with player 1 payoffs.
+            second_player_payoffs: Array-like of shape rows x cols with player 2 payoffs.
+        """
+        game = cls(strategies)
+        game._set_payoff_matrices(first_player_payoffs, second_player_payoffs)
+        return game
+
+    @property
+    def _payoffs(self) -> PayoffMatrix:
+        if not hasattr(self, '_payoff_matrices'):
+            raise AttributeError('_payoffs')
+        first, second = self._payoff_matrices
+        return [list(zip(first_row, second_row)) for first_row, second_row in zip(first.tolist(), second.tolist())]
+
+    @_payoffs.setter
+    def _payoffs(self, payoffs: PayoffMatrix):
+        rows = len(payoffs)
+        cols = len(payoffs[0]) if rows > 0 else 0
+        if any(len(row) != cols or any(len(payoff) != 2 for payoff in row) for row in payoffs):
+            raise ValueError(f"Payoff matrix must be {rows}x{cols} with (player1, player2) tuples.")
+        if rows * cols == 0:
+            self._set_payoff_matrices(np.zeros((rows, cols), dtype=np.int64), np.zeros((rows, cols), dtype=np.int64))
+            return
+        # one array per player, so each keeps its own dtype (an int player is not promoted by a float one)
+        self._set_payoff_matrices(*(np.asarray([[payoff[player_index] for payoff in row] for row in payoffs])
+                                    for player_index in self.players))
+
+    def _set_payoff_matrices(self, first_player_payoffs, second_player_payoffs):
+        first = np.ascontiguousarray(first_player_payoffs)
+        second = np.ascontiguousarray(second_player_payoffs)
+        if first.ndim != 2 or first.shape != second.shape:
+            raise ValueError(f"Payoff arrays must share a rows x cols shape, got {first.shape} and {second.shape}.")
+        # _payoff_storage[player] is a rows x cols array of that player's payoffs
+        self._payoff_storage = (first, second)
+        self._view_indexes = None
+        self._restricted_matrices = (first, second)
+
+    def _set_payoff_view(self, payoff_storage, view_indexes):
+        # view_indexes is None or (rows, cols) indexes into the shared payoff_storage
+        self._payoff_storage = payoff_storage
+        self._view_indexes = view_indexes
+        self._restricted_matrices = payoff_storage if view_indexes is None else None
+
+    @property
+    def _payoff_matrices(self) -> Tuple[np.ndarray, np.ndarray]:
+        """rows x cols payoff arrays of both players, restricted to the strategies of this (sub)game."""
+        if '_payoff_storage' not in self.__dict__:
+            raise AttributeError('_payoff_matrices')
+        if self._restricted_matrices is None:
+            rows, cols = self._view_indexes
+            self._restricted_matrices = tuple(_restrict(matrix, rows, cols) for matrix in self._payoff_storage)
+        return self._restricted_matrices
+
+    @property
+    def is_view(self) -> bool:
+        """True for subgames sharing the payoff arrays of another game."""
+        return getattr(self, '_view_indexes', None) is not None
+
+    def materialize(self) -> 'TwoPlayerStrategicFormGame':
+        """Independent copy of the game owning its own contiguous payoff arrays."""
+        first_player_payoffs, second_player_payoffs = self._payoff_matrices
+        strategies = [list(player_strategies) for player_strategies in self._strategies]
+        return TwoPlayerStrategicFormGame.from_payoff_arrays(strategies, first_player_payoffs.copy(), second_player_payoffs.copy())
+
+    def _player_payoff_matrix(self, player_index) -> np.ndarray:
+        """Payoffs of `player_index` with its own strategies on the rows."""
+        if player_index == self.first_player:
+            return self._payoff_matrices[self.first_player]
+        return self._payoff_matrices[self.second_player].T
+
+    def _profile_columns(self, player_index, strategy_indexes) -> np.ndarray:
+        """Columns of `_player_payoff_matrix(player_index)` for the opponent strategies in strategy_indexes."""
+        return np.asarray(strategy_indexes[self._get_opponent(player_index)], dtype=np.intp)
+
     def get_weakly_dominant_strategies(self) -> List[tuple]:
         player1 = self._get_weakly_dominant_strategies_for_player(self.first_player)
         player2 = self._get_weakly_dominant_strategies_for_player(self.second_player)
@@ -58,26 +202,49 @@ class TwoPlayerStrategicFormGame:
         player2 = self._get_strictly_dominant_strategies_for_player(self.second_player)
 
         return player1 + player2
+
+    def get_weakly_dominant_strategy_indexes(self) -> List[Tuple[int, int, int]]:
+        """Index variant of `get_weakly_dominant_strategies` as (player_index, dominant_index, dominated_index)."""
+        return [(player_index, i, j)
+                for player_index in self.players
+                for i, j in self._get_dominance_index_pairs_for_player(player_index, strictly=False)]
+
+    def get_strictly_dominant_strategy_indexes(self) -> List[Tuple[int, int, int]]:
+        """Index variant of `get_strictly_dominant_strategies` as (player_index, dominant_index, dominated_index)."""
+        return [(player_index, i, j)
+                for player_index in self.players
+                for i, j in self._get_dominance_index_pairs_for_player(player_index, strictly=True)]
     
     def eliminate_dominated_strategies(self, strictly_only=False, print_process=False):
-        dominant_strategies = []
-        if strictly_only:
-            dominant_strategies = self.get_strictly_dominant_strategies()
-        else:
-            dominant_strategies = self.get_weakly_dominant_strategies()
-
-        if len(dominant_strategies) > 0:
-            
-            target_remove = dominant_strategies[0][1]
-            sgame = self._remove_strategy(target_remove)
-            
-            if print_process:
-                print("-----------------")
-                print(f"Removing {target_remove} due to {dominant_strategies[0]}")
-                sgame.print()
-            return sgame.eliminate_dominated_strategies(strictly_only, print_process)
-
-        return self
+        sgame, trace = self.eliminate_dominated_strategies_with_trace(strictly_only)
+        if print_process:
+            self.print_elimination_trace(trace)
+        return sgame
+
+    def eliminate_dominated_strategies_with_trace(self, strictly_only=False) -> Tuple['TwoPlayerStrategicFormGame', List[EliminationStep]]:
+        """Iteratively eliminate dominated strategies.
+
+        Returns the final subgame together with the list of `EliminationStep`s that led to it.
+        """
+        surviving_indexes, trace = iterated_elimination(self, strictly_only)
+        if len(trace) == 0:
+            return self, trace
+
+        return self.subgame_by_indexes(surviving_indexes), trace
+
+    def print_elimination_trace(self, trace: List[EliminationStep], stream=None):
+        """Print every step of `trace` with the subgame left after it.
+
+        Every subgame is a view of this game's payoffs and is printed from the shared storage
+        (see `print`), so no round gathers a copy of its payoffs.
+        """
+        remaining = [np.ones(len(self._strategies[player_index]), dtype=bool) for player_index in self.players]
+        for step in trace:
+            remaining[step.player_index][step.dominated_index] = False
+
+            print("-----------------", file=stream)
+            print(f"Removing {step.dominated_strategy} due to {(step.dominant_strategy, step.dominated_strategy)}", file=stream)
+            self.subgame_by_indexes([np.flatnonzero(kept) for kept in remaining]).print(stream=stream)
     
     def _remove_strategy(self, strategy) -> 'TwoPlayerStrategicFormGame':
         result_strategies = [[],[]]
@@ -92,57 +259,48 @@ class TwoPlayerStrategicFormGame:
         return self.subgame(result_strategies)
 
     def _get_weakly_dominant_strategies_for_player(self, player_index) -> List[tuple]:
-        result = []
-        for i in range(len(self._strategies[player_index])):
-            for j in range(len(self._strategies[player_index])):
-                if i == j:
-                    continue
-
-                opponent_index = self._get_opponent(player_index)
-
-                # 1. all utility values are as better as the other one
-                atleast_equal = True;
-                for o in range(len(self._strategies[opponent_index])):
-                    if self._get_payoff_value(player_index, i, o) < self._get_payoff_value(player_index, j, o):
-                        atleast_equal = False
-                        break
-
-                if not atleast_equal:
-                    continue
-
-                # 1. Not equal
-                equal = True
-                for o in range(len(self._strategies[opponent_index])):
-                    if self._get_payoff_value(player_index, i, o) > self._get_payoff_value(player_index, j, o):
-                        equal = False
-                        break
-                
-                if equal:
-                    continue
-
-                result.append((self._strategies[player_index][i], self._strategies[player_index][j]))
-        return result
+        player_strategies = self._strategies[player_index]
+        return [(player_strategies[i], player_strategies[j])
+                for i, j in self._get_dominance_index_pairs_for_player(player_index, strictly=False)]
     
     def _get_strictly_dominant_strategies_for_player(self, player_index) -> List[tuple]:
-        dominant_pairs = []
-        weakly_dominants = self._get_weakly_dominant_strategies_for_player(player_index)
-        for pair in weakly_dominants:
-            is_strictly_dominant = True
-            for o in range(len(self._strategies[self._get_opponent(player_index)])):
-                if self._get_payoff_value(player_index, self._strategy_to_index(pair[0]), o) <= self._get_payoff_value(player_index, self._strategy_to_index(pair[1]), o):
-                    is_strictly_dominant = False
-                    break
-            if is_strictly_dominant:
-                dominant_pairs.append(pair)
-        return dominant_pairs
+        player_strategies = self._strategies[player_index]
+        return [(player_strategies[i], player_strategies[j])
+                for i, j in self._get_dominance_index_pairs_for_player(player_index, strictly=True)]
+
+    def _get_dominance_index_pairs_for_player(self, player_index, strictly) -> List[Tuple[int, int]]:
+        result = []
+        payoffs = self._player_payoff_matrix(player_index)
+        for i in range(payoffs.shape[0]):
+            better = payoffs[i] > payoffs
+            if strictly:
+                dominated = better.all(axis=1) & better.any(axis=1)
+            else:
+                # 1. all utility values are as better as the other one, 2. not equal
+                dominated = (payoffs[i] >= payoffs).all(axis=1) & better.any(axis=1)
+            dominated[i] = False
+
+            result.extend((i, int(j)) for j in np.flatnonzero(dominated))
+        return result
     
     def _get_payoff(self, caller_index, caller_strategy_index, opponent_strategy_index) -> Payoff:
         if (caller_index == self.first_player):
-            return self._payoffs[caller_strategy_index][opponent_strategy_index]
-        return self._payoffs[opponent_strategy_index][caller_strategy_index]
+            return self._payoff_at(caller_strategy_index, opponent_strategy_index)
+        return self._payoff_at(opponent_strategy_index, caller_strategy_index)
+
+    def _payoff_at(self, first_player_strategy_index, second_player_strategy_index) -> Payoff:
+        count(PAYOFF_LOOKUPS)
+        if self._view_indexes is not None:
+            # look the single entry up in the shared arrays instead of restricting them
+            rows, cols = self._view_indexes
+            first_player_strategy_index = rows[first_player_strategy_index]
+            second_player_strategy_index = cols[second_player_strategy_index]
+        return (_as_python(self._payoff_storage[self.first_player][first_player_strategy_index, second_player_strategy_index]),
+                _as_python(self._payoff_storage[self.second_player][first_player_strategy_index, second_player_strategy_index]))
     
     def _get_payoff_value(self, caller_index, caller_strategy_index, opponent_strategy_index) -> int:
-        return self._get_payoff(caller_index, caller_strategy_index, opponent_strategy_index)[caller_index]
+        count(PAYOFF_LOOKUPS)
+        return self._player_payoff_matrix(caller_index)[caller_strategy_index, opponent_strategy_index]
 
     def _get_opponent(self, player_index):
         return 1 - player_index
@@ -150,81 +308,120 @@ class TwoPlayerStrategicFormGame:
 
     def subgame(self, substrategies:StrategyMatrix):
         strategy_indexs = self._strategies_to_indexes(substrategies)
-        subpayoff_matrix = self._subpayoff_matrix(strategy_indexs)
+        return self._subgame_view(substrategies, strategy_indexs)
+
+    def subgame_by_indexes(self, strategy_indexs:list[list[int]]) -> 'TwoPlayerStrategicFormGame':
+        """Index variant of `subgame`, strategy_indexs[player] lists the kept strategy indexes."""
+        substrategies = [[self._strategies[player_index][i] for i in strategy_indexs[player_index]] for player_index in self.players]
+        return self._subgame_view(substrategies, strategy_indexs)
 
-        return TwoPlayerStrategicFormGame(substrategies, subpayoff_matrix)
+    def _subgame_view(self, substrategies:StrategyMatrix, strategy_indexs:list[list[int]]) -> 'TwoPlayerStrategicFormGame':
+        rows = np.asarray(strategy_indexs[self.first_player], dtype=np.intp)
+        cols = np.asarray(strategy_indexs[self.second_player], dtype=np.intp)
+        if self._view_indexes is not None:
+            # compose with this view's indexes so every view points into the original arrays
+            rows, cols = self._view_indexes[0][rows], self._view_indexes[1][cols]
+
+        count(SUBGAMES_BUILT)
+        game = TwoPlayerStrategicFormGame(substrategies)
+        game._set_payoff_view(self._payoff_storage, (rows, cols))
+        return game
 
     def _strategies_to_indexes(self, strategies:StrategyMatrix) -> list[list[int]]:
         strategy_indexs = [[],[]]
+        count(STRATEGY_INDEX_LOOKUPS, sum(len(strategies[player_index]) for player_index in self.players))
         for player_index in self.players:
+            lookup = self._strategy_indexes[player_index]
             for player_strategy in strategies[player_index]:
-                for i in range(len(self._strategies[player_index])):
-                    if player_strategy == self._strategies[player_index][i]:
-                        strategy_indexs[player_index].append(i)
+                if player_strategy in lookup:
+                    strategy_indexs[player_index].append(lookup[player_strategy])
 
         return strategy_indexs
     
-    def _strategy_to_index(self, strategy: str):
-        for i in self.players:
-            for j in range(len(self._strategies[i])):
-                if strategy == self._strategies[i][j]:
-                    return j
+    def _strategy_to_index(self, strategy: str, player_index: int = None):
+        count(STRATEGY_INDEX_LOOKUPS)
+        players = self.players if player_index is None else [player_index]
+        for i in players:
+            if strategy in self._strategy_indexes[i]:
+                return self._strategy_indexes[i][strategy]
                 
         raise ValueError(f"Strategy {strategy} not found in any player's strategies.")
-    
-    def _subpayoff_matrix(self, substrategy_indexs:StrategyMatrix) -> PayoffMatrix:
-        result:PayoffMatrix = [];
-        for i in range(len(substrategy_indexs[self.first_player])):
-            result.append([])
-            mappd_first_player_strategy_index = substrategy_indexs[self.first_player][i]
-            for j in range(len(substrategy_indexs[1])):
-                mappd_second_player_strategy_index = substrategy_indexs[self.second_player][j]
-                tuple = self._payoffs[mappd_first_player_strategy_index][mappd_second_player_strategy_index]
-                result[i].append(tuple)
-        return result
 
-    def print(self):
+    def strategy_index(self, player_index: int, strategy: str) -> int:
+        """Index of `strategy` among the strategies of `player_index`."""
+        return self._strategy_to_index(strategy, player_index)
+    
+    def _subpayoff_matrix(self, substrategy_indexs:list[list[int]]) -> Tuple[np.ndarray, np.ndarray]:
+        rows = np.asarray(substrategy_indexs[self.first_player], dtype=np.intp)
+        cols = np.asarray(substrategy_indexs[self.second_player], dtype=np.intp)
+        selection = np.ix_(rows, cols)
+        return (self._payoff_matrices[self.first_player][selection],
+                self._payoff_matrices[self.second_player][selection])
+
+    def print(self, rows=None, columns=None, stream=None):
+        """Print the game row by row, `rows` / `columns` optionally select a window of strategies."""
         from lib.printable_strategic_form_game import PrintableTwoPlayerStrategicFormGame
-        print(PrintableTwoPlayerStrategicFormGame.from_game(self))
+        PrintableTwoPlayerStrategicFormGame.from_game(self).write(stream, rows=rows, columns=columns)
 
     def pure_nash_equilibria(self):
-        best_responses = [[],[]]
-        for player_index in self.players:
-            for opponent_strategy in self._strategies[self._get_opponent(player_index)]:
-                for response in self.best_responses(player_index, opponent_strategy):
-                    best_responses[player_index].append((response, opponent_strategy))
+        return list(self.iter_pure_nash_equilibria(strategy_names=True))
 
-        result = []
-        for first_player_response in best_responses[self.first_player]:
-            for second_player_response in best_responses[self.second_player]:
-                if first_player_response[0] == second_player_response[1] and first_player_response[1] == second_player_response[0]:
-                    result.append(first_player_response)
-        
-        return result
+    def pure_nash_equilibrium_indexes(self) -> List[Tuple[int, int]]:
+        """Index variant of `pure_nash_equilibria`."""
+        return list(self.iter_pure_nash_equilibria())
+
+    def iter_pure_nash_equilibria(self, strategy_names: bool = False, chunk_size: int = 1024):
+        """Stream the pure Nash equilibria, ordered by player 2 strategy and then player 1 strategy.
+
+        Best responses of both players are computed for the whole matrix at once (column-wise
+        maxima for player 1, row-wise maxima for player 2); the profiles where both coincide
+        are then yielded `chunk_size` columns at a time.
+
+        Args:
+            strategy_names: Yield (player1_strategy, player2_strategy) names instead of index pairs.
+            chunk_size: Number of player 2 strategies scanned per block.
+        """
+        first_player_payoffs, second_player_payoffs = self._payoff_matrices
+        if first_player_payoffs.size == 0:
+            return
+
+        first_player_best = first_player_payoffs.max(axis=0)
+        second_player_best = second_player_payoffs.max(axis=1, keepdims=True)
+
+        first_player_strategies = self._strategies[self.first_player]
+        second_player_strategies = self._strategies[self.second_player]
+        for start in range(0, first_player_payoffs.shape[1], chunk_size):
+            stop = start + chunk_size
+            is_equilibrium = ((first_player_payoffs[:, start:stop] == first_player_best[start:stop])
+                              & (second_player_payoffs[:, start:stop] == second_player_best))
+            columns, rows = np.nonzero(is_equilibrium.T)
+            for i, j in zip(rows.tolist(), (columns + start).tolist()):
+                if strategy_names:
+                    yield (first_player_strategies[i], second_player_strategies[j])
+                else:
+                    yield (i, j)
 
     def best_responses(self, caller_index: int, opponets_strategy: str) -> List[str]:
-        response_indexes = []
         caller_strategies = self._strategies[caller_index] 
-        opponent_strategy_index = self._strategy_to_index(opponets_strategy)
-        for i in range(len(caller_strategies)):
-            if len(response_indexes) == 0:
-                response_indexes.append(i)
-                continue
-
-            value = self._get_payoff_value(caller_index, i, opponent_strategy_index)
-            current_max =  self._get_payoff_value(caller_index, response_indexes[0], opponent_strategy_index)
-            if current_max == value:
-                response_indexes.append(i)
-                continue
-
-            if current_max < value:
-                response_indexes = [i]
-
-        return [caller_strategies[response_index] for response_index in response_indexes]
+        opponent_strategy_index = self._strategy_to_index(opponets_strategy, self._get_opponent(caller_index))
+        return [caller_strategies[response_index]
+                for response_index in self.best_response_indexes(caller_index, opponent_strategy_index)]
+
+    def best_response_indexes(self, caller_index: int, opponent_strategy_index: int) -> List[int]:
+        """Index variant of `best_responses`."""
+        values = self._player_payoff_matrix(caller_index)[:, opponent_strategy_index]
+        if len(values) == 0:
+            return []
+
+        return np.flatnonzero(values == values.max()).tolist()
     
     def get_output(self, first_player_strategy: str, second_player_strategy: str) -> Payoff:
-        indexes = self._strategies_to_indexes([[first_player_strategy], [second_player_strategy]])
-        return self._payoffs[indexes[0][0]][indexes[1][0]]
+        return self.get_output_by_indexes(self._strategy_to_index(first_player_strategy, self.first_player),
+                                          self._strategy_to_index(second_player_strategy, self.second_player))
+
+    def get_output_by_indexes(self, first_player_strategy_index: int, second_player_strategy_index: int) -> Payoff:
+        """Index variant of `get_output`."""
+        return self._payoff_at(first_player_strategy_index, second_player_strategy_index)
     
     def expected_utility(self, mixed_strategy: List[List[float]]):
         """
@@ -234,52 +431,199 @@ class TwoPlayerStrategicFormGame:
         Returns a list with expected utilities for player 1 and player 2.
         """
 
-        result = [0.0, 0.0]
-        for first_player_strategy_index in range(len(self._strategies[self.first_player])):
-            for second_player_strategy_index in range(len(self._strategies[self.second_player])):
-                propability = (mixed_strategy[self.first_player][first_player_strategy_index] 
-                 * mixed_strategy[self.second_player][second_player_strategy_index])
-                payoff = self._payoffs[first_player_strategy_index][second_player_strategy_index]
-                result[0] += (propability * payoff[0])
-                result[1] += (propability * payoff[1])
+        utilities = self.expected_utilities([mixed_strategy[self.first_player]], [mixed_strategy[self.second_player]])
+        return utilities[0].tolist()
+
+    def expected_utilities(self, first_player_mixes, second_player_mixes, chunk_size: int = None) -> np.ndarray:
+        """
+        Calculate expected utilities for a batch of mixed strategy profiles.
+        first_player_mixes: N x rows array, one player 1 mixed strategy per profile.
+        second_player_mixes: N x cols array, one player 2 mixed strategy per profile.
+        chunk_size: Profiles evaluated per matrix product, None picks one that bounds memory.
+        Returns an N x 2 array with expected utilities for player 1 and player 2.
+        """
+        first_player_mixes, second_player_mixes = self._as_profile_batch(first_player_mixes, second_player_mixes)
+        result = np.empty((len(first_player_mixes), 2))
+        for chunk in self._profile_chunks(len(first_player_mixes), chunk_size):
+            for player_index in self.players:
+                weighted = first_player_mixes[chunk] @ self._payoff_matrices[player_index]
+                result[chunk, player_index] = np.einsum('ij,ij->i', weighted, second_player_mixes[chunk])
+        return result
+
+    def indifference_residuals(self, first_player_mixes, second_player_mixes, chunk_size: int = None) -> np.ndarray:
+        """
+        Largest deviation between the expected utilities of a player's pure strategies
+        (against the opponent's mix) and that of its first strategy, for a batch of profiles.
+        Arguments as in `expected_utilities`. Returns an N x 2 array, zero means indifferent.
+        """
+        first_player_mixes, second_player_mixes = self._as_profile_batch(first_player_mixes, second_player_mixes)
+        opponent_mixes = [second_player_mixes, first_player_mixes]
+        result = np.zeros((len(first_player_mixes), 2))
+        for chunk in self._profile_chunks(len(first_player_mixes), chunk_size):
+            for player_index in self.players:
+                # utilities[n, s] is the expected utility of pure strategy s against the opponent's n-th mix
+                utilities = opponent_mixes[player_index][chunk] @ self._player_payoff_matrix(player_index).T
+                if utilities.shape[1] > 0:
+                    result[chunk, player_index] = np.abs(utilities - utilities[:, :1]).max(axis=1)
+        return result
+
+    def are_mixed_nash_equilibria(self, first_player_mixes, second_player_mixes, chunk_size: int = None,
+                                  backend: str = "float") -> np.ndarray:
+        """
+        Batch version of `is_mixed_nash_equilibrium`, returns one bool per profile.
+        backend: "float" accepts residuals up to 1e-6, "exact" requires exact indifference; then
+                 only the profiles whose float residuals are within rounding error of zero are
+                 rechecked with integer arithmetic (see `lib.exact_arithmetic`).
+        """
+        check_backend(backend)
+        residuals = self.indifference_residuals(first_player_mixes, second_player_mixes, chunk_size)
+        if backend == "float":
+            return np.all(residuals <= 1e-6, axis=1)
+        return self._exact_equilibria(first_player_mixes, second_player_mixes, residuals, self.players)
+
+    def _exact_equilibria(self, first_player_mixes, second_player_mixes, residuals: np.ndarray, player_indexes) -> np.ndarray:
+        profile_count = len(residuals)
+        opponent_mixes = [np.asarray(second_player_mixes, dtype=object).reshape(profile_count, -1),
+                          np.asarray(first_player_mixes, dtype=object).reshape(profile_count, -1)]
+
+        # a residual above the rounding error of its float computation cannot be exactly zero
+        candidates = np.ones(profile_count, dtype=bool)
+        for player_index in player_indexes:
+            magnitude = (np.abs(self._player_payoff_matrix(player_index)).max(initial=0)
+                         * np.abs(opponent_mixes[player_index].astype(float)).sum(axis=1))
+            candidates &= residuals[:, player_index] <= 2 * float_error_bound(magnitude, opponent_mixes[player_index].shape[1])
+        if not candidates.any():
+            return candidates
+
+        payoffs = {player_index: integer_scaled(self._player_payoff_matrix(player_index))[0].astype(object)
+                   for player_index in player_indexes}
+        for profile in np.flatnonzero(candidates):
+            for player_index in player_indexes:
+                # the denominators of the payoffs and the mix are shared by every strategy and cancel out
+                utilities = payoffs[player_index] @ integer_scaled(opponent_mixes[player_index][profile])[0].astype(object)
+                if (utilities != utilities[:1]).any():
+                    candidates[profile] = False
+                    break
+        return candidates
 
+    def exploitabilities(self, first_player_mixes, second_player_mixes, chunk_size: int = None) -> np.ndarray:
+        """
+        Total gain both players could get by switching to a best response, for a batch of profiles.
+        Arguments as in `expected_utilities`. Returns N values, zero exactly at the Nash equilibria.
+        """
+        first_player_mixes, second_player_mixes = self._as_profile_batch(first_player_mixes, second_player_mixes)
+        opponent_mixes = [second_player_mixes, first_player_mixes]
+        own_mixes = [first_player_mixes, second_player_mixes]
+        result = np.zeros(len(first_player_mixes))
+        for chunk in self._profile_chunks(len(first_player_mixes), chunk_size):
+            for player_index in self.players:
+                utilities = opponent_mixes[player_index][chunk] @ self._player_payoff_matrix(player_index).T
+                if utilities.shape[1] > 0:
+                    result[chunk] += utilities.max(axis=1) - np.einsum('ij,ij->i', utilities, own_mixes[player_index][chunk])
         return result
+
+    def exploitability(self, mixed_strategy: List[List[float]]) -> float:
+        """Single profile version of `exploitabilities`."""
+        return float(self.exploitabilities([mixed_strategy[self.first_player]], [mixed_strategy[self.second_player]])[0])
+
+    def _as_profile_batch(self, first_player_mixes, second_player_mixes) -> Tuple[np.ndarray, np.ndarray]:
+        first_player_mixes = self._as_mix_batch(first_player_mixes, self.first_player)
+        second_player_mixes = self._as_mix_batch(second_player_mixes, self.second_player)
+        if len(first_player_mixes) != len(second_player_mixes):
+            raise ValueError(f"Expected the same number of profiles for both players, got {len(first_player_mixes)} and {len(second_player_mixes)}.")
+        return first_player_mixes, second_player_mixes
+
+    def _as_mix_batch(self, mixes, player_index: int) -> np.ndarray:
+        # one mix or an N x strategies batch, a wrong length is never reshaped into extra profiles
+        mixes = np.asarray(mixes, dtype=float)
+        strategy_count = len(self._strategies[player_index])
+        if mixes.ndim not in (1, 2) or mixes.shape[-1] != strategy_count:
+            raise ValueError(f"Mixed strategies of player {player_index + 1} need {strategy_count} probabilities each, got shape {mixes.shape}.")
+        return mixes.reshape(-1, strategy_count)
+
+    def _profile_chunks(self, profile_count: int, chunk_size: int = None):
+        if chunk_size is None:
+            # keep the intermediate N x strategies blocks around PROFILE_BLOCK_SIZE values
+            chunk_size = max(1, PROFILE_BLOCK_SIZE // max(1, *self._payoff_matrices[self.first_player].shape))
+        for start in range(0, profile_count, chunk_size):
+            yield slice(start, start + chunk_size)
     
-    def is_mixed_nash_equilibrium(self, mixed_strategy: List[List[float]]) -> bool:
+    def is_mixed_nash_equilibrium(self, mixed_strategy: List[List[float]], backend: str = "float") -> bool:
         """
         Check mixed strategy is nash equilibrium with Indifference Principle.
         mixed_strategy: A list containing two lists, each representing the mixed strategy
                         probabilities for player 1 and player 2 respectively.
+        backend: "float" (1e-6 tolerance) or "exact" (probabilities may be `Fraction`s), see `are_mixed_nash_equilibria`.
         """
 
-        # Assume first player's strategy is fixed, check second player's indifference
-        for player_index in self.players:
-            if not self._is_mixed_nash_equilibrium_for_player(mixed_strategy, player_index):
-                return False
-        return True
+        return bool(self.are_mixed_nash_equilibria([mixed_strategy[self.first_player]], [mixed_strategy[self.second_player]],
+                                                   backend=backend)[0])
     
-    def _is_mixed_nash_equilibrium_for_player(self, mixed_strategy: List[List[float]], player_index: int) -> bool:
+    def mixed_nash_equilibria(self, method: str = "support_enumeration", **kwargs) -> List[List[List[float]]]:
+        """
+        Find mixed Nash equilibria in the format accepted by `is_mixed_nash_equilibrium`.
+        method: "support_enumeration" (all equilibria of non-degenerate games) or
+                "lemke_howson" (one path per dropped label, for large games).
+        kwargs: Passed to the solver, e.g. max_equilibria, time_limit, processes.
+        """
+        from lib.mixed_nash_equilibria import support_enumeration, lemke_howson_equilibria
+
+        solvers = {"support_enumeration": support_enumeration, "lemke_howson": lemke_howson_equilibria}
+        if method not in solvers:
+            raise ValueError(f"Unknown mixed equilibrium method {method}, expected one of {list(solvers)}.")
+        return solvers[method](self, **kwargs)
+
+    def learning_dynamics(self, method: str = "regret_matching", **kwargs):
+        """
+        Approximate an equilibrium by simulating learning players, for games too large for exact solvers.
+        method: "fictitious_play", "regret_matching", "regret_matching_plus", "multiplicative_weights"
+                or "replicator_dynamics".
+        kwargs: Passed to `run_learning_dynamics`, e.g. iterations, tolerance, seeds, state, checkpoint.
+        Returns a `LearningState`, `average_strategies()` is the approximate equilibrium.
+        """
+        from lib.learning_dynamics import run_learning_dynamics
+        return run_learning_dynamics(self, method, **kwargs)
+
+    def maximin_strategy(self, player_index: int, warm_start=None):
+        """
+        Mixed strategy maximizing the payoff `player_index` can guarantee, solved as a linear program.
+        warm_start: A previous result for the same player, re-solving an edited game from its basis.
+        Returns a `MaximinSolution` (value, strategy, opponent_strategy, basis).
+        """
+        from lib.lp_equilibria import maximin_strategy
+        return maximin_strategy(self, player_index, warm_start)
+
+    def zero_sum_solution(self, warm_start=None):
+        """
+        Value and optimal mixed strategies of a zero-sum game from player 1's payoffs.
+        warm_start: A previous result, re-solving an edited game from its basis.
+        Returns a `ZeroSumSolution` (value, strategies, basis).
+        """
+        from lib.lp_equilibria import zero_sum_solution
+        return zero_sum_solution(self, warm_start)
+
+    def correlated_equilibrium(self, objective=None, warm_start=None):
+        """
+        Correlated equilibrium maximizing `objective` (rows x cols weights, social welfare by default).
+        warm_start: A previous result, re-solving an edited game from its basis.
+        Returns a `CorrelatedEquilibrium` (distribution, expected_utility, basis).
+        """
+        from lib.lp_equilibria import correlated_equilibrium
+        return correlated_equilibrium(self, objective, warm_start)
+
+    def _is_mixed_nash_equilibrium_for_player(self, mixed_strategy: List[List[float]], player_index: int,
+                                              backend: str = "float") -> bool:
         """
         Check mixed strategy is nash equilibrium for given player with Indifference Principle.
         mixed_strategy: A list containing two lists, each representing the mixed strategy
                         probabilities for player 1 and player 2 respectively.
         player_index: The index of the player to check (0 or 1).
+        backend: "float" or "exact", as in `are_mixed_nash_equilibria`.
         """
 
-        opponent_index = self._get_opponent(player_index)
-
-        # Assume first player's strategy is fixed, check second player's indifference
-        expected_utilities_for_each_strategy = []
-        for player_strategy_index in range(len(self._strategies[player_index])):
-            expected_utility = 0.0
-            for opponent_strategy_index in range(len(self._strategies[opponent_index])):
-                propability = mixed_strategy[opponent_index][opponent_strategy_index]
-                payoff = self._get_payoff_value(player_index, player_strategy_index, opponent_strategy_index)
-                expected_utility += (propability * payoff)
-            expected_utilities_for_each_strategy.append(expected_utility)
-
-        for i in range(1, len(expected_utilities_for_each_strategy)):
-            if abs(expected_utilities_for_each_strategy[i] - expected_utilities_for_each_strategy[0]) > 1e-6:
-                return False
-            
-        return True
\ No newline at end of file
+        check_backend(backend)
+        first_player_mix, second_player_mix = [mixed_strategy[self.first_player]], [mixed_strategy[self.second_player]]
+        residuals = self.indifference_residuals(first_player_mix, second_player_mix)
+        if backend == "float":
+            return bool(residuals[0, player_index] <= 1e-6)
+        return bool(self._exact_equilibria(first_player_mix, second_player_mix, residuals, [player_index])[0])